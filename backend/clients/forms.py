@@ -0,0 +1,36 @@
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.exceptions import ImproperlyConfigured
+
+from jobs.queue import enqueue
+from .jobs import send_password_reset_email
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """
+    Igual que PasswordResetForm, pero el correo se envía en segundo plano: la petición
+    no espera a la conexión con el servidor SMTP. Solo se encolan el ID del usuario y
+    los datos para renderizar el mensaje; el token se genera en el trabajo.
+    """
+
+    def save(self, domain_override=None,
+             subject_template_name='registration/password_reset_subject.txt',
+             email_template_name='registration/password_reset_email.html',
+             use_https=False, token_generator=default_token_generator,
+             from_email=None, request=None, html_email_template_name=None,
+             extra_email_context=None):
+        if token_generator is not default_token_generator:
+            raise ImproperlyConfigured('QueuedPasswordResetForm solo admite default_token_generator.')
+        if domain_override:
+            site_name = domain = domain_override
+        else:
+            current_site = get_current_site(request)
+            site_name, domain = current_site.name, current_site.domain
+        for user in self.get_users(self.cleaned_data['email']):
+            enqueue(
+                send_password_reset_email, user_id=user.pk, domain=domain, site_name=site_name,
+                use_https=use_https, subject_template_name=subject_template_name,
+                email_template_name=email_template_name, from_email=from_email,
+                html_email_template_name=html_email_template_name, extra_email_context=extra_email_context,
+            )
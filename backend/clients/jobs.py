@@ -0,0 +1,50 @@
+"""
+Trabajos en segundo plano de la app clients (ver jobs/queue.py).
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.queue import job
+
+
+@job(max_attempts=5)
+def send_email(subject, body, to, from_email=None, html_body=None):
+    """Envía un correo ya renderizado. Un fallo del servidor SMTP se reintenta más tarde."""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body:
+        message.attach_alternative(html_body, 'text/html')
+    return message.send()
+
+
+@job(max_attempts=5)
+def send_password_reset_email(user_id, domain, site_name, use_https, subject_template_name,
+                              email_template_name, from_email=None, html_email_template_name=None,
+                              extra_email_context=None):
+    """
+    Genera el enlace de restablecimiento y envía el correo. El token se crea aquí y
+    no al encolar, para que la cola (visible en el admin) no guarde enlaces válidos.
+    """
+    user = get_user_model()._default_manager.filter(pk=user_id, is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return 0
+    to_email = getattr(user, user.get_email_field_name())
+    context = {
+        'email': to_email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': 'https' if use_https else 'http',
+        **(extra_email_context or {}),
+    }
+    subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+    body = loader.render_to_string(email_template_name, context)
+    html_body = None
+    if html_email_template_name is not None:
+        html_body = loader.render_to_string(html_email_template_name, context)
+    return send_email(subject=subject, body=body, to=[to_email], from_email=from_email, html_body=html_body)
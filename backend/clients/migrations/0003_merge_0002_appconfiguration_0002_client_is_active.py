@@ -0,0 +1,14 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_appconfiguration'),
+        ('clients', '0002_client_is_active'),
+    ]
+
+    operations = [
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_merge_0002_appconfiguration_0002_client_is_active'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='client_active_created_idx'),
+        ),
+    ]
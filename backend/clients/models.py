@@ -1,8 +1,20 @@
-from django.db import models
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 # Create your models here.
 
+# Cada worker guarda su propia copia de la configuración. Pasados APP_CONFIG_CACHE_TTL
+# segundos desde la última comprobación, compara su `updated_at` con el de la base de
+# datos y solo la relee si cambió: así un cambio hecho en otro worker se ve como mucho
+# APP_CONFIG_CACHE_TTL segundos después, con cualquier backend de caché.
+_app_config_cache = {'config': None, 'checked_at': 0.0}
+_app_config_lock = threading.Lock()
+
 class AppConfiguration(models.Model):
     """
     Configuración global de la aplicación.
@@ -30,26 +42,72 @@ class AppConfiguration(models.Model):
     
     def save(self, *args, **kwargs):
         # Singleton pattern: solo permitir una instancia
-        if not self.pk and AppConfiguration.objects.exists():
+        existing = AppConfiguration.objects.first() if not self.pk else None
+        if existing is not None:
             # Si ya existe una configuración, actualizar la existente
-            existing = AppConfiguration.objects.first()
             existing.app_name = self.app_name
             existing.favicon = self.favicon
             existing.save()
             return existing
-        return super().save(*args, **kwargs)
+        super().save(*args, **kwargs)
+        self.invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_cache()
+        return result
     
     def __str__(self):
         return f"Configuración: {self.app_name}"
     
     @classmethod
     def get_config(cls):
-        """Obtener la configuración actual o crear una por defecto"""
+        """
+        Obtener la configuración actual o crear una por defecto.
+
+        La configuración se guarda en memoria del proceso y solo se comprueba contra
+        la base de datos (una consulta de `updated_at`) cada APP_CONFIG_CACHE_TTL
+        segundos. Se devuelve una copia para que quien la edite no altere la cacheada.
+        """
+        now = time.monotonic()
+        with _app_config_lock:
+            config = _app_config_cache['config']
+            checked_at = _app_config_cache['checked_at']
+        if config is not None and now - checked_at < settings.APP_CONFIG_CACHE_TTL:
+            return copy.copy(config)
+
+        if config is not None:
+            updated_at = cls.objects.filter(pk=config.pk).values_list('updated_at', flat=True).first()
+            if updated_at == config.updated_at:
+                with _app_config_lock:
+                    _app_config_cache['checked_at'] = now
+                return copy.copy(config)
+
         config, created = cls.objects.get_or_create(
             pk=1,
             defaults={'app_name': 'Portal Sandoval'}
         )
-        return config
+        with _app_config_lock:
+            _app_config_cache['config'] = config
+            _app_config_cache['checked_at'] = now
+        return copy.copy(config)
+
+    @classmethod
+    def invalidate_cache(cls):
+        """
+        Descarta la configuración cacheada en este proceso, ahora y al confirmar la
+        transacción (para no quedarse con una copia leída antes del commit). Los demás
+        workers la releen al comprobar su `updated_at`.
+        """
+        _forget_app_config()
+        transaction.on_commit(_forget_app_config)
+
+
+def _forget_app_config():
+    with _app_config_lock:
+        _app_config_cache['config'] = None
+        _app_config_cache['checked_at'] = 0.0
+
 
 class Client(models.Model):
     """
@@ -72,5 +130,15 @@ class Client(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
 
+    class Meta:
+        indexes = [
+            # Listados de clientes activos/archivados ordenados por fecha (paginación por cursor).
+            models.Index(fields=['is_active', 'created_at', 'id'], name='client_active_created_idx'),
+            # Orden por fecha sin filtrar por estado (panel de administración de Django).
+            models.Index(fields=['created_at'], name='client_created_idx'),
+            # Feed de cambios (projects/sync.py).
+            models.Index(fields=['updated_at'], name='client_updated_idx'),
+        ]
+
     def __str__(self):
         return self.business_name
\ No newline at end of file
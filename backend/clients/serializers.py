@@ -5,6 +5,8 @@ from django.db import IntegrityError
 from tasks.models import Task
 from decimal import Decimal
 from django.db.models import Sum
+from django.urls import reverse
+from portal_sandoval_project.field_selection import FieldSelectionMixin
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -16,7 +18,11 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
 
-class ClientSerializer(serializers.ModelSerializer):
+def or_zero(value):
+    return value if value is not None else Decimal('0.00')
+
+
+class ClientSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Client.
     Convierte los objetos Client a JSON y viceversa.
@@ -50,6 +56,14 @@ class ClientSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    # Columnas de values() y cálculo de los campos de coste para la serialización rápida
+    # de los listados (ver portal_sandoval_project/fast_serializers.py).
+    values_methods = {
+        'initial_cost': (('rollup__initial_cost',), or_zero),
+        'extra_cost': (('rollup__task_cost',), or_zero),
+        'total_cost': (('rollup__initial_cost', 'rollup__task_cost'), lambda initial, extra: or_zero(initial) + or_zero(extra)),
+    }
+
     def create(self, validated_data):
         # Para la creación, los datos de acceso son obligatorios.
         username = validated_data.pop('username', None)
@@ -110,15 +124,25 @@ class ClientSerializer(serializers.ModelSerializer):
 
     def get_initial_cost(self, obj):
         """Suma los costes base de todos los proyectos del cliente."""
+        # Leemos el total precalculado (ClientRollup); solo si falta lo sumamos.
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.initial_cost
         return obj.projects.aggregate(total=Sum('initial_cost'))['total'] or Decimal('0.00')
 
     def get_extra_cost(self, obj):
         """Suma los costes de todas las tareas de todos los proyectos del cliente."""
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.task_cost
         # Buscamos todas las tareas cuyo proyecto pertenece a este cliente.
         return Task.objects.filter(project__client=obj).aggregate(total=Sum('cost'))['total'] or Decimal('0.00')
 
     def get_total_cost(self, obj):
         """Suma el coste inicial y los costes extra."""
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.initial_cost + rollup.task_cost
         initial = self.get_initial_cost(obj)
         extra = self.get_extra_cost(obj)
         return initial + extra
@@ -139,8 +163,11 @@ class AppConfigurationSerializer(serializers.ModelSerializer):
     def get_favicon_url(self, obj):
         """Devuelve la URL completa del favicon si existe"""
         if obj.favicon:
+            # Se sirve por files/favicon/ (ver portal_sandoval_project/downloads.py); el
+            # parámetro 'v' cambia con cada configuración guardada para poder cachearlo.
+            url = f"{reverse('file-favicon')}?v={int(obj.updated_at.timestamp())}"
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.favicon.url)
-            return obj.favicon.url
+                return request.build_absolute_uri(url)
+            return url
         return None
\ No newline at end of file
@@ -1,3 +1,189 @@
-from django.test import TestCase
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
\ No newline at end of file
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from portal_sandoval_project import authentication
+from projects.models import Project
+from tasks.models import Task
+from .models import AppConfiguration, Client
+
+
+class AppConfigurationCacheTests(TestCase):
+    """
+    La configuración se lee de la memoria del proceso y se comprueba contra la base
+    de datos cada APP_CONFIG_CACHE_TTL segundos.
+    """
+
+    def setUp(self):
+        cache.clear()
+        AppConfiguration.invalidate_cache()
+
+    def test_reads_after_warm_up_do_not_hit_the_database(self):
+        AppConfiguration.get_config()
+        with self.assertNumQueries(0):
+            config = AppConfiguration.get_config()
+        self.assertEqual(config.app_name, 'Portal Sandoval')
+
+    def test_save_invalidates_cached_config(self):
+        config = AppConfiguration.get_config()
+        config.app_name = 'Otro Nombre'
+        with self.captureOnCommitCallbacks(execute=True):
+            config.save()
+        self.assertEqual(AppConfiguration.get_config().app_name, 'Otro Nombre')
+
+    def test_returned_copy_does_not_alter_cached_config(self):
+        AppConfiguration.get_config().app_name = 'Sin guardar'
+        self.assertEqual(AppConfiguration.get_config().app_name, 'Portal Sandoval')
+
+    def test_change_from_another_worker_is_seen_after_ttl(self):
+        AppConfiguration.get_config()
+        # Otro worker guarda la configuración: cambia la fila, pero no la copia en
+        # memoria de este proceso.
+        AppConfiguration.objects.filter(pk=1).update(app_name='Desde otro worker', updated_at=timezone.now())
+        self.assertEqual(AppConfiguration.get_config().app_name, 'Portal Sandoval')
+        with override_settings(APP_CONFIG_CACHE_TTL=0):
+            self.assertEqual(AppConfiguration.get_config().app_name, 'Desde otro worker')
+
+    def test_unchanged_config_is_checked_with_one_query_after_ttl(self):
+        AppConfiguration.get_config()
+        with override_settings(APP_CONFIG_CACHE_TTL=0), self.assertNumQueries(1):
+            config = AppConfiguration.get_config()
+        self.assertEqual(config.app_name, 'Portal Sandoval')
+
+    def test_app_config_endpoint_uses_cached_config(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user('usuario'))
+        api.get('/api/v1/app-config/')
+        with self.assertNumQueries(0):
+            response = api.get('/api/v1/app-config/')
+        self.assertEqual(response.data['app_name'], 'Portal Sandoval')
+
+    def test_app_config_conditional_get(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username='lector'))
+        response = api.get('/api/v1/app-config/')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = api.get('/api/v1/app-config/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        cached = api.get('/api/v1/app-config/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+
+class ClientListQueryCountTests(APITestCase):
+    """
+    Los listados de clientes activos y archivados cuestan una consulta fija,
+    sin importar cuántos clientes haya.
+    """
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+
+    def _create_clients(self, count, is_active=True):
+        for i in range(count):
+            name = f'{"activo" if is_active else "archivado"}{Client.objects.count()}'
+            client = Client.objects.create(
+                user=User.objects.create_user(username=name), business_name=name, is_active=is_active
+            )
+            project = Project.objects.create(client=client, name='P', initial_cost=Decimal('100.00'))
+            Task.objects.create(project=project, title='T', cost=Decimal('12.50'))
+
+    def test_list_and_archived_query_count_is_constant(self):
+        self._create_clients(2)
+        self._create_clients(2, is_active=False)
+        for url in ('/api/v1/clients/', '/api/v1/clients/archived/'):
+            with self.assertNumQueries(1):
+                self.client.get(url)
+
+        self._create_clients(8)
+        self._create_clients(8, is_active=False)
+        for url in ('/api/v1/clients/', '/api/v1/clients/archived/'):
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(len(response.data), 10)
+            self.assertEqual(response.data[0]['initial_cost'], Decimal('100.00'))
+            self.assertEqual(response.data[0]['extra_cost'], Decimal('12.50'))
+            self.assertEqual(response.data[0]['total_cost'], Decimal('112.50'))
+            self.assertIn('username', response.data[0]['user'])
+
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    """
+    Con el token de acceso basta para autenticar: la versión del usuario se cachea en
+    el proceso y un cambio de contraseña, permisos o desactivación revoca sus tokens.
+    """
+
+    def setUp(self):
+        authentication.forget_all()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.user = User.objects.create_user('cliente', 'cliente@example.com', 'secret')
+        Client.objects.create(user=self.user, business_name='Cliente', contact_name='Cliente')
+
+    def _login(self, username):
+        response = self.client.post('/api/v1/token/', {'username': username, 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def _get(self, url, access):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_steady_state_requests_skip_the_user_query(self):
+        access = self._login('admin')['access']
+        self.assertEqual(self._get('/api/v1/clients/', access).status_code, 200)
+        with self.assertNumQueries(1):
+            response = self._get('/api/v1/clients/', access)
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_permission_comes_from_the_token(self):
+        self.assertEqual(self._get('/api/v1/admin/metrics/', self._login('cliente')['access']).status_code, 403)
+        self.assertEqual(self._get('/api/v1/admin/metrics/', self._login('admin')['access']).status_code, 200)
+
+    def test_request_user_loads_other_fields_on_demand(self):
+        token = AccessToken(self._login('cliente')['access'])
+        authentication.current_version(self.user.pk)
+        with self.assertNumQueries(0):
+            user = authentication.ClaimsJWTAuthentication().get_user(token)
+            self.assertEqual((user.pk, user.username, user.is_staff), (self.user.pk, 'cliente', False))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'cliente@example.com')
+
+    def test_password_change_revokes_access_and_refresh_tokens(self):
+        tokens = self._login('cliente')
+        self.assertEqual(self._get('/api/v1/projects/', tokens['access']).status_code, 200)
+        self.user.set_password('nueva')
+        self.user.save()
+
+        self.assertEqual(self._get('/api/v1/projects/', tokens['access']).status_code, 401)
+        response = self.client.post('/api/v1/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivation_and_staff_change_revoke_tokens(self):
+        client_access = self._login('cliente')['access']
+        admin_access = self._login('admin')['access']
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        # update() no envía señales: otro proceso lo nota al caducar la caché.
+        authentication.forget_all()
+        self.assertEqual(self._get('/api/v1/projects/', client_access).status_code, 401)
+        self.assertEqual(self._get('/api/v1/admin/metrics/', admin_access).status_code, 401)
+
+    def test_cached_version_expires_after_ttl(self):
+        access = self._login('cliente')['access']
+        self._get('/api/v1/projects/', access)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.settings(JWT_USER_CACHE_TTL=30):
+            self.assertEqual(self._get('/api/v1/projects/', access).status_code, 200)
+        with mock.patch('portal_sandoval_project.authentication.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertEqual(self._get('/api/v1/projects/', access).status_code, 401)
+
+    def test_tokens_without_claims_still_work(self):
+        access = str(AccessToken.for_user(self.user))
+        self.assertEqual(self._get('/api/v1/projects/', access).status_code, 200)
@@ -2,14 +2,24 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from portal_sandoval_project.conditional import ConditionalGetMixin, conditional_get, request_digest
+from portal_sandoval_project.fast_serializers import ValuesListMixin
 from .models import Client, AppConfiguration
 from .serializers import ClientSerializer, AppConfigurationSerializer
 
-class ClientViewSet(viewsets.ModelViewSet):
+
+def app_config_validators(request):
+    """ETag y Last-Modified de la configuración, leídos de la copia en memoria del proceso."""
+    config = AppConfiguration.get_config()
+    return f'"app-config-{config.updated_at.timestamp()}-{request_digest(request)}"', config.updated_at
+
+
+class ClientViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     Un ViewSet para ver, editar, y archivar Clientes.
     """
-    queryset = Client.objects.all().order_by('-created_at')
+    # El 'id' desempata clientes creados en el mismo instante y permite paginar por cursor.
+    queryset = Client.objects.all().order_by('-created_at', '-id')
     serializer_class = ClientSerializer
 
     def get_queryset(self):
@@ -17,9 +27,12 @@ class ClientViewSet(viewsets.ModelViewSet):
         Por defecto, la acción 'list' solo devuelve clientes activos.
         Otras acciones (como 'retrieve' o 'update') pueden acceder a todos.
         """
+        # Traemos el usuario y los totales precalculados (ClientRollup) en la misma
+        # consulta: así los costes del serializer no hacen consultas por cliente.
+        queryset = self.select_related_fields(self.queryset, 'user', 'rollup')
         if self.action == 'list':
-            return self.queryset.filter(is_active=True)
-        return self.queryset
+            return queryset.filter(is_active=True)
+        return queryset
 
     def perform_destroy(self, instance):
         """
@@ -30,14 +43,14 @@ class ClientViewSet(viewsets.ModelViewSet):
         instance.save()
 
     @action(detail=False, methods=['get'], url_path='archived')
+    @conditional_get()
     def list_archived(self, request):
         """
         Endpoint personalizado para obtener la lista de clientes archivados.
         Se accederá a través de /api/v1/clients/archived/
         """
-        archived_clients = self.queryset.filter(is_active=False)
-        serializer = self.get_serializer(archived_clients, many=True)
-        return Response(serializer.data)
+        archived_clients = self.get_queryset().filter(is_active=False)
+        return self.values_list_response(archived_clients)
 
     @action(detail=True, methods=['post'], url_path='restore')
     def restore(self, request, pk=None):
@@ -57,6 +70,7 @@ class AppConfigurationView(APIView):
     PATCH: Actualiza la configuración (nombre y/o favicon)
     """
     
+    @conditional_get(app_config_validators)
     def get(self, request):
         """Obtiene la configuración actual de la aplicación"""
         config = AppConfiguration.get_config()
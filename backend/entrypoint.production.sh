@@ -48,7 +48,12 @@ echo "Backend will be available at: http://0.0.0.0:8000"
 echo "Admin panel: http://0.0.0.0:8000/admin/"
 echo "API: http://0.0.0.0:8000/api/v1/"
 
-# Iniciar el servidor de Django
-# En producción real, deberías usar gunicorn o uwsgi
-# Para esta configuración usaremos el servidor de desarrollo con configuraciones más seguras
-python manage.py runserver 0.0.0.0:8000
+# Iniciar el servidor de aplicaciones
+# Por defecto usamos Gunicorn con la configuración de gunicorn.conf.py
+# (workers, hilos y timeouts ajustables con variables GUNICORN_*).
+# DJANGO_SERVER=runserver arranca el servidor de desarrollo, útil solo para comparar
+# rendimiento con load_test.py o para depurar.
+if [ "$DJANGO_SERVER" = "runserver" ]; then
+  exec python manage.py runserver 0.0.0.0:8000
+fi
+exec gunicorn portal_sandoval_project.wsgi:application --config gunicorn.conf.py
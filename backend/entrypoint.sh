@@ -25,15 +25,6 @@ if [ -n "$DJANGO_SUPERUSER_USERNAME" ] && [ -n "$DJANGO_SUPERUSER_PASSWORD" ]; t
 fi
 
 # Inicia Gunicorn para producción con configuración optimizada
+# (ver gunicorn.conf.py; se ajusta con las variables GUNICORN_*)
 echo "Starting Gunicorn production server..."
-exec gunicorn portal_sandoval_project.wsgi:application \
-    --bind 0.0.0.0:8000 \
-    --workers 3 \
-    --threads 2 \
-    --timeout 120 \
-    --access-logfile - \
-    --error-logfile - \
-    --log-level info \
-    --max-requests 1000 \
-    --max-requests-jitter 50 \
-    --worker-class gthread
\ No newline at end of file
+exec gunicorn portal_sandoval_project.wsgi:application --config gunicorn.conf.py
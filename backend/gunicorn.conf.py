@@ -0,0 +1,78 @@
+"""
+Configuración de Gunicorn para producción - Portal Sandoval
+
+Todos los valores se pueden ajustar con variables de entorno, sin reconstruir la imagen:
+
+- GUNICORN_BIND: dirección de escucha (por defecto 0.0.0.0:8000)
+- GUNICORN_WORKERS: número de procesos (por defecto 2 * CPUs + 1)
+- GUNICORN_THREADS: hilos por proceso con el worker 'gthread' (por defecto 2)
+- GUNICORN_WORKER_CLASS: tipo de worker (por defecto 'gthread'). Para servir la app
+  ASGI (portal_sandoval_project.asgi) se puede usar 'uvicorn.workers.UvicornWorker'
+  si uvicorn está instalado, cambiando también la app en el comando.
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE: en segundos
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: reciclado de workers para
+  acotar el crecimiento de memoria
+- GUNICORN_LOG_LEVEL: nivel de log (por defecto 'info')
+- DJANGO_CACHE_DIR: directorio de la caché compartida por los workers (ver más abajo)
+
+Recarga sin cortes: enviando SIGHUP al proceso maestro (por ejemplo
+`docker compose kill -s HUP backend`) Gunicorn levanta workers nuevos con el código
+y la configuración actualizados y deja terminar las peticiones en curso de los
+viejos durante GUNICORN_GRACEFUL_TIMEOUT segundos.
+"""
+import multiprocessing
+import os
+import tempfile
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = _int_env('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+threads = _int_env('GUNICORN_THREADS', 2)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+timeout = _int_env('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _int_env('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _int_env('GUNICORN_KEEPALIVE', 5)
+
+max_requests = _int_env('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _int_env('GUNICORN_MAX_REQUESTS_JITTER', 50)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Los workers escriben sus ficheros temporales de latido en memoria compartida,
+# evitando bloqueos en sistemas de archivos lentos dentro de Docker.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+# Con varios workers la caché de Django tiene que ser compartida: la versión de los
+# datos que invalida las métricas del panel y los ETag de la API, y las respuestas
+# cacheadas, deben ser las mismas en todos. Con la caché en memoria de cada proceso,
+# una edición atendida por un worker no invalidaría nada en los demás. Si no se
+# configuró un directorio, usamos uno en memoria compartida del contenedor.
+if workers > 1:
+    os.environ.setdefault(
+        'DJANGO_CACHE_DIR',
+        '/dev/shm/portal-cache' if os.path.isdir('/dev/shm') else os.path.join(tempfile.gettempdir(), 'portal-cache'),
+    )
+
+
+# Métricas por endpoint (portal_sandoval_project/instrumentation.py): con
+# REQUEST_METRICS_DIR, cada worker guarda las suyas al terminar y el maestro las
+# suma al archivo común, para que los contadores no bajen al reciclar workers.
+def worker_exit(server, worker):
+    if os.getenv('REQUEST_METRICS_DIR'):
+        from portal_sandoval_project import instrumentation
+        instrumentation.flush(force=True)
+
+
+def child_exit(server, worker):
+    if os.getenv('REQUEST_METRICS_DIR'):
+        from portal_sandoval_project.metrics_store import archive_process
+        archive_process(os.getenv('REQUEST_METRICS_DIR'), worker.pid)
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Trabajos en segundo plano, para revisar los fallidos y sus errores.
+    """
+    list_display = ('name', 'status', 'attempts', 'run_at', 'finished_at', 'created_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'error')
+    ordering = ('-created_at',)
+    readonly_fields = ('started_at', 'finished_at', 'locked_by', 'result', 'error', 'created_at')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'Trabajos en segundo plano'
+
+    def ready(self):
+        # Registra los trabajos que definen las demás apps en su módulo `jobs.py`.
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('jobs')
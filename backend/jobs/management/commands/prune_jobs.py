@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import prune_finished
+
+
+class Command(BaseCommand):
+    help = 'Borra los trabajos terminados hace más de JOBS_RETENTION_DAYS días'
+
+    def handle(self, *args, **options):
+        """
+        Los trabajos en cola o en ejecución no se tocan; los fallidos se conservan el
+        mismo tiempo que los completados para poder revisar su error en el admin.
+        """
+        deleted = prune_finished()
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} trabajos terminados eliminados (retención: {settings.JOBS_RETENTION_DAYS} días).'
+        ))
@@ -0,0 +1,72 @@
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jobs import queue
+
+
+def _execute(job_id):
+    try:
+        return queue.execute(job_id)
+    except Exception:
+        # Error de la propia cola (p. ej. sin conexión a la base de datos): el trabajo
+        # queda en ejecución y requeue_stale() lo devolverá a la cola.
+        queue.logger.exception('No se pudo ejecutar el trabajo #%s', job_id)
+        return False
+    finally:
+        # Cada hilo abre su propia conexión; la cerramos al terminar el trabajo.
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos en segundo plano de la cola (JOBS_MODE=queue)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOBS_WORKER_THREADS,
+            help='Trabajos en paralelo (por defecto JOBS_WORKER_THREADS).'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Segundos de espera cuando la cola está vacía.'
+        )
+        parser.add_argument('--once', action='store_true', help='Termina cuando no quedan trabajos pendientes.')
+
+    def handle(self, *args, **options):
+        """
+        Bucle del worker: toma tantos trabajos como hilos libres haya y los ejecuta en
+        un pool. Con SIGTERM o SIGINT deja de tomar trabajos y espera a los que están
+        en curso, así un reinicio del contenedor no deja trabajos a medias.
+        """
+        threads = max(options['threads'], 1)
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stopping.set())
+
+        self.stdout.write(f'Worker {worker} con {threads} hilos.')
+        processed = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job') as pool:
+            while not stopping.is_set():
+                queue.requeue_stale()
+                job_ids = queue.claim(threads - len(running), worker) if len(running) < threads else []
+                running.update(pool.submit(_execute, job_id) for job_id in job_ids)
+                if not running:
+                    if options['once']:
+                        break
+                    stopping.wait(options['poll_interval'])
+                    continue
+                done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                processed += len(done)
+                running = set(running)
+            done, _ = wait(running)
+            processed += len(done)
+        connection.close()
+        self.stdout.write(self.style.SUCCESS(f'{processed} trabajos ejecutados.'))
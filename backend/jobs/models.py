@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano (ver jobs/queue.py).
+    La tabla es la cola: el worker (`manage.py run_jobs`) toma los pendientes cuyo
+    `run_at` ya pasó, y un fallo se reintenta más tarde hasta `max_attempts`.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'En cola'),
+        (RUNNING, 'En ejecución'),
+        (SUCCEEDED, 'Completado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Trabajo")
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Argumentos")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED, verbose_name="Estado")
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs',
+        verbose_name="Usuario que lo pidió"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name="Intentos Máximos")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Ejecutar a partir de")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Inicio del Último Intento")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Finalización")
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Resultado")
+    error = models.TextField(blank=True, verbose_name="Último Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+
+    class Meta:
+        verbose_name = "Trabajo"
+        verbose_name_plural = "Trabajos"
+        indexes = [
+            # La consulta del worker: pendientes por orden de ejecución.
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
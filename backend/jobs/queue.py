@@ -0,0 +1,152 @@
+"""
+Cola de trabajos en segundo plano guardada en la base de datos.
+
+Los trabajos son funciones registradas con `@job` en el módulo `jobs.py` de cada app
+(JobsConfig los importa al arrancar). Para encolar uno:
+
+    enqueue('clients.send_email', subject=..., to=[...])
+
+Los argumentos se guardan como JSON, así que deben ser valores simples (IDs en lugar
+de objetos). El trabajo se crea en la misma transacción que la petición: si esta se
+revierte, el trabajo tampoco existe.
+
+Según JOBS_MODE:
+- 'inline' (desarrollo y tests): se ejecuta en el mismo proceso al confirmar la
+  transacción, reintentando enseguida si falla.
+- 'queue' (producción): lo ejecuta `manage.py run_jobs`, con varios hilos, y los fallos
+  se reintentan con espera exponencial (JOBS_RETRY_BASE_DELAY * 2^(intento - 1)).
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def job(name=None, max_attempts=3):
+    """Registra una función como trabajo. El nombre por defecto es `<app>.<función>`."""
+    def decorator(function):
+        job_name = name or f"{function.__module__.split('.')[0]}.{function.__name__}"
+        REGISTRY[job_name] = (function, max_attempts)
+        function.job_name = job_name
+        return function
+    return decorator
+
+
+def _job_name(name_or_function):
+    return getattr(name_or_function, 'job_name', name_or_function)
+
+
+def enqueue(name_or_function, user=None, run_at=None, **kwargs):
+    """Crea un trabajo; en modo 'inline' se ejecuta al confirmar la transacción."""
+    name = _job_name(name_or_function)
+    if name not in REGISTRY:
+        raise KeyError(f"Trabajo no registrado: {name}")
+    new_job = Job.objects.create(
+        name=name, kwargs=kwargs, user=user, max_attempts=REGISTRY[name][1],
+        run_at=run_at or timezone.now(),
+    )
+    if settings.JOBS_MODE == 'inline':
+        transaction.on_commit(lambda: run_inline(new_job.pk))
+    return new_job
+
+
+def enqueue_unique(name_or_function, run_at=None, **kwargs):
+    """
+    Como enqueue(), pero no crea otro si ya hay uno igual esperando en la cola: útil
+    para trabajos que se piden muchas veces seguidas y basta con ejecutar una.
+    """
+    name = _job_name(name_or_function)
+    pending = Job.objects.filter(name=name, kwargs=kwargs, status=Job.QUEUED).first()
+    return pending or enqueue(name, run_at=run_at, **kwargs)
+
+
+def retry_delay(attempts):
+    """Espera antes del siguiente intento: exponencial, con un máximo de una hora."""
+    return timedelta(seconds=min(settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1), 3600))
+
+
+def _start(job_id, worker):
+    """Marca el trabajo como en ejecución si sigue en cola. Devuelve si lo tomó."""
+    return Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_by=worker, started_at=timezone.now(), attempts=F('attempts') + 1,
+    ) == 1
+
+
+def execute(job_id):
+    """
+    Ejecuta un trabajo ya marcado como en ejecución y guarda el resultado. Si falla y
+    le quedan intentos vuelve a la cola; si no, queda como fallido.
+    """
+    current = Job.objects.get(pk=job_id)
+    function, _ = REGISTRY.get(current.name, (None, None))
+    try:
+        if function is None:
+            raise KeyError(f"Trabajo no registrado: {current.name}")
+        result = function(**current.kwargs)
+    except Exception:
+        logger.exception('Falló el trabajo %s (intento %s)', current, current.attempts)
+        error = traceback.format_exc()
+        if function is not None and current.attempts < current.max_attempts:
+            Job.objects.filter(pk=job_id).update(
+                status=Job.QUEUED, error=error, locked_by='',
+                run_at=timezone.now() + retry_delay(current.attempts),
+            )
+        else:
+            Job.objects.filter(pk=job_id).update(status=Job.FAILED, error=error, finished_at=timezone.now())
+        return False
+    Job.objects.filter(pk=job_id).update(status=Job.SUCCEEDED, result=result, finished_at=timezone.now())
+    return True
+
+
+def run_inline(job_id):
+    """Modo 'inline': ejecuta el trabajo en este proceso, reintentando sin esperar."""
+    while _start(job_id, 'inline'):
+        if execute(job_id):
+            return
+        Job.objects.filter(pk=job_id, status=Job.QUEUED).update(run_at=timezone.now())
+
+
+def requeue_stale(now=None):
+    """
+    Devuelve a la cola los trabajos de un worker que murió (en ejecución desde hace más
+    de JOBS_LOCK_TIMEOUT segundos); si ya agotaron sus intentos, quedan como fallidos.
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT))
+    error = 'El worker no terminó el trabajo a tiempo.'
+    stale.filter(attempts__gte=F('max_attempts')).update(status=Job.FAILED, error=error, finished_at=now)
+    return stale.update(status=Job.QUEUED, error=error, locked_by='', run_at=now)
+
+
+def prune_finished(now=None):
+    """
+    Borra los trabajos terminados (completados o fallidos) hace más de
+    JOBS_RETENTION_DAYS días. Devuelve cuántos se borraron.
+    """
+    cutoff = (now or timezone.now()) - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    deleted, _ = Job.objects.filter(status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def claim(limit, worker):
+    """
+    Toma hasta `limit` trabajos pendientes y los marca como en ejecución. Con
+    PostgreSQL, `skip_locked` permite varios workers sin que tomen el mismo trabajo.
+    """
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=timezone.now())
+            .order_by('run_at', 'id').values_list('id', flat=True)[:limit]
+        )
+        return [job_id for job_id in ids if _start(job_id, worker)]
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Estado de un trabajo en segundo plano (solo lectura)."""
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'attempts', 'max_attempts', 'run_at',
+            'started_at', 'finished_at', 'result', 'error', 'created_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,224 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from clients.jobs import send_password_reset_email
+from clients.models import Client
+from projects.models import Project
+from . import queue
+from .models import Job
+
+calls = []
+
+
+@queue.job(name='tests.record', max_attempts=3)
+def record(value, fail_times=0):
+    calls.append(value)
+    if calls.count(value) <= fail_times:
+        raise RuntimeError('fallo provocado')
+    return {'value': value}
+
+
+class JobQueueTests(TestCase):
+    """
+    En modo 'inline' el trabajo se ejecuta al confirmar la transacción; en modo
+    'queue' espera al worker y los fallos se reintentan con espera exponencial.
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_inline_job_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = queue.enqueue(record, value='a')
+            self.assertEqual(calls, [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'value': 'a'})
+        self.assertEqual(calls, ['a'])
+
+    def test_inline_job_is_retried_until_max_attempts(self):
+        with self.assertLogs('jobs.queue', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            job = queue.enqueue(record, value='b', fail_times=5)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertIn('fallo provocado', job.error)
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(KeyError):
+            queue.enqueue('tests.no_existe')
+
+    @override_settings(JOBS_MODE='queue', JOBS_RETRY_BASE_DELAY=30)
+    def test_failed_job_waits_before_retrying(self):
+        job = queue.enqueue(record, value='c', fail_times=1)
+        self.assertEqual(queue.claim(10, 'w1'), [job.pk])
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(queue.execute(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(queue.claim(10, 'w1'), [])
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(queue.claim(10, 'w1'), [job.pk])
+        self.assertTrue(queue.execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 2))
+
+    def test_retry_delay_is_exponential_and_capped(self):
+        with self.settings(JOBS_RETRY_BASE_DELAY=30):
+            self.assertEqual(queue.retry_delay(1), timedelta(seconds=30))
+            self.assertEqual(queue.retry_delay(3), timedelta(seconds=120))
+            self.assertEqual(queue.retry_delay(20), timedelta(hours=1))
+
+    @override_settings(JOBS_MODE='queue', JOBS_LOCK_TIMEOUT=600)
+    def test_stale_running_jobs_are_requeued(self):
+        job = queue.enqueue(record, value='d')
+        queue.claim(1, 'muerto')
+        Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(minutes=11))
+        exhausted = queue.enqueue(record, value='e')
+        queue.claim(1, 'muerto')
+        Job.objects.filter(pk=exhausted.pk).update(
+            attempts=3, started_at=timezone.now() - timedelta(minutes=11)
+        )
+
+        self.assertEqual(queue.requeue_stale(), 1)
+        job.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.QUEUED, ''))
+        self.assertEqual(exhausted.status, Job.FAILED)
+
+    @override_settings(JOBS_MODE='queue')
+    def test_enqueue_unique_reuses_pending_job(self):
+        first = queue.enqueue_unique(record, value='f')
+        self.assertEqual(queue.enqueue_unique(record, value='f'), first)
+        self.assertNotEqual(queue.enqueue_unique(record, value='g'), first)
+
+
+class PasswordResetEmailTests(TestCase):
+    """El correo de restablecimiento se envía como trabajo, fuera de la petición."""
+
+    def test_password_reset_enqueues_email(self):
+        user = User.objects.create_user('ana', 'ana@example.com', 'secret')
+        with self.settings(JOBS_MODE='queue'):
+            response = self.client.post('/password-reset/', {'email': 'ana@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+
+        job = Job.objects.get(name=send_password_reset_email.job_name)
+        # La cola no guarda el correo ni el token, solo a quién enviarlo.
+        self.assertEqual(job.kwargs['user_id'], user.pk)
+        self.assertNotIn('body', job.kwargs)
+        self.assertNotIn('token', json.dumps(job.kwargs))
+        queue.claim(1, 'w1')
+        self.assertTrue(queue.execute(job.pk))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['ana@example.com'])
+        self.assertIn('/reset/', mail.outbox[0].body)
+
+    def test_prune_removes_only_old_finished_jobs(self):
+        with self.settings(JOBS_MODE='queue'):
+            old, recent, pending = (queue.enqueue(record, value=value).pk for value in 'orp')
+        long_ago = timezone.now() - timedelta(days=30)
+        Job.objects.filter(pk=old).update(status=Job.SUCCEEDED, finished_at=long_ago)
+        Job.objects.filter(pk=recent).update(status=Job.FAILED, finished_at=timezone.now())
+        Job.objects.filter(pk=pending).update(run_at=long_ago)
+
+        call_command('prune_jobs', stdout=StringIO())
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {recent, pending})
+
+
+class DashboardWarmupTests(APITestCase):
+    """
+    Con DASHBOARD_CACHE_WARMUP, cada cambio encola un trabajo que recalcula las
+    métricas consultadas hace poco, y la siguiente visita al panel sale de la caché.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        user = User.objects.create_user('cliente', 'cliente@example.com', 'secret')
+        self.client_obj = Client.objects.create(user=user, business_name='Cliente', contact_name='Cliente')
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(DASHBOARD_CACHE_WARMUP=True)
+    def test_change_warms_recently_requested_metrics(self):
+        url = f'/api/v1/admin/metrics/?client_id={self.client_obj.pk}'
+        self.assertEqual(self.client.get(url).data['global_metrics']['total_projects'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Project.objects.create(client=self.client_obj, name='Nuevo')
+        # El trabajo se encola al confirmar; en modo inline se ejecuta en otro on_commit.
+        while callbacks:
+            pending = list(callbacks)
+            callbacks.clear()
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                for callback in pending:
+                    callback()
+        jobs = Job.objects.filter(name='projects.warm_dashboard_metrics')
+        self.assertTrue(jobs.exists())
+        self.assertEqual(set(jobs.values_list('status', flat=True)), {Job.SUCCEEDED})
+
+        with mock.patch('projects.admin_views.build_dashboard_metrics') as build:
+            response = self.client.get(url)
+        build.assert_not_called()
+        self.assertEqual(response.data['global_metrics']['total_projects'], 1)
+
+    def test_warmup_is_disabled_by_default(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(client=self.client_obj, name='Nuevo')
+        self.assertFalse(Job.objects.exists())
+
+
+class JobStatusEndpointTests(APITestCase):
+    """/api/v1/jobs/: cada usuario ve sus trabajos; los administradores, todos."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.user = User.objects.create_user('ana', 'ana@example.com', 'secret')
+        with self.settings(JOBS_MODE='queue'):
+            self.own = queue.enqueue(record, user=self.user, value='h')
+            self.other = queue.enqueue(record, user=self.admin, value='i')
+
+    def test_user_sees_only_own_jobs(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/v1/jobs/')
+        self.assertEqual([job['id'] for job in response.data], [self.own.pk])
+        self.assertEqual(self.client.get(f'/api/v1/jobs/{self.other.pk}/').status_code, 404)
+
+    def test_admin_sees_all_and_filters_by_status(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(len(self.client.get('/api/v1/jobs/').data), 2)
+        self.assertEqual(self.client.get('/api/v1/jobs/?status=failed').data, [])
+
+
+@override_settings(JOBS_MODE='queue')
+class RunJobsCommandTests(TransactionTestCase):
+    """El worker ejecuta los trabajos pendientes en un pool de hilos y termina con --once."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_once_runs_pending_jobs_and_exits(self):
+        jobs = [queue.enqueue(record, value=str(i)) for i in range(5)]
+        out = StringIO()
+        # Un solo hilo: la base de datos en memoria de SQLite de los tests no admite
+        # escrituras concurrentes desde varias conexiones.
+        call_command('run_jobs', '--once', '--threads=1', stdout=out)
+        self.assertIn('5 trabajos ejecutados', out.getvalue())
+        self.assertEqual(sorted(calls), ['0', '1', '2', '3', '4'])
+        self.assertEqual(
+            set(Job.objects.filter(pk__in=[job.pk for job in jobs]).values_list('status', flat=True)),
+            {Job.SUCCEEDED}
+        )
@@ -0,0 +1,21 @@
+from rest_framework import viewsets
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Estado de los trabajos en segundo plano.
+    Los administradores ven todos; los demás usuarios, solo los que pidieron ellos.
+    Se accederá a través de /api/v1/jobs/ y /api/v1/jobs/{id}/ (admite ?status=).
+    """
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = Job.objects.order_by('-created_at', '-id')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga sencilla para comparar configuraciones del servidor
+(por ejemplo `runserver` contra Gunicorn con varios workers).
+
+Solo usa la biblioteca estándar, así que se puede ejecutar desde cualquier máquina
+con Python 3, sin instalar nada:
+
+    python load_test.py http://localhost:8000/api/v1/projects/ \\
+        --requests 2000 --concurrency 32 --token <access_token>
+
+Para comparar, se ejecuta el mismo comando contra el backend arrancado con
+DJANGO_SERVER=runserver y luego con Gunicorn (el valor por defecto); con
+--json se obtiene el resultado en formato JSON para guardarlo y compararlo.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(url, total_requests, concurrency, token=None, timeout=30):
+    headers = {'Accept': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    latencies = []
+    status_counts = {}
+    lock = threading.Lock()
+
+    def one_request(_):
+        request = urllib.request.Request(url, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                code = response.status
+        except urllib.error.HTTPError as error:
+            code = error.code
+        except (urllib.error.URLError, OSError):
+            code = 'error'
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            status_counts[code] = status_counts.get(code, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total_requests)))
+    duration = time.perf_counter() - started
+
+    return {
+        'url': url,
+        'requests': total_requests,
+        'concurrency': concurrency,
+        'duration_s': round(duration, 3),
+        'requests_per_second': round(total_requests / duration, 2) if duration else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 2),
+            'p50': round(percentile(latencies, 0.50) * 1000, 2),
+            'p90': round(percentile(latencies, 0.90) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2),
+        },
+        'status_codes': {str(code): count for code, count in sorted(status_counts.items(), key=str)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga HTTP para el backend de Portal Sandoval.')
+    parser.add_argument('url', help='URL a consultar, por ejemplo http://localhost:8000/api/v1/app-config/')
+    parser.add_argument('-n', '--requests', type=int, default=500, help='Número total de peticiones (500).')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='Peticiones simultáneas (16).')
+    parser.add_argument('--token', help='Token JWT de acceso para endpoints autenticados.')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout por petición en segundos (30).')
+    parser.add_argument('--json', action='store_true', help='Imprime el resultado en JSON.')
+    args = parser.parse_args(argv)
+
+    result = run(args.url, args.requests, args.concurrency, args.token, args.timeout)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"URL:            {result['url']}")
+    print(f"Peticiones:     {result['requests']} (concurrencia {result['concurrency']})")
+    print(f"Duración:       {result['duration_s']} s")
+    print(f"Throughput:     {result['requests_per_second']} req/s")
+    latency = result['latency_ms']
+    print(f"Latencia (ms):  media {latency['mean']} | p50 {latency['p50']} | p90 {latency['p90']} "
+          f"| p99 {latency['p99']} | máx {latency['max']}")
+    print(f"Códigos HTTP:   {result['status_codes']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
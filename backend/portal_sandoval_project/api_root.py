@@ -14,12 +14,11 @@ def api_root(request, format=None):
     Creado por Carlos Daniel Sandoval
     """
     
-    # Obtener la configuración de la aplicación si existe
+    # Obtener la configuración de la aplicación (cacheada en memoria del proceso)
     try:
         from clients.models import AppConfiguration
-        app_config = AppConfiguration.get_instance()
-        app_name = app_config.app_name
-    except:
+        app_name = AppConfiguration.get_config().app_name
+    except Exception:
         app_name = "Portal Sandoval"
     
     return Response({
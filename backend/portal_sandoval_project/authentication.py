@@ -0,0 +1,152 @@
+"""
+Autenticación JWT sin consultar el usuario en cada petición.
+
+JWTAuthentication de simplejwt lee la fila de `auth_user` en cada llamada a la API
+solo para saber si el usuario existe y sigue activo. Aquí el token de acceso lleva
+lo que necesitan las vistas y los permisos (`IsAdminUser`, filtros por usuario):
+
+- `user_id`, `username`, `is_staff`, `is_superuser`.
+- `tv` (versión del token): un hash de la contraseña cifrada, `is_active`,
+  `is_staff` e `is_superuser`. Cambiar la contraseña, desactivar al usuario o
+  cambiar sus permisos de administrador cambia la versión y revoca sus tokens,
+  incluidos los de refresco.
+
+Para comprobar la versión sin ir a la base de datos, cada proceso guarda la versión
+actual de cada usuario durante JWT_USER_CACHE_TTL segundos. Un cambio hecho en este
+proceso la descarta al momento (señal post_save); en los demás workers de gunicorn
+un token revocado deja de valer, como mucho, JWT_USER_CACHE_TTL segundos después.
+
+request.user es un User con solo esos campos cargados: el resto (email, etc.) se lee
+de la base de datos si alguna vista lo usa, y user.save() solo guarda lo modificado.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db.models import DEFERRED
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+VERSION_CLAIM = 'tv'
+CLAIM_FIELDS = ('username', 'is_staff', 'is_superuser')
+
+# {user_id: (versión o None si no existe/inactivo, caduca_en)}
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def token_version(password, is_active, is_staff, is_superuser):
+    """Versión de los tokens de un usuario: cambia si cambia cualquiera de los datos."""
+    raw = f'{password}:{int(is_active)}:{int(is_staff)}:{int(is_superuser)}'.encode()
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def user_token_version(user):
+    return token_version(user.password, user.is_active, user.is_staff, user.is_superuser)
+
+
+def current_version(user_id):
+    """
+    Versión vigente de los tokens del usuario, o None si no existe o está inactivo.
+    Se consulta la base de datos como mucho una vez cada JWT_USER_CACHE_TTL segundos.
+    """
+    now = time.monotonic()
+    with _versions_lock:
+        entry = _versions.get(user_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    row = User.objects.filter(pk=user_id).values_list('password', 'is_active', 'is_staff', 'is_superuser').first()
+    version = token_version(*row) if row is not None and row[1] else None
+    with _versions_lock:
+        _versions[user_id] = (version, now + settings.JWT_USER_CACHE_TTL)
+    return version
+
+
+def forget_user(user_id):
+    """Descarta la versión cacheada en este proceso."""
+    with _versions_lock:
+        _versions.pop(user_id, None)
+
+
+def forget_all():
+    with _versions_lock:
+        _versions.clear()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+def token_user_id(token):
+    """ID del usuario del token (simplejwt lo guarda como texto)."""
+    try:
+        return User._meta.pk.to_python(token['user_id'])
+    except (KeyError, ValidationError):
+        raise InvalidToken('El token no identifica a ningún usuario.')
+
+
+def user_from_claims(token):
+    """User con id, username, is_staff, is_superuser e is_active; el resto, diferido."""
+    values = {field: token[field] for field in CLAIM_FIELDS}
+    values.update(id=token_user_id(token), is_active=True)
+    return User.from_db(
+        'default', list(values),
+        [values.get(field.attname, DEFERRED) for field in User._meta.concrete_fields],
+    )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que construye request.user a partir del token y solo comprueba
+    su versión (cacheada en el proceso). Los tokens emitidos antes de este cambio,
+    sin `tv`, siguen funcionando con la consulta de siempre hasta que caduquen.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        version = current_version(token_user_id(validated_token))
+        if version is None:
+            raise AuthenticationFailed('El usuario no existe o está inactivo.', code='user_inactive')
+        if validated_token[VERSION_CLAIM] != version:
+            raise AuthenticationFailed(
+                'El token fue revocado (cambio de contraseña o de permisos).', code='token_revoked'
+            )
+        return user_from_claims(validated_token)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login: añade los claims al token de refresco, que los copia al de acceso."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for field in CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        token[VERSION_CLAIM] = user_token_version(user)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresco: rechaza los tokens revocados, leyendo la versión de la base de datos."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if VERSION_CLAIM in refresh:
+            user_id = token_user_id(refresh)
+            forget_user(user_id)
+            if current_version(user_id) != refresh[VERSION_CLAIM]:
+                raise AuthenticationFailed(
+                    'El token fue revocado (cambio de contraseña o de permisos).', code='token_revoked'
+                )
+        return super().validate(attrs)
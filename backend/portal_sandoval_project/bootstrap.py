@@ -0,0 +1,145 @@
+"""
+Carga inicial del Dashboard en una sola petición.
+
+En lugar de pedir por separado clients/, clients/archived/, projects/ y tasks/
+(y recibir el cliente completo repetido dentro de cada proyecto), el frontend pide
+/api/v1/dashboard/bootstrap/ y recibe las colecciones normalizadas:
+
+- `clients`: objeto {id: cliente}, activos y archivados (campo `is_active`).
+- `projects`: lista de proyectos que referencian a su cliente con `client_id`.
+- `tasks`: lista de tareas que referencian a su proyecto con `project_id`.
+
+Son tres consultas fijas (los costes salen de los totales precalculados). La
+respuesta se comprime con gzip si el navegador lo acepta y lleva un ETag basado en
+la versión de los datos del panel (ver projects/metrics_cache.py), así que mientras
+nada cambie el navegador recibe un 304 sin que se consulte la base de datos. Sin
+caché compartida por los workers no hay ETag (ver metrics_cache.version_is_shared).
+
+El feed de cambios (/api/v1/dashboard/changes/?since=<watermark>) devuelve lo que
+cambió desde la respuesta anterior con las mismas formas (ver projects/sync.py).
+"""
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.gzip import gzip_page
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from clients.models import Client
+from clients.serializers import ClientSerializer
+from projects import metrics_cache, sync
+from projects.models import Project
+from projects.serializers import ProjectSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+class BootstrapProjectSerializer(ProjectSerializer):
+    """Proyecto sin el cliente anidado: solo su `client_id`."""
+    client_id = serializers.IntegerField(read_only=True)
+
+    class Meta(ProjectSerializer.Meta):
+        fields = [field for field in ProjectSerializer.Meta.fields if field != 'client']
+
+
+class BootstrapTaskSerializer(TaskSerializer):
+    """Tarea sin nombres de proyecto y cliente: solo su `project_id`."""
+    project_id = serializers.IntegerField(read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = ['project_id'] + [
+            field for field in TaskSerializer.Meta.fields
+            if field not in ('project', 'project_name', 'client_name')
+        ]
+
+
+def _etag(request):
+    # Incluimos el día para que la marca de agua de la respuesta nunca quede más vieja
+    # que la retención de las marcas de borrado del feed de cambios.
+    today = timezone.now().date().isoformat()
+    return f'"bootstrap-{metrics_cache.get_data_version()}-{request.user.pk}-{today}"'
+
+
+@gzip_page
+@api_view(['GET'])
+def dashboard_bootstrap(request):
+    """
+    Devuelve clientes, proyectos y tareas normalizados para el primer render del Dashboard.
+    """
+    etag = _etag(request) if metrics_cache.version_is_shared() else None
+    if etag is not None:
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+    # La forma de la respuesta es fija (el ETag no depende de la URL): sin ?fields=.
+    context = {'request': request, 'ignore_field_selection': True}
+    clients = Client.objects.select_related('user', 'rollup').order_by('-created_at', '-id')
+    projects = Project.objects.select_related('rollup').order_by('-created_at', '-id')
+    tasks = Task.objects.order_by('due_date', 'created_at', 'id')
+
+    response = Response({
+        # Marca de agua para pedir después solo los cambios (dashboard/changes/?since=...).
+        'watermark': sync.collect_watermark(),
+        'clients': {
+            str(client['id']): client
+            for client in ClientSerializer(clients, many=True, context=context).data
+        },
+        'projects': BootstrapProjectSerializer(projects, many=True, context=context).data,
+        'tasks': BootstrapTaskSerializer(tasks, many=True, context=context).data,
+    })
+    if etag is not None:
+        response['ETag'] = etag
+    # El navegador guarda la respuesta pero siempre pregunta si sigue vigente.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _parse_since(value):
+    try:
+        since = parse_datetime(value or '')
+    except ValueError:
+        since = None
+    if since is None or timezone.is_naive(since):
+        return None
+    return since
+
+
+@gzip_page
+@api_view(['GET'])
+def dashboard_changes(request):
+    """
+    Feed de cambios: clientes, proyectos y tareas modificados desde `since`, los IDs
+    borrados y los totales recalculados de los proyectos y clientes afectados.
+
+    `since` es la `watermark` devuelta por dashboard/bootstrap/ o por la llamada
+    anterior a este endpoint (fecha ISO 8601 con zona horaria).
+    """
+    since = _parse_since(request.query_params.get('since'))
+    if since is None:
+        return Response(
+            {"error": "Parámetro 'since' inválido. Use la 'watermark' de la respuesta anterior."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if sync.is_too_old(since):
+        return Response(
+            {"error": "La marca de agua es demasiado antigua. Vuelva a cargar dashboard/bootstrap/."},
+            status=status.HTTP_410_GONE
+        )
+
+    # Mismas formas que dashboard/bootstrap/ para que el frontend mezcle los cambios
+    # con lo que ya tiene: sin ?fields=.
+    context = {'request': request, 'ignore_field_selection': True}
+    changes = sync.collect_changes(since)
+    return Response({
+        'watermark': changes['watermark'],
+        'clients': {
+            str(client['id']): client
+            for client in ClientSerializer(changes['clients'], many=True, context=context).data
+        },
+        'projects': BootstrapProjectSerializer(changes['projects'], many=True, context=context).data,
+        'tasks': BootstrapTaskSerializer(changes['tasks'], many=True, context=context).data,
+        'deleted': changes['deleted'],
+        'rollups': changes['rollups'],
+    })
@@ -0,0 +1,94 @@
+"""
+Peticiones condicionales (ETag / Last-Modified) para los endpoints de lectura.
+
+Los validadores se calculan antes de ejecutar la consulta y el serializer, a partir
+de la versión de los datos que incrementa cualquier alta, edición o borrado de
+clientes, proyectos o tareas (ver projects/metrics_cache.py). Esa versión vive en la
+caché, así que una respuesta 304 no hace ninguna consulta a la base de datos.
+
+La versión es global: cualquier escritura invalida todas las respuestas. Es
+deliberado, porque los listados incluyen datos de otras tablas (costes de las
+tareas dentro de proyectos y clientes, el cliente dentro de cada proyecto...).
+
+Solo sirve si todos los procesos ven la misma versión: con la caché en memoria de
+cada proceso (sin DJANGO_CACHE_DIR) no se envían estos validadores y las respuestas
+se calculan siempre (ver metrics_cache.version_is_shared).
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from projects import metrics_cache
+
+
+def request_digest(request):
+    """Resume lo que distingue dos respuestas con los mismos datos: URL, usuario y formato."""
+    key = '|'.join([
+        request.build_absolute_uri(),
+        str(getattr(request.user, 'pk', '')),
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def data_version_validators(request):
+    """
+    Devuelve (etag, last_modified) según la versión global de los datos, o
+    (None, None) si la caché no es compartida por todos los procesos.
+    """
+    if not metrics_cache.version_is_shared():
+        return None, None
+    version = metrics_cache.get_data_version()
+    return f'"{version}-{request_digest(request)}"', metrics_cache.get_data_modified()
+
+
+def conditional_get(validators=data_version_validators):
+    """
+    Decorador para métodos GET de vistas DRF (list, retrieve, acciones o APIView.get).
+
+    `validators(request)` devuelve (etag, last_modified); last_modified es un datetime
+    o None, y si los dos son None la vista se ejecuta sin más. Si el navegador ya tiene esa versión se responde 304 sin ejecutar la vista;
+    si no, se ejecuta y se añaden las cabeceras ETag y Last-Modified a la respuesta.
+    En acciones que también aceptan escrituras, los demás métodos pasan sin cambios.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_method(self, request, *args, **kwargs)
+            etag, last_modified = validators(request)
+            if etag is None and last_modified is None:
+                return view_method(self, request, *args, **kwargs)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                if etag is not None:
+                    response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+                # El navegador puede guardar la respuesta pero debe revalidarla siempre.
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Añade ETag / Last-Modified a las acciones `list` y `retrieve` de un ViewSet.
+    Las acciones propias de lectura se decoran con `@conditional_get()`.
+    """
+
+    @conditional_get()
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get()
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,242 @@
+"""
+Descarga de adjuntos con permisos en Django y transferencia delegada al proxy.
+
+Django solo sirve /media/ con DEBUG activo, así que en producción los adjuntos de
+tareas y proyectos y el favicon se entregan por estos endpoints:
+
+- /api/v1/files/<task|project>/<id>/: comprueba que el usuario pueda ver el adjunto
+  (staff, o el usuario del cliente dueño) y entrega el archivo.
+- /api/v1/files/<task|project>/<id>/link/: devuelve un enlace firmado y temporal al
+  endpoint anterior. Los navegadores no envían el token JWT al abrir un enlace o al
+  reproducir un vídeo, así que el frontend pide primero el enlace y abre ese.
+- /api/v1/files/favicon/: el favicon de la configuración (público).
+
+La transferencia depende de MEDIA_SENDFILE_BACKEND: con 'x-accel-redirect' Django
+responde solo con cabeceras y nginx envía el archivo desde una location interna; con
+'x-sendfile' lo hace Apache/lighttpd. Sin proxy, FileResponse atiende peticiones Range
+(un rango por petición, suficiente para vídeo y PDF) y, con gunicorn, envía los bytes
+con sendfile sin copiarlos por Python. En ningún caso el archivo pasa por la memoria.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+from rest_framework import exceptions
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from clients.models import AppConfiguration
+from projects.models import Project
+from tasks.models import Task
+
+LINK_SALT = 'portal_sandoval.downloads'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# tipo -> (queryset, función que devuelve el ID del usuario dueño del objeto)
+DOWNLOADS = {
+    'task': (Task.objects.select_related('project__client'), lambda task: task.project.client.user_id),
+    'project': (Project.objects.select_related('client'), lambda project: project.client.user_id),
+}
+
+
+class FileRange:
+    """Vista de solo lectura del tramo [start, start + length) de un archivo abierto."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    # gunicorn usa fileno() y la posición actual para enviar el tramo con sendfile,
+    # limitado por el Content-Length de la respuesta.
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Devuelve (inicio, fin) inclusive para una cabecera `Range` de un solo rango, None si
+    no hay rango utilizable (se envía el archivo completo) o False si no es satisfacible.
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # bytes=-N: los últimos N bytes.
+        length = min(int(last), size)
+        return (size - length, size - 1) if length else False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def ranged_file_response(request, fieldfile, content_type, filename, as_attachment=False):
+    """FileResponse para un archivo del almacenamiento, con ETag, Last-Modified y Range."""
+    try:
+        path = fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        # Almacenamiento sin ruta local: se envía completo, sin Range ni sendfile.
+        return FileResponse(fieldfile.open('rb'), content_type=content_type,
+                            as_attachment=as_attachment, filename=filename)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('El archivo no existe.')
+
+    size, last_modified = stat.st_size, int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range in (etag, http_date(last_modified)):
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, as_attachment=as_attachment, filename=filename)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end - start + 1), content_type=content_type,
+                                as_attachment=as_attachment, filename=filename)
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def serve_file(request, fieldfile, as_attachment=False):
+    """Entrega un archivo de un FileField según MEDIA_SENDFILE_BACKEND."""
+    filename = os.path.basename(fieldfile.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(fieldfile.name)
+    elif backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fieldfile.path
+    else:
+        return ranged_file_response(request, fieldfile, content_type, filename, as_attachment)
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def get_file_object(kind, pk, user):
+    """
+    Devuelve la tarea o proyecto `pk` si `user` puede ver y cambiar sus adjuntos
+    (staff, o el usuario del cliente dueño). Lo usan también las subidas por partes.
+    """
+    if kind not in DOWNLOADS:
+        raise Http404
+    queryset, owner_id = DOWNLOADS[kind]
+    instance = get_object_or_404(queryset, pk=pk)
+    if not (user.is_staff or owner_id(instance) == user.pk):
+        raise exceptions.PermissionDenied('No tiene permiso para acceder a los archivos de este objeto.')
+    return instance
+
+
+def _get_attachment(kind, pk, user):
+    instance = get_file_object(kind, pk, user)
+    if not instance.attachment:
+        raise Http404('No hay archivo adjunto.')
+    return instance.attachment
+
+
+def signed_download_path(kind, pk, user):
+    """Ruta del endpoint de descarga con una firma que identifica al usuario."""
+    signature = signing.dumps({'kind': kind, 'id': pk, 'user': user.pk}, salt=LINK_SALT)
+    return f"{reverse('file-download', args=[kind, pk])}?signature={signature}"
+
+
+def _signed_user(kind, pk, signature):
+    try:
+        data = signing.loads(signature, salt=LINK_SALT, max_age=settings.MEDIA_DOWNLOAD_LINK_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if data.get('kind') != kind or data.get('id') != pk:
+        return None
+    return User.objects.filter(pk=data.get('user'), is_active=True).first()
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def attachment_download(request, kind, pk):
+    """
+    Descarga el adjunto de una tarea o proyecto. Acepta el token JWT habitual o la
+    firma de un enlace obtenido con attachment_link.
+    """
+    signature = request.query_params.get('signature')
+    if signature is not None:
+        user = _signed_user(kind, pk, signature)
+        if user is None:
+            raise exceptions.PermissionDenied('El enlace de descarga no es válido o ha caducado.')
+    elif request.user.is_authenticated:
+        user = request.user
+    else:
+        raise exceptions.NotAuthenticated()
+    return serve_file(request, _get_attachment(kind, pk, user))
+
+
+@api_view(['GET'])
+def attachment_link(request, kind, pk):
+    """Devuelve un enlace temporal de descarga, para abrirlo directamente en el navegador."""
+    _get_attachment(kind, pk, request.user)
+    return Response({
+        'url': request.build_absolute_uri(signed_download_path(kind, pk, request.user)),
+        'expires_in': settings.MEDIA_DOWNLOAD_LINK_MAX_AGE,
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def favicon(request):
+    """Favicon de la configuración; público porque se muestra también en el login."""
+    config = AppConfiguration.get_config()
+    if not config.favicon:
+        raise Http404
+    response = serve_file(request, config.favicon)
+    # La URL cambia con cada favicon nuevo (?v=...), así que se puede cachear.
+    patch_cache_control(response, public=True, max_age=86400)
+    return response
@@ -0,0 +1,165 @@
+"""
+Serialización rápida de listados a partir de `values()`.
+
+Los listados de clientes, proyectos y tareas son de solo lectura. Con un
+ModelSerializer, cada fila crea una instancia del modelo (y de sus relaciones) y
+recorre los campos del serializer uno por uno, con `get_attribute()` siguiendo los
+`source` con puntos y serializers anidados que se vuelven a preparar por fila.
+
+ValuesSerializer compila una sola vez, a partir del serializer de la vista, la lista
+de columnas que necesita (`project__client__business_name`, `rollup__task_cost`...)
+y una función de formato por campo, y luego convierte cada diccionario de
+`values()` directamente. Para formatear usa los mismos objetos Field de DRF, así que
+la salida es idéntica byte a byte a la del serializer original.
+
+Los campos calculados (SerializerMethodField) se declaran en el serializer con
+`values_methods = {'campo': (('columna', ...), funcion)}`: las columnas que necesita
+y cómo calcular el valor a partir de ellas.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+def _file_formatter(field, storage):
+    request = field.context.get('request')
+
+    def to_representation(name):
+        # Igual que FileField.to_representation, pero a partir del nombre guardado.
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return to_representation
+
+
+def _identity(value):
+    return value
+
+
+def _compile(serializer, prefix=''):
+    """Devuelve (columnas, plan) para un serializer; el plan es una lista de (campo, tipo, datos)."""
+    model = serializer.Meta.model
+    methods = getattr(serializer, 'values_methods', {})
+    columns, plan = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            sources, function = methods[name]
+            sources = [prefix + source for source in sources]
+            columns.extend(sources)
+            plan.append((name, 'method', (sources, function)))
+            continue
+
+        column = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.BaseSerializer):
+            nested_columns, nested_plan = _compile(field, prefix=column + '__')
+            columns.extend(nested_columns)
+            plan.append((name, 'nested', nested_plan))
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            # values() ya devuelve la clave primaria de la relación (ver ?expand=).
+            columns.append(column)
+            plan.append((name, 'value', (column, _identity)))
+        elif isinstance(field, serializers.FileField):
+            storage = model._meta.get_field(field.source).storage
+            columns.append(column)
+            plan.append((name, 'value', (column, _file_formatter(field, storage))))
+        else:
+            columns.append(column)
+            plan.append((name, 'value', (column, field.to_representation)))
+    return columns, plan
+
+
+def _ordering_columns(queryset):
+    """Columnas de `values()` de los campos del order_by del queryset."""
+    opts = queryset.model._meta
+    columns = []
+    for item in queryset.query.order_by:
+        if not isinstance(item, str) or item == '?':
+            continue
+        name = item.lstrip('-')
+        if name == 'pk':
+            columns.append(opts.pk.attname)
+            continue
+        try:
+            columns.append(opts.get_field(name).attname)
+        except FieldDoesNotExist:
+            # Relaciones con `__` o anotaciones: values() las acepta tal cual.
+            columns.append(name)
+    return columns
+
+
+def _render(plan, row):
+    data = {}
+    for name, kind, spec in plan:
+        if kind == 'value':
+            column, to_representation = spec
+            value = row[column]
+            # DRF no llama a to_representation cuando el atributo es None.
+            data[name] = None if value is None else to_representation(value)
+        elif kind == 'method':
+            sources, function = spec
+            data[name] = function(*(row[source] for source in sources))
+        else:
+            data[name] = _render(spec, row)
+    return data
+
+
+class ValuesSerializer:
+    """
+    Serializa filas de `values()` con exactamente la misma salida que `serializer_class`.
+    Se construye una vez por petición (el contexto hace falta para las URLs absolutas).
+    """
+
+    def __init__(self, serializer_class, context=None):
+        serializer = serializer_class(context=context or {})
+        columns, self.plan = _compile(serializer)
+        # 'id' también lo usa la paginación por cursor como desempate.
+        self.columns = list(dict.fromkeys(['id', *columns]))
+
+    def values(self, queryset):
+        # La paginación por cursor lee de cada fila los campos del orden: van en values()
+        # aunque ?fields= no los pida (la respuesta solo incluye los campos del plan).
+        return queryset.values(*dict.fromkeys([*self.columns, *_ordering_columns(queryset)]))
+
+    def to_representation(self, row):
+        return _render(self.plan, row)
+
+    def many(self, rows):
+        return [_render(self.plan, row) for row in rows]
+
+
+class ValuesListMixin:
+    """
+    Sirve la acción `list` de un ViewSet con ValuesSerializer en lugar del serializer
+    de la vista (misma respuesta, sin crear instancias del modelo).
+    """
+
+    def get_values_serializer(self):
+        # Se compila una vez por petición (lo usan también select_related_fields y list).
+        if getattr(self, '_values_serializer', None) is None:
+            self._values_serializer = ValuesSerializer(self.get_serializer_class(), context=self.get_serializer_context())
+        return self._values_serializer
+
+    def select_related_fields(self, queryset, *paths):
+        """
+        `select_related(*paths)`, pero en las lecturas descarta las relaciones que no usa
+        ningún campo de la respuesta (por ejemplo con ?fields= o ?expand=).
+        """
+        if self.request is not None and self.request.method in ('GET', 'HEAD'):
+            columns = self.get_values_serializer().columns
+            paths = [path for path in paths if any(column.startswith(path + '__') for column in columns)]
+        # select_related() sin argumentos seguiría todas las claves foráneas.
+        return queryset.select_related(*paths) if paths else queryset
+
+    def values_list_response(self, queryset):
+        fast = self.get_values_serializer()
+        rows = fast.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.many(page))
+        return Response(fast.many(rows))
+
+    def list(self, request, *args, **kwargs):
+        return self.values_list_response(self.filter_queryset(self.get_queryset()))
@@ -0,0 +1,76 @@
+"""
+Selección de campos (`?fields=`) y control de anidados (`?expand=`) en las lecturas.
+
+- `?fields=id,name,client.business_name`: solo esos campos. Un punto baja a un
+  serializer anidado; nombrar el anidado sin punto (`client`) lo devuelve completo.
+  El `id` se incluye siempre y los nombres desconocidos se ignoran.
+- `?expand=client`: solo se anidan las relaciones indicadas (`client.user` para bajar
+  un nivel más); las demás se devuelven como su ID (`"client": 3`). Sin el parámetro,
+  se anidan todas como hasta ahora, y `?expand=` vacío no anida ninguna.
+
+Los campos se quitan del serializer antes de serializar, así que no se calculan: los
+SerializerMethodField descartados no se ejecutan y ValuesSerializer (ver
+fast_serializers.py) solo pide a `values()` las columnas de los campos que quedan,
+con lo que desaparecen los JOIN y subconsultas que no hacen falta. En el detalle, las
+vistas ajustan su `select_related` con ValuesListMixin.select_related_fields().
+
+Solo se aplica a las lecturas (GET y HEAD); las respuestas de las escrituras son completas.
+"""
+from rest_framework import serializers
+
+ALWAYS_INCLUDED = ('id',)
+
+
+def parse_field_tree(value):
+    """'id,client.user.email' -> {'id': {}, 'client': {'user': {'email': {}}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def select_fields(serializer, fields=None, expand=None):
+    """
+    Quita de `serializer.fields` lo que no se pidió. `fields` y `expand` son árboles de
+    parse_field_tree(); None significa "sin restricción" (todos los campos, todo anidado).
+    """
+    if fields:
+        for name in list(serializer.fields):
+            if name not in fields and name not in ALWAYS_INCLUDED:
+                serializer.fields.pop(name)
+
+    for name, field in list(serializer.fields.items()):
+        if not isinstance(field, serializers.BaseSerializer):
+            continue
+        if expand is not None and name not in expand:
+            # Relación sin expandir: solo su clave primaria, sin JOIN ni campos calculados.
+            kwargs = {} if field.source == name else {'source': field.source}
+            serializer.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, **kwargs)
+        else:
+            select_fields(
+                field,
+                fields=(fields or {}).get(name),
+                expand=expand.get(name) if expand is not None else None,
+            )
+
+
+class FieldSelectionMixin:
+    """
+    Aplica `?fields=` y `?expand=` de la petición del contexto al serializer raíz.
+    Se puede desactivar con `ignore_field_selection` en el contexto (lo usa el
+    bootstrap del Dashboard, que siempre devuelve la forma completa).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD') or self.context.get('ignore_field_selection'):
+            return
+        params = getattr(request, 'query_params', request.GET)
+        fields = parse_field_tree(params['fields']) if params.get('fields') else None
+        expand = parse_field_tree(params['expand']) if 'expand' in params else None
+        if fields is not None or expand is not None:
+            select_fields(self, fields=fields, expand=expand)
@@ -0,0 +1,209 @@
+"""
+Métricas de rendimiento por endpoint, en formato Prometheus.
+
+RequestMetricsMiddleware mide cada petición y la acumula bajo el nombre de la URL
+resuelta (`project-list`, `admin-dashboard-metrics`...) y el método:
+
+- peticiones por código de estado,
+- histogramas de latencia, consultas SQL por petición, tiempo en la base de datos
+  (medido con connection.execute_wrapper) y tamaño de la respuesta.
+
+GET /api/v1/metrics/ devuelve todo en el formato de texto de Prometheus. Lo pueden
+leer los administradores o Prometheus con `Authorization: Bearer <METRICS_TOKEN>`.
+Con SERVER_TIMING=True cada respuesta lleva además la cabecera `Server-Timing`
+(`app`, `db`), visible en la pestaña de red del navegador.
+
+Gunicorn ejecuta varios procesos y cada uno acumula sus propias métricas. Si se
+define REQUEST_METRICS_DIR, cada proceso guarda una copia en ese directorio cada
+REQUEST_METRICS_FLUSH_INTERVAL segundos y el endpoint las suma todas; los hooks de
+gunicorn.conf.py conservan las de los procesos que terminan (ver metrics_store.py).
+Sin el directorio, el endpoint muestra solo las del proceso que atiende la petición.
+"""
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import BasePermission
+from rest_framework.settings import api_settings
+
+from .metrics_store import HISTOGRAMS, merge, new_stats, read, write
+
+_registry = {}
+_registry_lock = threading.Lock()
+_last_flush = [0.0]
+
+
+class QueryRecorder:
+    """Wrapper de connection.execute_wrapper que cuenta las consultas y su duración."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def record(view, method, status, duration, queries, query_time, size):
+    """Acumula una petición en las métricas de este proceso."""
+    observations = (duration, queries, query_time, size)
+    with _registry_lock:
+        stats = _registry.get((view, method))
+        if stats is None:
+            stats = _registry[(view, method)] = new_stats()
+        stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+        for (name, _, bounds), value in zip(HISTOGRAMS, observations):
+            histogram = stats[name]
+            histogram['buckets'][bisect_left(bounds, value)] += 1
+            histogram['sum'] += value
+
+
+def reset():
+    with _registry_lock:
+        _registry.clear()
+
+
+def snapshot():
+    """Copia de las métricas de este proceso, serializable a JSON: {"vista|método": stats}."""
+    with _registry_lock:
+        return {f'{view}|{method}': json.loads(json.dumps(stats)) for (view, method), stats in _registry.items()}
+
+
+def flush(force=False):
+    """Guarda las métricas de este proceso en REQUEST_METRICS_DIR, como mucho cada intervalo."""
+    directory = settings.REQUEST_METRICS_DIR
+    now = time.monotonic()
+    if not directory or (not force and now - _last_flush[0] < settings.REQUEST_METRICS_FLUSH_INTERVAL):
+        return
+    _last_flush[0] = now
+    os.makedirs(directory, exist_ok=True)
+    write(os.path.join(directory, f'{os.getpid()}.json'), snapshot())
+
+
+def collect():
+    """Métricas de todos los procesos: las guardadas en disco más las actuales de este."""
+    totals = {}
+    directory = settings.REQUEST_METRICS_DIR
+    own = f'{os.getpid()}.json'
+    if directory and os.path.isdir(directory):
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.json') and filename != own:
+                merge(totals, read(os.path.join(directory, filename)))
+    return merge(totals, snapshot())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def render_prometheus(metrics):
+    """Formato de texto de Prometheus (0.0.4) a partir del formato de snapshot()."""
+    prefix = settings.REQUEST_METRICS_PREFIX
+    items = sorted((key.rsplit('|', 1), stats) for key, stats in metrics.items())
+    lines = [
+        f'# HELP {prefix}_http_requests_total Peticiones atendidas por vista, método y código de estado.',
+        f'# TYPE {prefix}_http_requests_total counter',
+    ]
+    for (view, method), stats in items:
+        for status, count in sorted(stats['statuses'].items()):
+            lines.append(f'{prefix}_http_requests_total{{{_labels(view=view, method=method, status=status)}}} {count}')
+
+    for name, help_text, bounds in HISTOGRAMS:
+        metric = f'{prefix}_{name}'
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for (view, method), stats in items:
+            labels = _labels(view=view, method=method)
+            cumulative = 0
+            for bound, count in zip(list(bounds) + ['+Inf'], stats[name]['buckets']):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {stats[name]["sum"]:.6f}')
+            lines.append(f'{metric}_count{{{labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class RequestMetricsMiddleware:
+    """
+    Mide cada petición (ver el docstring del módulo). Va primero en MIDDLEWARE para
+    incluir el tiempo del resto de middlewares. Se desactiva con REQUEST_METRICS_ENABLED=False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        # Las URL que no existen se agrupan: cada ruta inventada no crea una serie nueva.
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else '<unresolved>'
+        record(view, request.method, response.status_code, duration,
+               recorder.count, recorder.duration, _response_size(response))
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'app;dur={duration * 1000:.1f}, '
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} consultas"'
+            )
+        flush()
+        return response
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """`Authorization: Bearer <METRICS_TOKEN>`, para que Prometheus lea /api/v1/metrics/."""
+
+    def authenticate(self, request):
+        token = settings.METRICS_TOKEN
+        header = request.headers.get('Authorization', '')
+        if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+            return AnonymousUser(), 'metrics-token'
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
+
+
+class CanReadMetrics(BasePermission):
+    def has_permission(self, request, view):
+        if request.auth == 'metrics-token':
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+@api_view(['GET'])
+@authentication_classes([MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+@permission_classes([CanReadMetrics])
+def metrics(request):
+    """Métricas por endpoint en formato Prometheus."""
+    flush(force=True)
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
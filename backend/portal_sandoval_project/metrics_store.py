@@ -0,0 +1,70 @@
+"""
+Almacén de las métricas por endpoint de instrumentation.py, sin dependencias de Django.
+
+Cada proceso guarda sus métricas como JSON ({"vista|método": estadísticas}) y aquí se
+suman. Va aparte para que el maestro de gunicorn (gunicorn.conf.py) pueda archivar las
+de un worker que terminó sin cargar Django.
+"""
+import json
+import os
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ARCHIVE_NAME = 'archived.json'
+
+# (métrica, ayuda, límites): los histogramas que se guardan por endpoint.
+HISTOGRAMS = (
+    ('http_request_duration_seconds', 'Duración de la petición en segundos.', LATENCY_BUCKETS),
+    ('db_queries_per_request', 'Consultas SQL por petición.', QUERY_BUCKETS),
+    ('db_query_duration_seconds', 'Tiempo total en la base de datos por petición, en segundos.', LATENCY_BUCKETS),
+    ('http_response_size_bytes', 'Tamaño del cuerpo de la respuesta en bytes.', SIZE_BUCKETS),
+)
+
+
+def new_stats():
+    return {
+        'statuses': {},
+        **{name: {'buckets': [0] * (len(bounds) + 1), 'sum': 0.0} for name, _, bounds in HISTOGRAMS},
+    }
+
+
+def merge(target, source):
+    """Suma las métricas de `source` en `target` (ambos en el formato de snapshot())."""
+    for key, stats in source.items():
+        current = target.setdefault(key, new_stats())
+        for status, count in stats['statuses'].items():
+            current['statuses'][status] = current['statuses'].get(status, 0) + count
+        for name, _, _ in HISTOGRAMS:
+            current[name]['buckets'] = [a + b for a, b in zip(current[name]['buckets'], stats[name]['buckets'])]
+            current[name]['sum'] += stats[name]['sum']
+    return target
+
+
+def read(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write(path, data):
+    # Se escribe en un temporal y se renombra, para no leer nunca un archivo a medias.
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+def archive_process(directory, pid):
+    """
+    Suma las métricas guardadas de un proceso que terminó al archivo común y borra
+    las suyas. Lo llama el maestro de gunicorn (hook child_exit).
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive = os.path.join(directory, ARCHIVE_NAME)
+    write(archive, merge(read(archive), read(path)))
+    os.remove(path)
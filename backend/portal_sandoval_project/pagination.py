@@ -0,0 +1,149 @@
+import json
+from datetime import date, datetime
+from functools import partial
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) sobre el orden que ya trae el queryset de cada vista.
+
+    A diferencia de la CursorPagination de DRF, que solo usa el primer campo de
+    ordenamiento más un desplazamiento, aquí el cursor guarda los valores de *todos*
+    los campos del orden (más la clave primaria como desempate). Así cada página es
+    una consulta `WHERE (campos) > (valores del cursor) ... LIMIT n` que aprovecha los
+    índices compuestos, y los cursores siguen siendo estables aunque se inserten
+    filas mientras el cliente recorre las páginas.
+
+    La paginación solo se activa si hay un tamaño de página: `?page_size=N` en la
+    petición o `PAGE_SIZE` en la configuración de DRF. Sin ninguno de los dos las
+    listas se devuelven completas, como antes.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering_keys(self, queryset):
+        """
+        Devuelve la lista de (campo, descendente, admite_nulos) a partir del
+        `order_by` del queryset, añadiendo la clave primaria como desempate.
+        """
+        ordering = list(queryset.query.order_by) or ['pk']
+        opts = queryset.model._meta
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or '__' in item or '?' in item:
+                raise ImproperlyConfigured(
+                    f'KeysetCursorPagination solo admite campos simples en order_by, no {item!r}.'
+                )
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            keys.append((field.attname, descending, field.null))
+        if not any(field == opts.pk.attname for field, _, _ in keys):
+            keys.append((opts.pk.attname, keys[-1][1], False))
+        return keys
+
+    @staticmethod
+    def _order_expression(field, descending, nullable):
+        # Fijamos explícitamente dónde van los NULL (al final en orden ascendente,
+        # al principio en descendente, como hace PostgreSQL) para que el filtro del
+        # cursor sea coherente con el orden en cualquier base de datos.
+        if not nullable:
+            return f'-{field}' if descending else field
+        if descending:
+            return F(field).desc(nulls_first=True)
+        return F(field).asc(nulls_last=True)
+
+    @staticmethod
+    def _after(field, descending, nullable, value):
+        """Condición para las filas que van estrictamente después de `value` en este campo."""
+        nulls_first = nullable and descending
+        if value is None:
+            if nulls_first:
+                return Q(**{f'{field}__isnull': False})
+            return Q(pk__in=[])
+        condition = Q(**{f'{field}__lt' if descending else f'{field}__gt': value})
+        if nullable and not nulls_first:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    @staticmethod
+    def _equal(field, value):
+        if value is None:
+            return Q(**{f'{field}__isnull': True})
+        return Q(**{field: value})
+
+    def _keyset_filter(self, keys, values):
+        """(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... respetando la dirección de cada campo."""
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for (field, descending, nullable), value in zip(keys, values):
+            condition |= prefix & self._after(field, descending, nullable, value)
+            prefix &= self._equal(field, value)
+        return condition
+
+    @staticmethod
+    def _serialize_value(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if value is None or isinstance(value, (int, str)):
+            return value
+        return str(value)
+
+    def _position(self, item):
+        # Las filas pueden ser instancias del modelo o diccionarios de values().
+        get = item.get if isinstance(item, dict) else partial(getattr, item)
+        return json.dumps([self._serialize_value(get(field)) for field, _, _ in self.keys])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+
+        self.keys = self.get_ordering_keys(queryset)
+        keys = [(field, descending != reverse, nullable) for field, descending, nullable in self.keys]
+        queryset = queryset.order_by(*(self._order_expression(*key) for key in keys))
+
+        if self.cursor and self.cursor.position is not None:
+            try:
+                values = json.loads(self.cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if not isinstance(values, list) or len(values) != len(keys):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(self._keyset_filter(keys, values))
+
+        # Pedimos una fila de más para saber si hay otra página.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and self.cursor.position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = Cursor(offset=0, reverse=False, position=self._position(self.page[-1]))
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        cursor = Cursor(offset=0, reverse=True, position=self._position(self.page[0]))
+        return self.encode_cursor(cursor)
@@ -0,0 +1,194 @@
+"""
+Perfilado bajo demanda de una petición a la API.
+
+Un administrador añade `?__profile=<modo>` a cualquier URL de /api/v1/ (por ejemplo
+`/api/v1/admin/metrics/?start_date=...&__profile=sql`) y, en lugar de la respuesta
+normal, recibe el perfil de esa petición:
+
+- `cpu`: resumen de cProfile en texto, ordenado por tiempo acumulado.
+- `pstats`: el volcado de cProfile para descargar (`python -m pstats`, snakeviz).
+- `flame`: pilas muestreadas cada PROFILE_SAMPLE_INTERVAL segundos en formato
+  "collapsed" (una pila por línea con su número de muestras), para flamegraph.pl o
+  speedscope.
+- `sql`: cronología JSON de todas las consultas: inicio y duración en milisegundos,
+  SQL, parámetros y el código que la lanzó.
+
+La vista se ejecuta igual que sin el parámetro (incluida la caché de métricas: una
+respuesta `X-Cache: HIT` perfila el acierto de caché). Para cualquier otro usuario el
+parámetro se ignora. Sin `__profile` el middleware solo mira la query string.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .query_inspector import query_callsite
+
+PARAMETER = '__profile'
+MODES = ('cpu', 'pstats', 'flame', 'sql')
+
+
+def _requested_mode(request):
+    if f'{PARAMETER}=' not in request.META.get('QUERY_STRING', '') or not request.path.startswith('/api/v1/'):
+        return None
+    mode = request.GET.get(PARAMETER)
+    return mode if mode in MODES else None
+
+
+def _is_staff(request):
+    """Autentica como lo haría la API (JWT) o con la sesión del admin de Django."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    drf_request = Request(request, authenticators=[cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return bool(drf_request.user and drf_request.user.is_staff)
+    except APIException:
+        return False
+
+
+class StackSampler:
+    """Muestrea la pila de un hilo a intervalos fijos desde otro hilo."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._stack(frame)] += 1
+
+    @staticmethod
+    def _stack(frame):
+        base_dir = str(settings.BASE_DIR)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            filename = code.co_filename
+            if filename.startswith(base_dir):
+                filename = filename[len(base_dir) + 1:]
+            else:
+                filename = os.path.basename(filename)
+            names.append(f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ','))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class SQLTimeline:
+    """Wrapper de execute_wrapper que guarda cada consulta con su momento y duración."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.queries.append({
+                'start_ms': round((start - self.start) * 1000, 2),
+                'duration_ms': round((end - start) * 1000, 2),
+                'sql': sql,
+                'params': [repr(param) for param in params] if isinstance(params, (list, tuple)) else repr(params),
+                'many': many,
+                'callsite': query_callsite(),
+            })
+
+
+def _filename(request, extension):
+    return f'profile-{timezone.now():%Y%m%d-%H%M%S}-{request.path.strip("/").replace("/", "_")}.{extension}'
+
+
+class ProfilingMiddleware:
+    """
+    Atiende `?__profile=` (ver el docstring del módulo). Va al final de MIDDLEWARE,
+    después de AuthenticationMiddleware, y perfila la vista y lo que la rodea.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = _requested_mode(request)
+        if mode is None or not _is_staff(request):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        if mode == 'sql':
+            timeline = SQLTimeline()
+            with connection.execute_wrapper(timeline):
+                response = self.get_response(request)
+            return JsonResponse({
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+                'query_count': len(timeline.queries),
+                'db_ms': round(sum(query['duration_ms'] for query in timeline.queries), 2),
+                'queries': timeline.queries,
+            }, json_dumps_params={'indent': 2, 'ensure_ascii': False})
+
+        if mode == 'flame':
+            with StackSampler(settings.PROFILE_SAMPLE_INTERVAL) as sampler:
+                self.get_response(request)
+            profile = HttpResponse(sampler.collapsed(), content_type='text/plain; charset=utf-8')
+            profile['Content-Disposition'] = f'attachment; filename="{_filename(request, "collapsed")}"'
+            return profile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Desde Python 3.12 solo puede haber un perfilador activo por proceso.
+            return HttpResponse('Ya hay otra petición perfilándose en este proceso.', status=409)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        if mode == 'pstats':
+            profiler.create_stats()
+            profile = HttpResponse(marshal.dumps(profiler.stats), content_type='application/octet-stream')
+            profile['Content-Disposition'] = f'attachment; filename="{_filename(request, "prof")}"'
+            return profile
+
+        output = io.StringIO()
+        output.write(
+            f'{request.get_full_path()} -> {response.status_code} '
+            f'en {(time.perf_counter() - start) * 1000:.1f} ms\n\n'
+        )
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(settings.PROFILE_TOP_FUNCTIONS)
+        return HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
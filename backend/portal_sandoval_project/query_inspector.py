@@ -0,0 +1,219 @@
+"""
+Detector de consultas N+1 y consultas lentas.
+
+QueryInspector se instala con connection.execute_wrapper durante una petición (ver
+QueryInspectorMiddleware) o un bloque de código, y al terminar genera un informe:
+
+- Consultas repetidas: las que tienen la misma forma (la misma SQL sin contar los
+  valores; ver fingerprint()) y se ejecutan QUERY_REPEAT_THRESHOLD veces o más. Es
+  el síntoma de un bucle que consulta por cada fila, como un serializer que llama a
+  `obj.tasks.aggregate()` para cada proyecto. El informe incluye el archivo y la
+  línea del código del proyecto que las lanzó.
+- Consultas lentas: las que tardan SLOW_QUERY_THRESHOLD_MS o más. Si es una lectura
+  se guarda su plan con EXPLAIN (en PostgreSQL, `EXPLAIN (ANALYZE, BUFFERS)`), como
+  mucho una vez cada QUERY_EXPLAIN_INTERVAL segundos por forma de consulta y
+  proceso, porque ANALYZE la vuelve a ejecutar.
+
+Los informes con algún problema se escriben como JSON en el logger
+`portal_sandoval_project.query_inspector` (nivel WARNING). En los tests,
+QueryBudgetMixin.assertQueryBudget() falla si una vista supera su presupuesto de
+consultas o repite consultas, mostrando el mismo informe.
+"""
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# Literales y listas de parámetros: lo que cambia entre dos consultas de la misma forma.
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)', re.IGNORECASE)
+_PLACEHOLDERS = re.compile(r'%s|\?|\$\d+')
+_SPACES = re.compile(r'\s+')
+
+# {fingerprint: instante del último EXPLAIN} por proceso.
+_explained = {}
+_explained_lock = threading.Lock()
+
+
+def normalize(sql):
+    """SQL sin valores: literales como `?` y las listas de IN (...) como `IN (...)`."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Identificador corto de la forma de una consulta."""
+    return hashlib.md5(normalize(sql).encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def query_callsite():
+    """Archivo y línea del código del proyecto (no de Django ni de librerías) que lanzó la consulta."""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and 'site-packages' not in filename and filename != __file__:
+            return f'{filename[len(base_dir) + 1:]}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return None
+
+
+def _is_read(sql):
+    statement = sql.lstrip().upper()
+    return statement.startswith(('SELECT', 'WITH')) and 'FOR UPDATE' not in statement
+
+
+class QueryInspector:
+    """
+    Wrapper de execute_wrapper que agrupa las consultas por forma y mide su duración.
+    La pila solo se inspecciona cuando una forma se repite, para no encarecer el resto.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, label=''):
+        self.connection = connections[using]
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.groups = {}
+        self.slow = []
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            result = execute(sql, params, many, context)
+            succeeded = True
+            return result
+        finally:
+            self._record(sql, params, time.perf_counter() - start, explain=succeeded and not many)
+
+    def _record(self, sql, params, duration, explain):
+        self.count += 1
+        self.duration += duration
+        key = fingerprint(sql)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {'sql': normalize(sql), 'count': 0, 'duration': 0.0, 'callsites': {}}
+        group['count'] += 1
+        group['duration'] += duration
+        if group['count'] >= 2:
+            callsite = query_callsite()
+            group['callsites'][callsite] = group['callsites'].get(callsite, 0) + 1
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            self.slow.append({
+                'fingerprint': key, 'sql': sql, 'duration_ms': round(duration * 1000, 1),
+                'callsite': query_callsite(), 'plan': self._explain(key, sql, params) if explain else None,
+            })
+
+    def _explain(self, key, sql, params):
+        """Plan de una lectura lenta, o None si no toca (escritura, o explicada hace poco)."""
+        if not settings.QUERY_EXPLAIN_SLOW or not _is_read(sql):
+            return None
+        now = time.monotonic()
+        with _explained_lock:
+            if now - _explained.get(key, -settings.QUERY_EXPLAIN_INTERVAL) < settings.QUERY_EXPLAIN_INTERVAL:
+                return None
+            _explained[key] = now
+        try:
+            prefix = self.connection.ops.explain_query_prefix(analyze=True, buffers=True)
+        except (NotSupportedError, ValueError):
+            prefix = self.connection.ops.explain_query_prefix()
+        self._explaining = True
+        try:
+            # En un savepoint: si EXPLAIN falla, la transacción de la petición sigue intacta.
+            with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception as error:  # El plan es informativo: nunca debe romper la petición.
+            return f'EXPLAIN falló: {error}'
+        finally:
+            self._explaining = False
+
+    def repeated(self, threshold=None):
+        """Formas que se ejecutaron `threshold` veces o más, de más a menos repetidas."""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        groups = [
+            {
+                'fingerprint': key, 'count': group['count'], 'duration_ms': round(group['duration'] * 1000, 1),
+                'sql': group['sql'],
+                'callsites': sorted((site for site in group['callsites'] if site), key=group['callsites'].get, reverse=True),
+            }
+            for key, group in self.groups.items() if group['count'] >= threshold
+        ]
+        return sorted(groups, key=lambda group: group['count'], reverse=True)
+
+    def report(self, threshold=None):
+        return {
+            'label': self.label,
+            'queries': self.count,
+            'db_ms': round(self.duration * 1000, 1),
+            'repeated': self.repeated(threshold),
+            'slow': self.slow,
+        }
+
+
+@contextmanager
+def inspect_queries(using=DEFAULT_DB_ALIAS, label=''):
+    """Inspecciona las consultas del bloque: `with inspect_queries() as inspector: ...`."""
+    inspector = QueryInspector(using, label)
+    with inspector.connection.execute_wrapper(inspector):
+        yield inspector
+
+
+def log_report(report):
+    """Escribe el informe en el log si encontró algo."""
+    if report['repeated'] or report['slow']:
+        logger.warning(json.dumps(report, ensure_ascii=False))
+
+
+class QueryInspectorMiddleware:
+    """Inspecciona las consultas de cada petición y registra las repetidas y las lentas."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with inspect_queries(label=f'{request.method} {request.path}') as inspector:
+            response = self.get_response(request)
+        log_report(inspector.report())
+        return response
+
+
+class QueryBudgetMixin:
+    """
+    Para TestCase: `with self.assertQueryBudget(3): self.client.get(url)` falla si
+    el bloque hace más de 3 consultas o repite alguna forma `max_repeats` veces o más
+    (por defecto QUERY_REPEAT_THRESHOLD), con el informe en el mensaje.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_repeats=None):
+        with inspect_queries(label=self.id()) as inspector:
+            yield inspector
+        report = inspector.report(max_repeats)
+        problems = []
+        if inspector.count > max_queries:
+            problems.append(f'{inspector.count} consultas, el presupuesto es {max_queries}')
+        if report['repeated']:
+            problems.append(f'{len(report["repeated"])} consultas repetidas (posible N+1)')
+        if problems:
+            self.fail('; '.join(problems) + '\n' + json.dumps(report, indent=2, ensure_ascii=False))
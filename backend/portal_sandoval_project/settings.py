@@ -58,9 +58,13 @@ INSTALLED_APPS = [
     'clients.apps.ClientsConfig',
     'projects.apps.ProjectsConfig',
     'tasks.apps.TasksConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir también el tiempo del resto de middlewares (ver instrumentation.py).
+    'portal_sandoval_project.instrumentation.RequestMetricsMiddleware',
+    'portal_sandoval_project.query_inspector.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     # La posición recomendada para CorsMiddleware es aquí, después de las sesiones
@@ -71,6 +75,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Perfilado bajo demanda con ?__profile= (solo administradores, ver profiling.py).
+    'portal_sandoval_project.profiling.ProfilingMiddleware',
 ]
 
 # --- Configuración de CORS ---
@@ -111,15 +117,32 @@ CSRF_TRUSTED_ORIGINS = [
 # --- Configuración de Django REST Framework ---
 REST_FRAMEWORK = {
     # Usamos la autenticación por JSON Web Token (JWT) como método por defecto.
+    # Los datos del usuario van en el token (ver portal_sandoval_project/authentication.py).
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'portal_sandoval_project.authentication.ClaimsJWTAuthentication',
     ),
     # Por defecto, requerimos que el usuario esté autenticado para acceder a cualquier endpoint.
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # Paginación por cursor (keyset) para las listas de clientes, proyectos y tareas.
+    # Se activa con ?page_size=N en la petición; si se define API_PAGE_SIZE en el .env,
+    # todas las listas se paginan por defecto con ese tamaño.
+    'DEFAULT_PAGINATION_CLASS': 'portal_sandoval_project.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE')) if os.getenv('API_PAGE_SIZE') else None,
 }
 
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'portal_sandoval_project.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'portal_sandoval_project.authentication.ClaimsTokenRefreshSerializer',
+}
+# Segundos que cada proceso confía en la versión de los tokens de un usuario sin
+# releerla: es lo que tarda como mucho un token revocado en dejar de valer.
+JWT_USER_CACHE_TTL = int(os.getenv('JWT_USER_CACHE_TTL', 30))
+# Segundos que cada proceso usa su copia de la configuración de la aplicación sin
+# comprobar si cambió (ver AppConfiguration.get_config).
+APP_CONFIG_CACHE_TTL = float(os.getenv('APP_CONFIG_CACHE_TTL', 5))
+
 ROOT_URLCONF = 'portal_sandoval_project.urls'
 
 TEMPLATES = [
@@ -155,10 +178,95 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': 'db',  # IMPORTANTE: 'db' es el nombre del servicio de la BD en docker-compose.yml
         'PORT': 5432,
+        # Conexiones persistentes: cada worker reutiliza su conexión durante
+        # DB_CONN_MAX_AGE segundos en lugar de abrir una nueva por petición.
+        # Con CONN_HEALTH_CHECKS Django comprueba que siga viva antes de reutilizarla.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Caché
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+#
+# Por defecto usamos la caché en memoria del proceso (no necesita ningún servicio),
+# válida solo con un único proceso (runserver, tests). Si se define DJANGO_CACHE_DIR
+# se usa una caché en archivos en ese directorio, compartida por todos los procesos
+# que lo vean. gunicorn.conf.py lo define siempre que haya más de un worker, y
+# docker-compose.production.yml lo monta en un volumen común al backend y al worker.
+if os.getenv('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('DJANGO_CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'portal-sandoval',
+        }
+    }
+
+# Segundos que se conserva cada respuesta cacheada del panel administrativo.
+# Las ediciones de clientes, proyectos y tareas la invalidan antes (ver projects/metrics_cache.py).
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 3600))
+
+# Días que se conservan las marcas de borrado del feed de cambios (dashboard/changes/).
+# Un frontend que lleve más tiempo sin sincronizar recibe 410 y recarga todo.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Trabajos en segundo plano (ver jobs/queue.py).
+# - 'inline': se ejecutan en el mismo proceso al terminar la petición (desarrollo y tests).
+# - 'queue': los ejecuta el worker `python manage.py run_jobs` (producción).
+JOBS_MODE = os.getenv('JOBS_MODE', 'inline')
+JOBS_WORKER_THREADS = int(os.getenv('JOBS_WORKER_THREADS', 4))
+JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', 1))
+# Segundos tras los que un trabajo en ejecución se da por perdido (el worker murió).
+JOBS_LOCK_TIMEOUT = int(os.getenv('JOBS_LOCK_TIMEOUT', 600))
+# Espera antes del primer reintento; se duplica en cada intento.
+JOBS_RETRY_BASE_DELAY = int(os.getenv('JOBS_RETRY_BASE_DELAY', 30))
+# Días que se conservan los trabajos terminados (limpiar con `manage.py prune_jobs`).
+JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', 7))
+# Recalcular en segundo plano las métricas del panel tras cada cambio, para que la
+# siguiente visita las encuentre en caché. Por defecto solo con el worker activo y la
+# caché en archivos (DJANGO_CACHE_DIR), que el worker comparte con gunicorn.
+DASHBOARD_CACHE_WARMUP = os.getenv(
+    'DASHBOARD_CACHE_WARMUP', str(JOBS_MODE == 'queue' and bool(os.getenv('DJANGO_CACHE_DIR')))
+) == 'True'
+
+# Métricas por endpoint en /api/v1/metrics/ (formato Prometheus, ver instrumentation.py).
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'True') == 'True'
+REQUEST_METRICS_PREFIX = 'portal'
+# Directorio donde cada worker de gunicorn guarda sus métricas para sumarlas todas
+# (mejor en memoria, p. ej. /dev/shm/portal-metrics). Vacío: solo las del proceso.
+REQUEST_METRICS_DIR = os.getenv('REQUEST_METRICS_DIR', '')
+REQUEST_METRICS_FLUSH_INTERVAL = float(os.getenv('REQUEST_METRICS_FLUSH_INTERVAL', 5))
+# Token para que Prometheus lea las métricas sin usuario (Authorization: Bearer <token>).
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Añadir la cabecera Server-Timing (tiempo total y de base de datos) a cada respuesta.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
+# Detector de consultas repetidas (N+1) y lentas (ver query_inspector.py). Por defecto
+# solo con DEBUG: en producción añade trabajo a cada consulta y se activa desde el .env.
+QUERY_INSPECTOR_ENABLED = os.getenv('QUERY_INSPECTOR_ENABLED', str(DEBUG)) == 'True'
+# Veces que una misma forma de consulta puede repetirse en una petición antes de avisar.
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 500))
+# Guardar el plan (EXPLAIN ANALYZE) de las lecturas lentas, como mucho una vez cada
+# QUERY_EXPLAIN_INTERVAL segundos por forma de consulta. ANALYZE vuelve a ejecutar la
+# consulta lenta, así que también es solo con DEBUG salvo que se active en el .env.
+QUERY_EXPLAIN_SLOW = os.getenv('QUERY_EXPLAIN_SLOW', str(DEBUG)) == 'True'
+QUERY_EXPLAIN_INTERVAL = int(os.getenv('QUERY_EXPLAIN_INTERVAL', 300))
+
+# Perfilado de una petición con ?__profile=cpu|pstats|flame|sql (ver profiling.py).
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.001))
+PROFILE_TOP_FUNCTIONS = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -203,6 +311,24 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Entrega de adjuntos (ver portal_sandoval_project/downloads.py). Django comprueba los
+# permisos y delega la transferencia al proxy:
+# - 'x-accel-redirect': nginx sirve el archivo desde la location interna MEDIA_ACCEL_REDIRECT_PREFIX.
+# - 'x-sendfile': Apache (mod_xsendfile) o lighttpd, con la ruta absoluta del archivo.
+# - vacío: lo envía Django con FileResponse (admite Range y usa sendfile con gunicorn).
+MEDIA_SENDFILE_BACKEND = os.getenv('MEDIA_SENDFILE_BACKEND', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+# Segundos de validez de los enlaces firmados de descarga (files/<tipo>/<id>/link/).
+MEDIA_DOWNLOAD_LINK_MAX_AGE = int(os.getenv('MEDIA_DOWNLOAD_LINK_MAX_AGE', 3600))
+
+# Subidas de adjuntos por partes (ver portal_sandoval_project/uploads.py). Los temporales
+# van dentro de MEDIA_ROOT para que al terminar el archivo se mueva sin copiarlo.
+CHUNKED_UPLOAD_DIR = 'uploads_tmp'
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 4 * 1024 * 1024 * 1024))
+# Horas sin recibir partes tras las que `manage.py prune_uploads` borra la subida.
+CHUNKED_UPLOAD_EXPIRATION_HOURS = int(os.getenv('CHUNKED_UPLOAD_EXPIRATION_HOURS', 24))
+
 
 
 # Default primary key field type
@@ -0,0 +1,186 @@
+"""
+Almacenamiento de adjuntos direccionado por contenido, sin duplicados.
+
+Los clientes suelen adjuntar el mismo folleto o PDF de especificaciones a muchas
+tareas y proyectos, y cada subida escribía una copia nueva. ContentAddressedStorage
+guarda cada archivo en `<upload_to>/<hh>/<sha256>/<nombre original>`:
+
+- Si ya existe ese mismo contenido con el mismo nombre, no se escribe nada: el
+  adjunto nuevo apunta al archivo existente.
+- Si existe con otro nombre, o en la carpeta de adjuntos del otro modelo, se crea un
+  enlace duro (hard link): el nombre original se conserva para la descarga, pero los
+  bytes están una sola vez en disco.
+
+Como varios objetos pueden compartir un archivo, nunca se borra al cambiar un
+adjunto: `manage.py gc_attachments` cuenta las referencias desde Task.attachment y
+Project.attachment y borra los archivos sin ninguna (ver attachment_references()).
+"""
+import hashlib
+import os
+import posixpath
+import time
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Count
+
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def content_hash(content):
+    """SHA-256 del contenido de un File, leído por bloques."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_BLOCK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage que nombra los archivos por el hash de su contenido y no los duplica."""
+
+    def content_name(self, name, digest, max_length=None):
+        """`<carpeta>/<hh>/<hash>/<nombre>`, acortando el nombre si no cabe en `max_length`."""
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        prefix = posixpath.join(directory, digest[:2], digest) + '/'
+        if max_length is not None and len(prefix) + len(filename) > max_length:
+            root, ext = posixpath.splitext(filename)
+            keep = max(max_length - len(prefix) - len(ext), 1)
+            filename = root[:keep] + ext
+        return prefix + filename
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = content_hash(content)
+        name = self.content_name(name, digest, max_length)
+        if self.exists(name):
+            self._touch(name)
+            return name
+        if self._link_duplicate(name, digest):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def _touch(self, name):
+        """
+        Marca como recién usado un archivo que se reutiliza: utime() actualiza su
+        st_ctime, así collect_garbage no lo borra aunque fuera huérfano hasta ahora.
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def _find_duplicate(self, digest):
+        """Ruta de un archivo ya guardado con ese hash, en cualquier carpeta de adjuntos."""
+        for directory in attachment_directories():
+            try:
+                with os.scandir(self.path(posixpath.join(directory, digest[:2], digest))) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            return entry.path
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _link_duplicate(self, name, digest):
+        """Enlaza `name` a un archivo con el mismo contenido si existe. Devuelve si lo hizo."""
+        existing = self._find_duplicate(digest)
+        if existing is None:
+            return False
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(existing, path)
+        except FileExistsError:
+            self._touch(name)
+            return True
+        except OSError:
+            # Sistema de archivos sin enlaces duros: se guarda una copia normal.
+            return False
+        return True
+
+
+def attachment_storage():
+    """Almacenamiento de Task.attachment y Project.attachment (referenciado en las migraciones)."""
+    return ContentAddressedStorage()
+
+
+def attachment_references():
+    """
+    Cuenta cuántas tareas y proyectos usan cada archivo: {nombre: referencias}.
+    Un archivo del almacenamiento sin entrada aquí es huérfano.
+    """
+    from projects.models import Project
+    from tasks.models import Task
+
+    references = {}
+    for model in (Task, Project):
+        rows = (
+            model.objects.exclude(attachment='').exclude(attachment__isnull=True)
+            .order_by().values_list('attachment').annotate(count=Count('pk'))
+        )
+        for name, count in rows:
+            references[name] = references.get(name, 0) + count
+    return references
+
+
+def is_referenced(name):
+    """Si alguna tarea o proyecto usa el archivo `name`."""
+    from projects.models import Project
+    from tasks.models import Task
+
+    return any(model.objects.filter(attachment=name).exists() for model in (Task, Project))
+
+
+def attachment_directories():
+    """Carpetas de los adjuntos dentro del almacenamiento (el upload_to de cada campo)."""
+    from projects.models import Project
+    from tasks.models import Task
+
+    return [model._meta.get_field('attachment').upload_to.strip('/') for model in (Task, Project)]
+
+
+def collect_garbage(storage=None, min_age=timedelta(hours=1), dry_run=False, now=None):
+    """
+    Borra los archivos de adjuntos que ningún objeto referencia. Devuelve
+    (archivos borrados, bytes liberados); un enlace duro solo libera espacio si es
+    el último nombre del archivo.
+
+    Solo se borran archivos cuyo inodo no cambió en `min_age` (st_ctime también
+    cambia al crear un enlace o al reutilizar el archivo), para no tocar uno recién
+    guardado cuyo objeto aún no se ha confirmado en la base de datos. Justo antes de
+    borrar cada uno se vuelven a comprobar su st_ctime y sus referencias.
+    """
+    storage = storage or attachment_storage()
+    references = attachment_references()
+    cutoff = (now or time.time()) - min_age.total_seconds()
+    removed, freed = 0, 0
+    for directory in attachment_directories():
+        root = storage.path(directory)
+        for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                stat = os.stat(path)
+                if name in references or stat.st_ctime > cutoff:
+                    continue
+                if not dry_run:
+                    # Las referencias se leyeron al empezar: una subida reutilizó el
+                    # archivo después (lo toca, ver save()) o ya confirmó su objeto.
+                    stat = os.stat(path)
+                    if stat.st_ctime > cutoff or is_referenced(name):
+                        continue
+                    os.remove(path)
+                removed += 1
+                if stat.st_nlink == 1:
+                    freed += stat.st_size
+            if not dry_run and dirpath != root:
+                try:
+                    os.rmdir(dirpath)  # Solo si quedó vacía.
+                except OSError:
+                    pass
+    return removed, freed
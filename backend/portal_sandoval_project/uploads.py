@@ -0,0 +1,230 @@
+"""
+Subida de adjuntos por partes, reanudable.
+
+Subir un archivo grande en un solo multipart ocupa un worker todo el tiempo y, si la
+conexión se corta, hay que empezar de cero. Con este protocolo el archivo se envía en
+partes que se escriben directamente en un archivo temporal (la memoria usada no
+depende del tamaño) y una subida interrumpida continúa desde el último byte recibido:
+
+1. POST /api/v1/uploads/ con {"target": "task"|"project", "object_id", "filename",
+   "size", "sha256" (opcional)} -> 201 con el `id` de la subida y `offset` 0.
+2. PUT /api/v1/uploads/<id>/ con los bytes de la parte en el cuerpo y la cabecera
+   `Upload-Offset` (posición de la parte). Devuelve el nuevo `offset`. Si el offset no
+   coincide con lo recibido se responde 409 con el `offset` correcto.
+   GET /api/v1/uploads/<id>/ devuelve el `offset` para reanudar tras un corte.
+3. POST /api/v1/uploads/<id>/complete/ (con "sha256" si no se envió al principio):
+   comprueba tamaño y checksum y asigna el archivo al `attachment` de la tarea o
+   proyecto de una vez (en el mismo sistema de archivos es un simple rename) y
+   devuelve la tarea o proyecto actualizado.
+
+DELETE /api/v1/uploads/<id>/ cancela la subida. Las subidas abandonadas se borran con
+`manage.py prune_uploads` (ver CHUNKED_UPLOAD_EXPIRATION_HOURS).
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from projects.models import ChunkedUpload
+from projects.serializers import ProjectSerializer
+from tasks.serializers import TaskSerializer
+from .downloads import DOWNLOADS, get_file_object
+
+READ_BLOCK_SIZE = 64 * 1024
+TARGET_SERIALIZERS = {
+    'task': TaskSerializer,
+    'project': ProjectSerializer,
+}
+
+
+class UploadedTempFile(File):
+    """Archivo temporal ya completo; FileSystemStorage lo mueve en lugar de copiarlo."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_dir():
+    return os.path.join(settings.MEDIA_ROOT, settings.CHUNKED_UPLOAD_DIR)
+
+
+def temp_path(upload):
+    return os.path.join(upload_dir(), f'{upload.pk}.part')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discard(upload):
+    """Borra la subida y su archivo temporal."""
+    try:
+        os.remove(temp_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def prune_uploads(now=None):
+    """Borra las subidas sin partes nuevas desde hace más de CHUNKED_UPLOAD_EXPIRATION_HOURS."""
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRATION_HOURS)
+    expired = list(ChunkedUpload.objects.filter(updated_at__lt=cutoff))
+    for upload in expired:
+        discard(upload)
+    return len(expired)
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    target = serializers.ChoiceField(choices=list(DOWNLOADS))
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'target', 'object_id', 'filename', 'size', 'offset', 'sha256', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+
+    def validate_filename(self, value):
+        # Solo el nombre: la carpeta la decide el upload_to del campo.
+        name = os.path.basename(value.replace('\\', '/'))
+        if not name:
+            raise serializers.ValidationError('Nombre de archivo no válido.')
+        return name
+
+    def validate_size(self, value):
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'El archivo supera el tamaño máximo ({settings.CHUNKED_UPLOAD_MAX_SIZE} bytes).'
+            )
+        return value
+
+    def validate_sha256(self, value):
+        return value.lower()
+
+
+def _get_upload(request, upload_id):
+    return get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+
+
+@api_view(['POST'])
+def upload_start(request):
+    """Crea una subida por partes para el adjunto de una tarea o proyecto."""
+    serializer = ChunkedUploadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    get_file_object(serializer.validated_data['target'], serializer.validated_data['object_id'], request.user)
+
+    upload = serializer.save(user=request.user)
+    os.makedirs(upload_dir(), exist_ok=True)
+    open(temp_path(upload), 'wb').close()
+    data = dict(serializer.data, chunk_size=settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+def _write_chunk(request, upload, offset, length):
+    """
+    Copia el cuerpo de la petición al archivo temporal desde `offset`, por bloques.
+    Devuelve los bytes escritos, que son menos de `length` si la conexión se cortó.
+    """
+    written = 0
+    stream = request.stream
+    with open(temp_path(upload), 'r+b') as file:
+        file.seek(offset)
+        while written < length:
+            try:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+            except OSError:
+                # El cliente cortó la conexión (UnreadablePostError es un OSError).
+                break
+            if not block:
+                break
+            file.write(block)
+            written += len(block)
+    return written
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+def upload_detail(request, upload_id):
+    """
+    GET: estado de la subida (`offset` recibido). PUT: añade una parte.
+    DELETE: cancela la subida.
+    """
+    upload = _get_upload(request, upload_id)
+    if request.method == 'GET':
+        return Response(ChunkedUploadSerializer(upload).data)
+    if request.method == 'DELETE':
+        discard(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return Response({"error": "Falta la cabecera 'Upload-Offset'."}, status=status.HTTP_400_BAD_REQUEST)
+    if offset != upload.offset:
+        return Response(
+            {"error": "La parte no empieza donde terminó la anterior.", "offset": upload.offset},
+            status=status.HTTP_409_CONFLICT
+        )
+    length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE or offset + length > upload.size:
+        return Response(
+            {"error": "La parte es demasiado grande.", "offset": upload.offset},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    written = _write_chunk(request, upload, offset, length)
+    # Lo escrito cuenta aunque la parte llegue incompleta: se reanuda desde ahí.
+    # La condición sobre offset evita que dos envíos simultáneos avancen a la vez.
+    if written:
+        ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(
+            offset=offset + written, updated_at=timezone.now()
+        )
+    upload.refresh_from_db(fields=['offset'])
+    data = {'id': upload.pk, 'offset': upload.offset, 'size': upload.size}
+    if written < length:
+        data['error'] = 'La parte llegó incompleta; continúe desde `offset`.'
+        return Response(data, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data)
+
+
+@api_view(['POST'])
+def upload_complete(request, upload_id):
+    """Comprueba la subida y la asigna como adjunto de la tarea o proyecto."""
+    upload = _get_upload(request, upload_id)
+    if upload.offset != upload.size:
+        return Response(
+            {"error": "Faltan partes por subir.", "offset": upload.offset, "size": upload.size},
+            status=status.HTTP_409_CONFLICT
+        )
+    expected = (request.data.get('sha256') or upload.sha256).lower()
+    path = temp_path(upload)
+    if expected and file_sha256(path) != expected:
+        # El contenido no es el esperado: se descarta para empezar de nuevo.
+        discard(upload)
+        return Response(
+            {"error": "El checksum no coincide; la subida se ha descartado."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    instance = get_file_object(upload.target, upload.object_id, request.user)
+    with transaction.atomic():
+        instance = type(instance).objects.select_for_update().get(pk=instance.pk)
+        with open(path, 'rb') as file:
+            instance.attachment.save(upload.filename, UploadedTempFile(file), save=False)
+        instance.save()
+        upload.delete()
+    if os.path.exists(path):
+        # Almacenamientos que copian en lugar de mover dejan el temporal.
+        os.remove(path)
+    serializer_class = TARGET_SERIALIZERS[upload.target]
+    return Response(serializer_class(instance, context={'request': request}).data)
@@ -24,6 +24,11 @@ from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
 from .api_root import api_root
+from .bootstrap import dashboard_bootstrap, dashboard_changes
+from .downloads import attachment_download, attachment_link, favicon
+from .instrumentation import metrics
+from .uploads import upload_start, upload_detail, upload_complete
+from clients.forms import QueuedPasswordResetForm
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -35,13 +40,29 @@ urlpatterns = [
     path('api/v1/', include('clients.urls')),
     path('api/v1/', include('projects.urls')),
     path('api/v1/', include('tasks.urls')),
+    path('api/v1/', include('jobs.urls')),
+    # Carga inicial del Dashboard (clientes, proyectos y tareas en una sola respuesta)
+    path('api/v1/dashboard/bootstrap/', dashboard_bootstrap, name='dashboard-bootstrap'),
+    # Cambios desde la última carga (para actualizar el Dashboard sin recargar todo)
+    path('api/v1/dashboard/changes/', dashboard_changes, name='dashboard-changes'),
+    # Descarga de adjuntos (con permisos) y favicon
+    path('api/v1/files/favicon/', favicon, name='file-favicon'),
+    path('api/v1/files/<str:kind>/<int:pk>/', attachment_download, name='file-download'),
+    path('api/v1/files/<str:kind>/<int:pk>/link/', attachment_link, name='file-link'),
+    # Subida de adjuntos por partes (reanudable)
+    path('api/v1/uploads/', upload_start, name='upload-start'),
+    path('api/v1/uploads/<uuid:upload_id>/', upload_detail, name='upload-detail'),
+    path('api/v1/uploads/<uuid:upload_id>/complete/', upload_complete, name='upload-complete'),
     
+    # Métricas de rendimiento por endpoint (Prometheus)
+    path('api/v1/metrics/', metrics, name='metrics'),
+
     # --- Rutas para la autenticación por Token ---
     path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'), # Para obtener el token (login)
     path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'), # Para refrescar un token expirado
 
     # --- Rutas para recuperación de contraseñas ---
-    path('password-reset/', auth_views.PasswordResetView.as_view(template_name='password_reset_form.html'), name='password_reset'),
+    path('password-reset/', auth_views.PasswordResetView.as_view(template_name='password_reset_form.html', form_class=QueuedPasswordResetForm), name='password_reset'),
     path('password-reset/done/', auth_views.PasswordResetDoneView.as_view(template_name='password_reset_done.html'), name='password_reset_done'),
     path('reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(template_name='password_reset_confirm.html'), name='password_reset_confirm'),
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(template_name='password_reset_complete.html'), name='password_reset_complete'),
@@ -2,141 +2,163 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Sum, Count, Case, When, IntegerField, F, Q, Avg
-from django.db.models.functions import TruncMonth, TruncWeek, TruncDay
+from django.db.models import Sum, Count, F, Q, Value, DecimalField
+from django.db.models.functions import TruncMonth, TruncWeek, TruncDay, Coalesce
 from decimal import Decimal
 
+from . import exports, metrics_cache
 from .models import Project
 from tasks.models import Task
 from clients.models import Client
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from django.utils import timezone
 
-@api_view(['GET'])
-@permission_classes([IsAdminUser])
-def admin_dashboard_metrics(request):
+ZERO = Decimal('0.00')
+TOP_PROJECTS_LIMIT = 10
+
+
+def _zero_if_null(expression):
+    """Envuelve una expresión de suma para que devuelva 0.00 en lugar de NULL."""
+    return Coalesce(expression, Value(ZERO), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def period_bounds(start_date, end_date):
     """
-    Endpoint exclusivo para administradores que proporciona métricas financieras
-    y de tareas para el panel administrativo.
-    
-    Parámetros de consulta:
-    - start_date (YYYY-MM-DD): Fecha de inicio del período a analizar
-    - end_date (YYYY-MM-DD): Fecha de fin del período a analizar
-    - client_id (int, opcional): ID del cliente para filtrar los datos
-    - time_grouping (string, opcional): Agrupación temporal ('day', 'week', 'month'). Por defecto: 'month'
-    
-    Retorna:
-    - Métricas globales del período
-    - Datos para gráficos de tendencias
-    - Análisis por cliente
+    Convierte el período [start_date, end_date] (fechas inclusivas) en el rango
+    semiabierto de datetimes [inicio, fin) en la zona horaria actual.
+
+    Filtrar con `created_at__gte` / `created_at__lt` en lugar de `created_at__date`
+    evita convertir cada fila a fecha, de modo que la base de datos puede usar los
+    índices sobre created_at. Si alguna de las fechas es None, ese extremo también
+    lo es (período sin límite por ese lado).
+    """
+    start = end = None
+    if start_date is not None:
+        start = timezone.make_aware(datetime.combine(start_date, time.min))
+    if end_date is not None:
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    return start, end
+
+
+def parse_period_params(params, default_days=365):
+    """
+    Lee `start_date` y `end_date` (YYYY-MM-DD) de los parámetros de consulta.
+
+    Si falta alguna se usan los valores por defecto del panel: `default_days` días
+    atrás y hoy. Con `default_days=None` una fecha ausente queda como None (sin
+    límite por ese lado). Lanza ValueError si alguna fecha no tiene el formato correcto.
+    """
+    today = timezone.now().date()
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+
+    if start_date:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    elif default_days is not None:
+        start_date = today - timedelta(days=default_days)
+    else:
+        start_date = None
+
+    if end_date:
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    elif default_days is not None:
+        end_date = today
+    else:
+        end_date = None
+    return start_date, end_date
+
+
+def _invalid_date_response():
+    return Response(
+        {"error": "Formato de fecha inválido. Use YYYY-MM-DD."},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _client_not_found_response(client_id):
+    return Response(
+        {"error": f"Cliente con ID {client_id} no encontrado."},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+def build_dashboard_metrics(start_date, end_date, client=None, time_grouping='month'):
+    """
+    Calcula todas las métricas del panel administrativo para el período indicado.
+
+    Cada bloque de la respuesta sale de una única consulta agrupada o con agregados
+    condicionales, por lo que el número de consultas es fijo sin importar cuántos
+    clientes, proyectos o tareas haya en el período.
     """
-    # Obtener parámetros de consulta
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    client_id = request.query_params.get('client_id')
-    time_grouping = request.query_params.get('time_grouping', 'month')
-    
-    # Validar fechas
-    try:
-        if start_date:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        else:
-            # Por defecto, un año atrás
-            start_date = timezone.now().date() - timedelta(days=365)
-            
-        if end_date:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        else:
-            # Por defecto, hoy
-            end_date = timezone.now().date()
-    except ValueError:
-        return Response(
-            {"error": "Formato de fecha inválido. Use YYYY-MM-DD."},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    
     # Construir filtros base para proyectos y tareas
-    project_filters = Q(created_at__date__gte=start_date, created_at__date__lte=end_date)
-    task_filters = Q(created_at__date__gte=start_date, created_at__date__lte=end_date)
-    
-    # Filtrar por cliente si se especifica
-    if client_id:
-        try:
-            client = Client.objects.get(pk=client_id)
-            project_filters &= Q(client=client)
-            task_filters &= Q(project__client=client)
-        except Client.DoesNotExist:
-            return Response(
-                {"error": f"Cliente con ID {client_id} no encontrado."},
-                status=status.HTTP_404_NOT_FOUND
-            )
-    
-    # Obtener proyectos y tareas filtrados
-    projects = Project.objects.filter(project_filters)
-    tasks = Task.objects.filter(task_filters)
-    
+    period_start, period_end = period_bounds(start_date, end_date)
+    project_filters = Q(created_at__gte=period_start, created_at__lt=period_end)
+    task_filters = Q(created_at__gte=period_start, created_at__lt=period_end)
+    if client is not None:
+        project_filters &= Q(client=client)
+        task_filters &= Q(project__client=client)
+
+    # Obtener proyectos y tareas filtrados. Quitamos cualquier orden para que las
+    # agrupaciones (GROUP BY) no incluyan columnas extra.
+    projects = Project.objects.filter(project_filters).order_by()
+    tasks = Task.objects.filter(task_filters).order_by()
+
     # === MÉTRICAS GLOBALES ===
-    # Cálculo de métricas de proyectos
-    total_projects = projects.count()
-    total_initial_cost = projects.aggregate(total=Sum('initial_cost'))['total'] or Decimal('0.00')
-    
-    # Cálculo de métricas de tareas
-    total_tasks = tasks.count()
-    total_task_cost = tasks.aggregate(total=Sum('cost'))['total'] or Decimal('0.00')
-    
-    # Métricas de tareas por estado
-    task_status_counts = tasks.values('status').annotate(count=Count('id'))
+    project_totals = projects.aggregate(
+        total_projects=Count('id'),
+        total_initial_cost=_zero_if_null(Sum('initial_cost')),
+    )
+    task_totals = tasks.aggregate(
+        total_tasks=Count('id'),
+        total_task_cost=_zero_if_null(Sum('cost')),
+        tasks_with_cost=Count('id', filter=Q(cost__gt=0)),
+        tasks_without_cost=Count('id', filter=Q(cost=0)),
+    )
+    total_initial_cost = project_totals['total_initial_cost']
+    total_task_cost = task_totals['total_task_cost']
+
+    # Métricas de tareas y proyectos por estado
     task_status_data = {
-        status_dict['status']: status_dict['count']
-        for status_dict in task_status_counts
+        row['status']: row['count']
+        for row in tasks.values('status').annotate(count=Count('id'))
     }
-    
-    # Métricas de proyectos por estado
-    project_status_counts = projects.values('status').annotate(count=Count('id'))
     project_status_data = {
-        status_dict['status']: status_dict['count'] 
-        for status_dict in project_status_counts
+        row['status']: row['count']
+        for row in projects.values('status').annotate(count=Count('id'))
     }
-    
-    # Análisis de tareas con y sin coste
-    tasks_with_cost = tasks.filter(cost__gt=0).count()
-    tasks_without_cost = tasks.filter(cost=0).count()
-    
+
     # === ANÁLISIS POR CLIENTE ===
+    # Una consulta agrupada para los proyectos y otra para las tareas de cada cliente.
+    # Solo se listan los clientes con proyectos en el período; sus tareas son las del
+    # período aunque pertenezcan a proyectos creados antes.
     client_metrics = []
-    
-    # Si no se filtró por un cliente específico, obtener datos para todos los clientes
-    if not client_id:
-        clients = Client.objects.filter(
-            projects__in=projects
-        ).distinct()
-        
-        for client in clients:
-            client_projects = projects.filter(client=client)
-            client_tasks = tasks.filter(project__client=client)
-            
-            # Costes iniciales y de tareas para este cliente
-            client_initial_cost = client_projects.aggregate(total=Sum('initial_cost'))['total'] or Decimal('0.00')
-            client_task_cost = client_tasks.aggregate(total=Sum('cost'))['total'] or Decimal('0.00')
-            client_total_cost = client_initial_cost + client_task_cost
-            
-            # Contar tareas completadas para este cliente
-            client_completed_tasks = client_tasks.filter(status='COMPLETADA').count()
-            
-            # Datos para este cliente
-            client_data = {
-                'id': client.id,
-                'name': client.business_name,
-                'project_count': client_projects.count(),
-                'task_count': client_tasks.count(),
-                'completed_tasks': client_completed_tasks,
-                'initial_cost': float(client_initial_cost),
+    if client is None:
+        client_projects = projects.values('client', 'client__business_name').annotate(
+            project_count=Count('id'),
+            initial_cost=_zero_if_null(Sum('initial_cost')),
+        ).order_by('client')
+        client_tasks = {
+            row['project__client']: row
+            for row in tasks.values('project__client').annotate(
+                task_count=Count('id'),
+                completed_tasks=Count('id', filter=Q(status='COMPLETADA')),
+                task_cost=_zero_if_null(Sum('cost')),
+            )
+        }
+        for row in client_projects:
+            task_row = client_tasks.get(row['client'], {})
+            client_task_cost = task_row.get('task_cost', ZERO)
+            client_metrics.append({
+                'id': row['client'],
+                'name': row['client__business_name'],
+                'project_count': row['project_count'],
+                'task_count': task_row.get('task_count', 0),
+                'completed_tasks': task_row.get('completed_tasks', 0),
+                'initial_cost': float(row['initial_cost']),
                 'task_cost': float(client_task_cost),
-                'total_cost': float(client_total_cost)
-            }
-            
-            client_metrics.append(client_data)
-    
+                'total_cost': float(row['initial_cost'] + client_task_cost)
+            })
+
     # === DATOS PARA GRÁFICOS DE TENDENCIAS ===
     # Determinar la función de truncamiento según la agrupación temporal
     if time_grouping == 'day':
@@ -145,14 +167,14 @@ def admin_dashboard_metrics(request):
         trunc_func = TruncWeek('created_at')
     else:  # Por defecto, mes
         trunc_func = TruncMonth('created_at')
-    
+
     # Tendencia de costes de tareas a lo largo del tiempo
     task_cost_trend = tasks.annotate(
         period=trunc_func
     ).values('period').annotate(
         total_cost=Sum('cost')
     ).order_by('period')
-    
+
     # Tendencia de creación de proyectos
     project_creation_trend = projects.annotate(
         period=trunc_func
@@ -160,8 +182,7 @@ def admin_dashboard_metrics(request):
         count=Count('id'),
         total_cost=Sum('initial_cost')
     ).order_by('period')
-    
-    # Preparar datos de tendencias para el frontend
+
     task_cost_trend_data = [
         {
             'period': item['period'].strftime('%Y-%m-%d'),
@@ -169,7 +190,7 @@ def admin_dashboard_metrics(request):
         }
         for item in task_cost_trend
     ]
-    
+
     project_trend_data = [
         {
             'period': item['period'].strftime('%Y-%m-%d'),
@@ -178,44 +199,45 @@ def admin_dashboard_metrics(request):
         }
         for item in project_creation_trend
     ]
-    
+
     # === PROYECTOS MÁS COSTOSOS ===
-    # Calcular coste total para cada proyecto (inicial + tareas)
-    top_projects = []
-    for project in projects:
-        project_task_cost = Task.objects.filter(
-            project=project, 
-            created_at__date__gte=start_date, 
-            created_at__date__lte=end_date
-        ).aggregate(total=Sum('cost'))['total'] or Decimal('0.00')
-        
-        # Manejo seguro para evitar error de tipo cuando initial_cost es None
-        initial_cost = project.initial_cost if project.initial_cost is not None else Decimal('0.00')
-        total_project_cost = initial_cost + project_task_cost
-        
-        top_projects.append({
-            'id': project.id,
-            'name': project.name,
-            'client': project.client.business_name,
-            'initial_cost': float(initial_cost),  # Usamos la variable initial_cost ya verificada
-            'task_cost': float(project_task_cost),
-            'total_cost': float(total_project_cost),
-            'status': project.status
-        })
-    
-    # Ordenar proyectos por coste total descendente
-    top_projects = sorted(top_projects, key=lambda x: x['total_cost'], reverse=True)[:10]
-    
+    # El coste total (inicial + tareas creadas en el período) se calcula, ordena y
+    # limita en la base de datos; solo viajan las filas del top.
+    top_project_rows = projects.annotate(
+        initial_cost_value=_zero_if_null(F('initial_cost')),
+        task_cost=_zero_if_null(Sum(
+            'tasks__cost',
+            filter=Q(tasks__created_at__gte=period_start, tasks__created_at__lt=period_end)
+        )),
+    ).annotate(
+        total_cost=F('initial_cost_value') + F('task_cost'),
+    ).order_by('-total_cost', 'id').values(
+        'id', 'name', 'client__business_name', 'initial_cost_value', 'task_cost', 'total_cost', 'status'
+    )[:TOP_PROJECTS_LIMIT]
+
+    top_projects = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'client': row['client__business_name'],
+            'initial_cost': float(row['initial_cost_value']),
+            'task_cost': float(row['task_cost']),
+            'total_cost': float(row['total_cost']),
+            'status': row['status']
+        }
+        for row in top_project_rows
+    ]
+
     # === CONSTRUIR RESPUESTA FINAL ===
-    response_data = {
+    return {
         'global_metrics': {
-            'total_projects': total_projects,
-            'total_tasks': total_tasks,
+            'total_projects': project_totals['total_projects'],
+            'total_tasks': task_totals['total_tasks'],
             'total_initial_cost': float(total_initial_cost),
             'total_task_cost': float(total_task_cost),
             'total_cost': float(total_initial_cost + total_task_cost),
-            'tasks_with_cost': tasks_with_cost,
-            'tasks_without_cost': tasks_without_cost,
+            'tasks_with_cost': task_totals['tasks_with_cost'],
+            'tasks_without_cost': task_totals['tasks_without_cost'],
             'filter_period': {
                 'start_date': start_date.strftime('%Y-%m-%d'),
                 'end_date': end_date.strftime('%Y-%m-%d')
@@ -230,5 +252,102 @@ def admin_dashboard_metrics(request):
         },
         'top_projects': top_projects
     }
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_dashboard_metrics(request):
+    """
+    Endpoint exclusivo para administradores que proporciona métricas financieras
+    y de tareas para el panel administrativo.
     
-    return Response(response_data)
+    Parámetros de consulta:
+    - start_date (YYYY-MM-DD): Fecha de inicio del período a analizar
+    - end_date (YYYY-MM-DD): Fecha de fin del período a analizar
+    - client_id (int, opcional): ID del cliente para filtrar los datos
+    - time_grouping (string, opcional): Agrupación temporal ('day', 'week', 'month'). Por defecto: 'month'
+    
+    Retorna:
+    - Métricas globales del período
+    - Datos para gráficos de tendencias
+    - Análisis por cliente
+    """
+    # Obtener parámetros de consulta
+    client_id = request.query_params.get('client_id')
+    time_grouping = request.query_params.get('time_grouping', 'month')
+
+    # Validar fechas (por defecto, el último año hasta hoy)
+    try:
+        start_date, end_date = parse_period_params(request.query_params)
+    except ValueError:
+        return _invalid_date_response()
+
+
+    if time_grouping not in ('day', 'week', 'month'):
+        time_grouping = 'month'
+
+    # Si ya calculamos estas métricas y los datos no cambiaron desde entonces,
+    # devolvemos la respuesta cacheada sin tocar la base de datos.
+    response_data, cache_key = metrics_cache.get_cached_metrics(start_date, end_date, client_id, time_grouping)
+    if response_data is not None:
+        return Response(response_data, headers={'X-Cache': 'HIT'})
+
+    # Filtrar por cliente si se especifica
+    client = None
+    if client_id:
+        try:
+            client = Client.objects.get(pk=client_id)
+        except (Client.DoesNotExist, ValueError):
+            return _client_not_found_response(client_id)
+
+    response_data = build_dashboard_metrics(start_date, end_date, client, time_grouping)
+    metrics_cache.store_metrics(cache_key, response_data)
+
+    return Response(response_data, headers={'X-Cache': 'MISS'})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_dashboard_cache_stats(request):
+    """
+    Estadísticas de la caché de métricas del panel: aciertos, fallos y versión
+    actual de los datos. Los contadores son por backend de caché (por proceso con locmem).
+    """
+    return Response(metrics_cache.get_cache_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def admin_export(request, resource, file_format):
+    """
+    Exportación completa en streaming para contabilidad.
+
+    URL: admin/exports/<resource>.<formato>, donde resource es 'tasks', 'projects'
+    o 'clients' (informe de costes por cliente) y formato es 'csv' o 'ndjson'.
+
+    Acepta los mismos filtros que admin_dashboard_metrics (start_date, end_date,
+    client_id), pero sin fechas exporta todo el histórico. Las filas se generan
+    con un cursor a medida que se envían, así que la memoria es constante.
+    """
+    if resource not in exports.EXPORTS or file_format not in exports.EXPORT_FORMATS:
+        return Response(
+            {"error": "Exportación no disponible. Use tasks, projects o clients en formato csv o ndjson."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        start_date, end_date = parse_period_params(request.query_params, default_days=None)
+    except ValueError:
+        return _invalid_date_response()
+
+    period = period_bounds(start_date, end_date)
+
+    client = None
+    client_id = request.query_params.get('client_id')
+    if client_id:
+        try:
+            client = Client.objects.get(pk=client_id)
+        except (Client.DoesNotExist, ValueError):
+            return _client_not_found_response(client_id)
+
+    filename = f"{resource}_{timezone.now():%Y%m%d}"
+    return exports.export_response(resource, file_format, period=period, client=client, filename=filename)
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'projects'
\ No newline at end of file
+    name = 'projects'
+
+    def ready(self):
+        # Registra las señales que mantienen los totales precalculados, las que
+        # invalidan la caché del panel administrativo y las marcas de borrado del feed de cambios.
+        from . import rollups, metrics_cache, sync  # noqa: F401
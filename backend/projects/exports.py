@@ -0,0 +1,163 @@
+"""
+Exportaciones completas en streaming (CSV y NDJSON) para contabilidad.
+
+Cada exportación es una única consulta con `values_list()` que se recorre con
+`.iterator(chunk_size=...)` (cursor del lado del servidor en PostgreSQL) y se
+escribe fila a fila en un StreamingHttpResponse. No se construyen objetos del
+modelo ni se pasa por los serializers, así que la memoria no depende del número
+de filas y el primer byte sale en cuanto la base de datos devuelve el primer bloque.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value, DecimalField, IntegerField
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+
+from clients.models import Client
+from tasks.models import Task
+from .models import Project
+
+CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _period_q(period):
+    """Filtro por created_at para un período (inicio, fin); cualquiera de los dos puede ser None."""
+    start, end = period or (None, None)
+    filters = Q()
+    if start is not None:
+        filters &= Q(created_at__gte=start)
+    if end is not None:
+        filters &= Q(created_at__lt=end)
+    return filters
+
+
+def _decimal_subquery(queryset, field):
+    return Coalesce(
+        Subquery(queryset.values(field)[:1]), Value(0),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def _count_subquery(queryset, field):
+    return Coalesce(Subquery(queryset.values(field)[:1]), Value(0), output_field=IntegerField())
+
+
+def task_rows(period=None, client=None):
+    """Todas las tareas con su proyecto y cliente (una fila por tarea)."""
+    filters = _period_q(period)
+    if client is not None:
+        filters &= Q(project__client=client)
+    columns = (
+        'id', 'project_id', 'project__name', 'project__client_id', 'project__client__business_name',
+        'title', 'status', 'due_date', 'cost', 'created_at', 'updated_at',
+    )
+    headers = (
+        'id', 'project_id', 'project_name', 'client_id', 'client_name',
+        'title', 'status', 'due_date', 'cost', 'created_at', 'updated_at',
+    )
+    queryset = Task.objects.filter(filters).order_by('id').values_list(*columns)
+    return headers, queryset
+
+
+def project_rows(period=None, client=None):
+    """Todos los proyectos con sus costes, leídos de los totales precalculados."""
+    filters = _period_q(period)
+    if client is not None:
+        filters &= Q(client=client)
+    columns = (
+        'id', 'name', 'client_id', 'client__business_name', 'status', 'start_date', 'currency',
+        'initial_cost', 'rollup__task_cost', 'rollup__task_count', 'created_at',
+    )
+    headers = (
+        'id', 'name', 'client_id', 'client_name', 'status', 'start_date', 'currency',
+        'initial_cost', 'extra_cost', 'task_count', 'created_at', 'total_cost',
+    )
+    queryset = Project.objects.filter(filters).order_by('id').values_list(*columns)
+    return headers, _with_project_totals(queryset)
+
+
+def _with_project_totals(queryset):
+    # Añadimos el coste total (inicial + tareas) al final de cada fila.
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        initial_cost, extra_cost = row[7] or 0, row[8] or 0
+        yield (*row[:8], extra_cost, row[9] or 0, row[10], initial_cost + extra_cost)
+
+
+def client_cost_rows(period=None, client=None):
+    """
+    Informe de costes por cliente: proyectos, coste inicial, coste de tareas y total
+    dentro del período. Cada total es una subconsulta correlacionada, así que sale
+    todo en una sola consulta ordenada por cliente.
+    """
+    projects = Project.objects.filter(_period_q(period), client=OuterRef('pk')).order_by().values('client')
+    tasks = Task.objects.filter(_period_q(period), project__client=OuterRef('pk')).order_by().values('project__client')
+
+    clients = Client.objects.all()
+    if client is not None:
+        clients = clients.filter(pk=client.pk)
+    queryset = clients.annotate(
+        project_count=_count_subquery(projects.annotate(n=Count('id')), 'n'),
+        project_initial_cost=_decimal_subquery(projects.annotate(total=Sum('initial_cost')), 'total'),
+        task_count=_count_subquery(tasks.annotate(n=Count('id')), 'n'),
+        task_cost=_decimal_subquery(tasks.annotate(total=Sum('cost')), 'total'),
+    ).order_by('id').values_list(
+        'id', 'business_name', 'is_active', 'project_count', 'project_initial_cost', 'task_count', 'task_cost',
+    )
+    headers = (
+        'client_id', 'client_name', 'is_active', 'project_count', 'initial_cost',
+        'task_count', 'extra_cost', 'total_cost',
+    )
+    rows = (
+        (*row, row[4] + row[6])
+        for row in queryset.iterator(chunk_size=CHUNK_SIZE)
+    )
+    return headers, rows
+
+
+EXPORTS = {
+    'tasks': task_rows,
+    'projects': project_rows,
+    'clients': client_cost_rows,
+}
+
+
+class _Echo:
+    """Objeto tipo archivo que devuelve lo escrito en lugar de guardarlo (para csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def _iter_rows(rows):
+    if hasattr(rows, 'iterator'):
+        return rows.iterator(chunk_size=CHUNK_SIZE)
+    return rows
+
+
+def stream_csv(headers, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in _iter_rows(rows):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(headers, rows):
+    for row in _iter_rows(rows):
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_response(resource, file_format, period=None, client=None, filename=None):
+    """Construye la respuesta en streaming para `resource` ('tasks', 'projects' o 'clients')."""
+    headers, rows = EXPORTS[resource](period=period, client=client)
+    stream = stream_csv if file_format == 'csv' else stream_ndjson
+    response = StreamingHttpResponse(stream(headers, rows), content_type=EXPORT_FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename or resource}.{file_format}"'
+    # Evita que nginx acumule la respuesta completa antes de enviarla al cliente.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,25 @@
+"""
+Trabajos en segundo plano de la app projects (ver jobs/queue.py).
+"""
+from clients.models import Client
+from jobs.queue import job
+from . import metrics_cache
+from .admin_views import build_dashboard_metrics
+
+
+def _build(start_date, end_date, client_id, time_grouping):
+    client = None
+    if client_id:
+        client = Client.objects.filter(pk=client_id).first()
+        if client is None:
+            return None
+    return build_dashboard_metrics(start_date, end_date, client, time_grouping)
+
+
+@job(max_attempts=1)
+def warm_dashboard_metrics():
+    """
+    Recalcula las métricas del panel que se consultaron hace poco, para que tras un
+    cambio la siguiente visita no espere la agregación (DASHBOARD_CACHE_WARMUP).
+    """
+    return {'warmed': metrics_cache.warm_metrics(_build)}
@@ -0,0 +1,105 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from clients.models import Client
+from clients.serializers import ClientSerializer
+from portal_sandoval_project.fast_serializers import ValuesSerializer
+from projects.models import Project
+from projects.rollups import rebuild_rollups
+from projects.serializers import ProjectSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compara el coste por fila de los serializers DRF y de la serialización rápida con values()'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Tareas a generar (2000).')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición; se toma la mejor (3).')
+        parser.add_argument(
+            '--existing', action='store_true',
+            help='Usa los datos de la base de datos en lugar de generar datos temporales.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Serializa los listados de clientes, proyectos y tareas con los dos métodos,
+        comprueba que el JSON resultante es idéntico y muestra el tiempo por fila.
+        Los datos generados se crean dentro de una transacción que se deshace al final.
+        """
+        if options['existing']:
+            self._run(options['repeat'])
+            return
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                self._run(options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, rows):
+        clients = [
+            Client.objects.create(
+                user=User.objects.create_user(username=f'benchmark-{i}', email=f'benchmark-{i}@example.com'),
+                business_name=f'Cliente {i}', contact_name='Contacto', phone='123',
+            )
+            for i in range(max(1, rows // 100))
+        ]
+        projects = Project.objects.bulk_create(
+            Project(client=clients[i % len(clients)], name=f'Proyecto {i}', initial_cost=100 + i, description='Descripción')
+            for i in range(max(1, rows // 10))
+        )
+        Task.objects.bulk_create(
+            Task(project=projects[i % len(projects)], title=f'Tarea {i}', cost=i % 7, status='PENDIENTE',
+                 attachment='task_attachments/archivo.pdf' if i % 3 == 0 else '')
+            for i in range(rows)
+        )
+        rebuild_rollups()
+
+    def _measure(self, function, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def _run(self, repeat):
+        context = {'request': RequestFactory().get('/api/v1/')}
+        renderer = JSONRenderer()
+        cases = [
+            ('clients', ClientSerializer, Client.objects.select_related('user', 'rollup').order_by('-created_at', '-id')),
+            ('projects', ProjectSerializer, Project.objects.select_related('client__user', 'client__rollup', 'rollup').order_by('-created_at', '-id')),
+            ('tasks', TaskSerializer, Task.objects.select_related('project__client').order_by('due_date', 'created_at', 'id')),
+        ]
+        self.stdout.write(f"{'listado':<10}{'filas':>8}{'DRF µs/fila':>14}{'values µs/fila':>16}{'mejora':>9}")
+        for name, serializer_class, queryset in cases:
+            def slow():
+                return renderer.render(serializer_class(queryset.all(), many=True, context=context).data)
+
+            def fast():
+                values = ValuesSerializer(serializer_class, context=context)
+                return renderer.render(values.many(values.values(queryset.all())))
+
+            slow_time, slow_output = self._measure(slow, repeat)
+            fast_time, fast_output = self._measure(fast, repeat)
+            if slow_output != fast_output:
+                raise CommandError(f'La salida rápida de {name} no coincide con la del serializer.')
+            rows = queryset.count() or 1
+            self.stdout.write(
+                f'{name:<10}{rows:>8}{slow_time / rows * 1e6:>14.1f}{fast_time / rows * 1e6:>16.1f}'
+                f'{slow_time / fast_time:>8.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS('Las salidas de ambos métodos son idénticas.'))
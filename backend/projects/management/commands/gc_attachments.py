@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from portal_sandoval_project.storage import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Borra los archivos adjuntos que ninguna tarea ni proyecto referencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra cuánto se borraría.')
+        parser.add_argument(
+            '--min-age-hours', type=float, default=1,
+            help='No borra archivos creados o enlazados hace menos de estas horas (por defecto 1).'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Los adjuntos se comparten entre objetos (ver portal_sandoval_project/storage.py),
+        así que no se borran al cambiarlos: esta limpieza cuenta las referencias.
+        """
+        removed, freed = collect_garbage(
+            min_age=timedelta(hours=options['min_age_hours']), dry_run=options['dry_run']
+        )
+        verb = 'se borrarían' if options['dry_run'] else 'borrados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{removed} archivos huérfanos {verb} ({freed / (1024 * 1024):.1f} MB liberados).'
+        ))
@@ -0,0 +1,210 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from clients.models import Client
+from projects import metrics_cache
+from projects.models import Project, ProjectRollup
+from projects.rollups import rebuild_rollups
+from tasks.models import Task
+
+# Proporciones de los datos generados, parecidas a las de la base de producción.
+PROJECT_STATUSES = {'NUEVO': 15, 'EN_PROGRESO': 35, 'EN_REVISION': 10, 'COMPLETADO': 30, 'PAUSADO': 10}
+TASK_STATUSES = {'PENDIENTE': 35, 'EN_PROGRESO': 25, 'COMPLETADA': 40}
+CURRENCIES = {'USD': 65, 'ARS': 35}
+TASKS_WITHOUT_COST = 0.3
+ARCHIVED_CLIENTS = 0.1
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Desactiva auto_now/auto_now_add mientras dura el bloque, para que bulk_create
+    guarde las fechas generadas en lugar de la fecha actual.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Genera un conjunto de datos sintético (clientes, proyectos y tareas) para medir el rendimiento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='Clientes a generar (1000).')
+        parser.add_argument('--projects', type=int, default=20000, help='Proyectos a generar (20000).')
+        parser.add_argument('--tasks', type=int, default=1000000, help='Tareas a generar (1000000).')
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Exponente de la distribución de Zipf de proyectos por cliente y tareas por proyecto '
+                 '(0 = uniforme; 1.1 por defecto: unos pocos clientes concentran la mayoría).'
+        )
+        parser.add_argument('--months', type=int, default=24, help='Meses hacia atrás en los que se reparten las fechas (24).')
+        parser.add_argument('--end-date', help='Fecha más reciente de los datos, YYYY-MM-DD (hoy).')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla: la misma semilla genera los mismos datos (42).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por bulk_create (5000).')
+        parser.add_argument('--prefix', default='synthetic', help="Prefijo de los usuarios generados ('synthetic').")
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Borra antes los datos generados con el mismo prefijo (usuarios, clientes, proyectos y tareas).'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Crea los datos con bulk_create por lotes. Las señales no se ejecutan con
+        bulk_create, así que al final se recalculan los totales (rollups) y se
+        invalida la caché del panel. Con la misma semilla, fecha final y tamaños el
+        resultado es idéntico, para comparar mediciones entre commits.
+        """
+        if min(options['clients'], options['projects'], options['tasks']) < 0 or options['clients'] < 1:
+            raise CommandError('Se necesita al menos un cliente y cantidades no negativas.')
+        if options['projects'] < 1 and options['tasks']:
+            raise CommandError('No se pueden generar tareas sin proyectos.')
+        try:
+            end_date = (
+                datetime.strptime(options['end_date'], '%Y-%m-%d').date()
+                if options['end_date'] else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError('--end-date debe tener el formato YYYY-MM-DD.')
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.end = timezone.make_aware(datetime.combine(end_date, dt_time(23, 59)))
+        self.span = timedelta(days=30 * options['months'])
+        prefix = options['prefix']
+
+        if options['clear']:
+            self._clear(prefix)
+        elif User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Ya hay datos con el prefijo '{prefix}'. Usa --clear o otro --prefix.")
+
+        with explicit_timestamps(User, Client, Project, Task):
+            clients = self._create_clients(prefix, options['clients'])
+            projects = self._create_projects(clients, options['projects'], options['skew'])
+            self._create_tasks(projects, options['tasks'], options['skew'])
+
+        self.stdout.write('Recalculando totales...')
+        rebuild_rollups()
+        metrics_cache.bump_data_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Generados {len(clients)} clientes, {len(projects)} proyectos y {options['tasks']} tareas."
+        ))
+
+    def _clear(self, prefix):
+        """
+        Borra los datos de una generación anterior. Tareas y proyectos se borran con
+        SQL directo: con delete() cada fila dispararía sus señales (totales, tombstones).
+        """
+        users = User.objects.filter(username__startswith=f'{prefix}-')
+        with transaction.atomic():
+            deleted = sum(
+                queryset._raw_delete(queryset.db) for queryset in (
+                    Task.objects.filter(project__client__user__in=users),
+                    ProjectRollup.objects.filter(project__client__user__in=users),
+                    Project.objects.filter(client__user__in=users),
+                )
+            )
+            deleted += users.delete()[0]
+        self.stdout.write(f'Borrados {deleted} objetos generados anteriormente.')
+
+    def _date(self, after=None):
+        """Instante al azar entre `after` (o el inicio del período) y la fecha final."""
+        start = after or self.end - self.span
+        return start + (self.end - start) * self.random.random()
+
+    def _choice(self, weights):
+        return self.random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _skewed(self, items, count, skew):
+        """Reparte `count` elementos entre `items` con una distribución de Zipf (en orden aleatorio)."""
+        ranked = list(items)
+        self.random.shuffle(ranked)
+        cumulative = list(accumulate(1 / (rank + 1) ** skew for rank in range(len(ranked))))
+        for _ in range(count):
+            yield self.random.choices(ranked, cum_weights=cumulative)[0]
+
+    def _bulk_create(self, model, objects, label, total, keep=True):
+        """
+        Inserta `objects` (iterable) por lotes, cada lote en su transacción. Devuelve
+        los objetos creados, o nada con keep=False (un millón de tareas no cabe en memoria).
+        """
+        created, batch, count = [], [], 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                count += self._insert(model, batch, created if keep else None)
+                batch = []
+                self.stdout.write(f'  {label}: {count}/{total}')
+        if batch:
+            self._insert(model, batch, created if keep else None)
+        return created
+
+    def _insert(self, model, batch, created):
+        with transaction.atomic():
+            objects = model.objects.bulk_create(batch)
+        if created is not None:
+            created += objects
+        return len(objects)
+
+    def _create_clients(self, prefix, count):
+        # Un solo hash para todos: calcular miles de contraseñas tardaría minutos.
+        password = make_password(prefix)
+        self._bulk_create(User, (
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password,
+                 date_joined=self._date())
+            for i in range(count)
+        ), 'usuarios', count, keep=False)
+        # Se releen para tener los id también en las bases de datos sin RETURNING.
+        users = User.objects.filter(username__startswith=f'{prefix}-').order_by('id')
+        return self._bulk_create(Client, (
+            Client(
+                user=user, business_name=f'Cliente {i}', contact_name=f'Contacto {i}',
+                phone=f'+54 11 {self.random.randint(4000, 6999)}-{self.random.randint(1000, 9999)}',
+                is_active=self.random.random() >= ARCHIVED_CLIENTS,
+                created_at=user.date_joined, updated_at=user.date_joined,
+            )
+            for i, user in enumerate(users)
+        ), 'clientes', count)
+
+    def _create_projects(self, clients, count, skew):
+        def build(client):
+            created_at = self._date(client.created_at)
+            return Project(
+                client=client, name=f'Proyecto {self.random.randint(1, 10 ** 6)}',
+                description='Proyecto generado para pruebas de rendimiento.',
+                start_date=created_at.date(), status=self._choice(PROJECT_STATUSES),
+                currency=self._choice(CURRENCIES),
+                initial_cost=Decimal(self.random.randint(100, 50000)),
+                created_at=created_at, updated_at=created_at,
+            )
+        return self._bulk_create(Project, (build(client) for client in self._skewed(clients, count, skew)), 'proyectos', count)
+
+    def _create_tasks(self, projects, count, skew):
+        def build(project):
+            created_at = self._date(project.created_at)
+            cost = 0 if self.random.random() < TASKS_WITHOUT_COST else round(self.random.lognormvariate(4, 1), 2)
+            due_date = None if self.random.random() < 0.2 else (created_at + timedelta(days=self.random.randint(1, 90))).date()
+            return Task(
+                project=project, title=f'Tarea {self.random.randint(1, 10 ** 6)}',
+                status=self._choice(TASK_STATUSES), cost=Decimal(str(cost)), due_date=due_date,
+                created_at=created_at, updated_at=created_at,
+            )
+        self._bulk_create(Task, (build(project) for project in self._skewed(projects, count, skew)), 'tareas', count, keep=False)
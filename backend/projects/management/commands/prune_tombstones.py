@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from projects.sync import prune_tombstones, tombstone_retention
+
+
+class Command(BaseCommand):
+    help = 'Borra las marcas de borrado del feed de cambios más antiguas que SYNC_TOMBSTONE_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        """
+        Los clientes del feed con una marca de agua más antigua que el período de
+        retención reciben 410 y recargan todo, así que estas filas ya no hacen falta.
+        """
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} marcas de borrado eliminadas (retención: {tombstone_retention().days} días).'
+        ))
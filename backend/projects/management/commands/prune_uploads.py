@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from portal_sandoval_project.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    help = 'Borra las subidas por partes abandonadas (sin partes nuevas en CHUNKED_UPLOAD_EXPIRATION_HOURS)'
+
+    def handle(self, *args, **options):
+        deleted = prune_uploads()
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} subidas abandonadas eliminadas '
+            f'(caducidad: {settings.CHUNKED_UPLOAD_EXPIRATION_HOURS} horas).'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from projects.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye (o verifica) los totales precalculados de proyectos y clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Solo compara los totales guardados con los calculados, sin modificarlos.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Recalcula ProjectRollup y ClientRollup desde las tablas de proyectos y tareas.
+        Útil después de cargas masivas que no pasan por save()/delete().
+        """
+        verify_only = options['verify']
+        mismatches = rebuild_rollups(verify_only=verify_only)
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Los totales precalculados están al día.'))
+            return
+
+        for model_name, pk in mismatches:
+            self.stdout.write(f'  {model_name} #{pk} desactualizado')
+
+        if verify_only:
+            raise CommandError(f'{len(mismatches)} filas de totales no coinciden con las tablas base.')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Totales reconstruidos ({len(mismatches)} filas corregidas).')
+        )
@@ -0,0 +1,212 @@
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client as HttpClient
+from django.utils import timezone
+
+from clients.models import Client
+from portal_sandoval_project.authentication import ClaimsTokenObtainPairSerializer
+from portal_sandoval_project.instrumentation import QueryRecorder
+from projects.models import Project
+from tasks.models import Task
+
+BENCHMARK_USER = 'benchmark-admin'
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, p):
+    """Percentil `p` (0-100) con interpolación lineal entre los dos valores más cercanos."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * p / 100
+    lower, upper = math.floor(k), math.ceil(k)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(durations):
+    """Estadísticas de una lista de duraciones en segundos, en milisegundos."""
+    ms = [duration * 1000 for duration in durations]
+    summary = {f'p{p}': round(percentile(ms, p), 2) for p in PERCENTILES}
+    summary.update(min=round(min(ms), 2), max=round(max(ms), 2), mean=round(statistics.fmean(ms), 2))
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Mide los endpoints principales de la API (latencia y consultas SQL) y guarda el resultado en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Mediciones por caso (20).')
+        parser.add_argument('--warmup', type=int, default=2, help='Peticiones previas sin medir por caso (2).')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados.')
+        parser.add_argument('--compare', help='JSON de una ejecución anterior con el que comparar.')
+        parser.add_argument(
+            '--max-regression', type=float,
+            help='Con --compare, termina con error si algún p50 empeora más de este porcentaje.'
+        )
+        parser.add_argument('--only', help='Solo los casos cuyo nombre contiene este texto.')
+
+    def handle(self, *args, **options):
+        """
+        Cada caso se pide `warmup` veces sin medir y después `iterations` veces con el
+        cliente de pruebas de Django (toda la pila: middlewares, autenticación JWT,
+        vista y serialización, sin red). Los casos `cold` vacían la caché antes de cada
+        petición. Usa los datos que haya en la base de datos (ver generate_dataset).
+        """
+        if options['iterations'] < 1:
+            raise CommandError('--iterations debe ser al menos 1.')
+        if options['max_regression'] is not None and not options['compare']:
+            raise CommandError('--max-regression necesita --compare.')
+        baseline = self._load(options['compare']) if options['compare'] else None
+
+        cases = self._cases()
+        if options['only']:
+            cases = [case for case in cases if options['only'] in case[0]]
+        if not cases:
+            raise CommandError('No hay casos que medir: genera datos con `manage.py generate_dataset`.')
+
+        http = HttpClient(HTTP_AUTHORIZATION=f'Bearer {self._token()}')
+        results = {}
+        for name, url, cold in cases:
+            results[name] = self._run_case(http, url, cold, options['warmup'], options['iterations'])
+            self.stdout.write(
+                f"{name:<32} p50 {results[name]['ms']['p50']:>9.2f} ms   p95 {results[name]['ms']['p95']:>9.2f} ms   "
+                f"{results[name]['queries']} consultas"
+            )
+
+        report = {'meta': self._meta(options), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+        if baseline is not None:
+            regressions = self._compare(baseline, report, options['max_regression'])
+            if regressions:
+                raise CommandError(f"Regresiones de más del {options['max_regression']}%: {', '.join(regressions)}")
+
+    def _load(self, path):
+        try:
+            with open(path, encoding='utf-8') as source:
+                return json.load(source)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'No se pudo leer {path}: {error}')
+
+    def _token(self):
+        """Token de acceso de un administrador exclusivo de las mediciones."""
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USER, defaults={'is_staff': True})
+        if not user.is_staff:
+            raise CommandError(f"El usuario '{BENCHMARK_USER}' existe y no es administrador.")
+        return str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+
+    def _cases(self):
+        """(nombre, URL, caché vacía) de cada caso; los detalles usan el objeto con más filas relacionadas."""
+        cases = [
+            ('projects.list', '/api/v1/projects/', False),
+            ('projects.list.page_50', '/api/v1/projects/?page_size=50', False),
+            ('clients.list', '/api/v1/clients/', False),
+            ('tasks.list', '/api/v1/tasks/', False),
+        ]
+        project = Project.objects.order_by('-rollup__task_count', 'pk').values_list('pk', flat=True).first()
+        client = Client.objects.order_by('-rollup__project_count', 'pk').values_list('pk', flat=True).first()
+        task = Task.objects.order_by('-pk').values_list('pk', flat=True).first()
+        if project is None or client is None or task is None:
+            return []
+        cases += [
+            ('projects.detail', f'/api/v1/projects/{project}/', False),
+            ('clients.detail', f'/api/v1/clients/{client}/', False),
+            ('tasks.detail', f'/api/v1/tasks/{task}/', False),
+        ]
+        end = timezone.localdate()
+        start = end - timedelta(days=365)
+        period = f'start_date={start:%Y-%m-%d}&end_date={end:%Y-%m-%d}'
+        for grouping in ('day', 'week', 'month'):
+            url = f'/api/v1/admin/metrics/?{period}&time_grouping={grouping}'
+            cases += [(f'metrics.{grouping}.cold', url, True), (f'metrics.{grouping}.warm', url, False)]
+        url = f'/api/v1/admin/metrics/?{period}&client_id={client}'
+        cases += [('metrics.client.cold', url, True), ('metrics.client.warm', url, False)]
+        return cases
+
+    def _run_case(self, http, url, cold, warmup, iterations):
+        for _ in range(warmup):
+            http.get(url)
+        durations, queries, statuses, size = [], [], {}, 0
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            # execute_wrapper y no CaptureQueriesContext: cada petición vacía connection.queries.
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                start = time.perf_counter()
+                response = http.get(url)
+                durations.append(time.perf_counter() - start)
+            queries.append(recorder.count)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            size = len(response.content)
+        return {
+            'url': url,
+            'cold_cache': cold,
+            'iterations': iterations,
+            'statuses': statuses,
+            'bytes': size,
+            'queries': max(queries),
+            'ms': summarize(durations),
+        }
+
+    def _meta(self, options):
+        return {
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'dataset': {
+                'clients': Client.objects.count(),
+                'projects': Project.objects.count(),
+                'tasks': Task.objects.count(),
+            },
+        }
+
+    def _compare(self, baseline, report, max_regression):
+        """Muestra la diferencia de p50, p95 y consultas con la ejecución anterior; devuelve las regresiones."""
+        self.stdout.write(f"\nComparación con {baseline['meta'].get('commit') or 'la ejecución anterior'}:")
+        if baseline['meta'].get('dataset') != report['meta']['dataset']:
+            self.stdout.write(self.style.WARNING('Los datos no son los mismos: la comparación no es fiable.'))
+        regressions = []
+        for name, result in report['results'].items():
+            previous = baseline['results'].get(name)
+            if previous is None:
+                continue
+            changes = {
+                p: (result['ms'][p] - previous['ms'][p]) / previous['ms'][p] * 100 if previous['ms'][p] else 0.0
+                for p in ('p50', 'p95')
+            }
+            self.stdout.write(
+                f"{name:<32} p50 {changes['p50']:>+7.1f}%   p95 {changes['p95']:>+7.1f}%   "
+                f"consultas {previous['queries']} -> {result['queries']}"
+            )
+            if max_regression is not None and changes['p50'] > max_regression:
+                regressions.append(name)
+        return regressions
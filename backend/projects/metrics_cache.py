@@ -0,0 +1,188 @@
+"""
+Caché de respuestas del panel administrativo (admin_dashboard_metrics).
+
+Cada respuesta se guarda bajo una clave que incluye los parámetros de la consulta
+y un contador de versión de los datos. Las señales de guardado y borrado de
+Client, Project, Task y User (anidado en los clientes) incrementan ese contador, de modo que cualquier edición
+invalida de golpe todas las respuestas anteriores sin tener que buscarlas: las
+claves viejas simplemente dejan de consultarse y caducan solas.
+
+Funciona con cualquier backend de caché de Django, pero la versión solo invalida
+las respuestas de los procesos que comparten la caché: con varios workers de
+gunicorn hace falta la caché en archivos (DJANGO_CACHE_DIR, ver CACHES en settings
+y gunicorn.conf.py), nunca la de memoria de cada proceso.
+"""
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from clients.models import Client
+from jobs.queue import enqueue_unique
+from tasks.models import Task
+from .models import Project
+from .rollups import handlers_suspended
+
+VERSION_KEY = 'dashboard:data_version'
+MODIFIED_KEY = 'dashboard:data_modified'
+HITS_KEY = 'dashboard:metrics:hits'
+MISSES_KEY = 'dashboard:metrics:misses'
+RECENT_KEY = 'dashboard:metrics:recent'
+RECENT_LIMIT = 10
+# Espera antes de recalcular, para agrupar varias escrituras seguidas en un solo cálculo.
+WARMUP_DELAY = timedelta(seconds=5)
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600)
+
+
+def _increment(key):
+    # incr() falla si la clave no existe; add() solo la crea si falta.
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # La clave se desalojó entre add() e incr().
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def version_is_shared():
+    """
+    Indica si la versión de los datos es la misma para todos los procesos. Con la
+    caché en memoria de cada proceso no lo es, y un ETag basado en ella podría
+    responder 304 a datos que otro worker ya cambió.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_data_version():
+    """Devuelve la versión actual de los datos, creándola si no existe."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Partimos de un valor basado en el reloj para que, si la clave se pierde,
+        # la nueva versión nunca coincida con una anterior todavía cacheada.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Invalida todas las respuestas cacheadas del panel (y los ETag de la API)."""
+    if cache.get(VERSION_KEY) is None:
+        get_data_version()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    cache.set(MODIFIED_KEY, time.time(), timeout=None)
+    if settings.DASHBOARD_CACHE_WARMUP:
+        enqueue_unique('projects.warm_dashboard_metrics', run_at=timezone.now() + WARMUP_DELAY)
+
+
+def get_data_modified():
+    """
+    Momento de la última escritura registrada (datetime), para la cabecera Last-Modified.
+    Devuelve None si no se conoce (por ejemplo, si la caché se vació).
+    """
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        return None
+    return datetime.fromtimestamp(modified, tz=dt_timezone.utc)
+
+
+def _metrics_key(version, start_date, end_date, client_id, time_grouping):
+    return f'dashboard:metrics:{version}:{start_date.isoformat()}:{end_date.isoformat()}:{client_id or ""}:{time_grouping}'
+
+
+def get_cached_metrics(start_date, end_date, client_id, time_grouping):
+    """
+    Busca una respuesta cacheada para estos parámetros.
+
+    Devuelve (datos, clave). Si no hay respuesta, `datos` es None y la clave sirve
+    para guardar el resultado con `store_metrics()`; así, si los datos cambian
+    mientras se calcula, el resultado queda bajo la versión anterior y nunca se sirve.
+    """
+    key = _metrics_key(get_data_version(), start_date, end_date, client_id, time_grouping)
+    data = cache.get(key)
+    _increment(HITS_KEY if data is not None else MISSES_KEY)
+    if data is None:
+        _remember_request(start_date, end_date, client_id, time_grouping)
+    return data, key
+
+
+def _remember_request(start_date, end_date, client_id, time_grouping):
+    # Guardamos las últimas combinaciones de parámetros pedidas para recalcularlas
+    # en segundo plano tras cada cambio (ver warm_metrics).
+    params = [start_date.isoformat(), end_date.isoformat(), client_id or '', time_grouping]
+    recent = [item for item in cache.get(RECENT_KEY, []) if item != params]
+    cache.set(RECENT_KEY, [params] + recent[:RECENT_LIMIT - 1], timeout=None)
+
+
+def warm_metrics(build):
+    """
+    Calcula y guarda, para la versión actual de los datos, las métricas de las últimas
+    combinaciones de parámetros pedidas que no estén ya en caché. `build(start_date,
+    end_date, client_id, time_grouping)` devuelve los datos, o None para saltarla.
+    Devuelve cuántas se calcularon.
+    """
+    version = get_data_version()
+    warmed = 0
+    for start, end, client_id, time_grouping in cache.get(RECENT_KEY, []):
+        start_date, end_date = date.fromisoformat(start), date.fromisoformat(end)
+        key = _metrics_key(version, start_date, end_date, client_id, time_grouping)
+        if cache.get(key) is not None:
+            continue
+        data = build(start_date, end_date, client_id or None, time_grouping)
+        if data is not None:
+            store_metrics(key, data)
+            warmed += 1
+    return warmed
+
+
+def store_metrics(key, data):
+    cache.set(key, data, timeout=_timeout())
+
+
+def get_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+        'data_version': get_data_version(),
+        'backend': settings.CACHES['default']['BACKEND'],
+    }
+
+
+def invalidate_on_write(sender, **kwargs):
+    # Las operaciones masivas invalidan una sola vez al terminar (ver tasks/bulk.py).
+    if handlers_suspended():
+        return
+    # Esperamos al commit: si invalidáramos antes, otra petición podría recalcular
+    # con los datos viejos y guardarlos bajo la versión nueva.
+    transaction.on_commit(bump_data_version)
+
+
+def invalidate_on_user_write(sender, update_fields=None, **kwargs):
+    # El usuario va anidado en los clientes (username, email...). Un login solo
+    # guarda last_login, que no aparece en ninguna respuesta: no invalida nada.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_on_write(sender, **kwargs)
+
+
+for model in (Client, Project, Task):
+    post_save.connect(invalidate_on_write, sender=model, dispatch_uid=f'dashboard_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_on_write, sender=model, dispatch_uid=f'dashboard_cache_delete_{model.__name__}')
+post_save.connect(invalidate_on_user_write, sender=settings.AUTH_USER_MODEL, dispatch_uid='dashboard_cache_save_user')
+post_delete.connect(invalidate_on_user_write, sender=settings.AUTH_USER_MODEL, dispatch_uid='dashboard_cache_delete_user')
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+STATUS_FIELDS = {
+    'PENDIENTE': 'tasks_pending',
+    'EN_PROGRESO': 'tasks_in_progress',
+    'COMPLETADA': 'tasks_completed',
+}
+
+
+def task_aggregates():
+    aggregates = {
+        'task_cost': Sum('cost'),
+        'task_count': Count('id'),
+        'tasks_with_cost': Count('id', filter=Q(cost__gt=0)),
+        'tasks_without_cost': Count('id', filter=Q(cost=0)),
+    }
+    for status, field in STATUS_FIELDS.items():
+        aggregates[field] = Count('id', filter=Q(status=status))
+    return aggregates
+
+
+def populate_rollups(apps, schema_editor):
+    """Calcula los totales iniciales a partir de los proyectos y tareas existentes."""
+    Client = apps.get_model('clients', 'Client')
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    ProjectRollup = apps.get_model('projects', 'ProjectRollup')
+    ClientRollup = apps.get_model('projects', 'ClientRollup')
+
+    project_rollups = {pk: ProjectRollup(project_id=pk) for pk in Project.objects.values_list('pk', flat=True)}
+    for row in Task.objects.order_by().values('project').annotate(**task_aggregates()):
+        rollup = project_rollups[row.pop('project')]
+        for field, value in row.items():
+            setattr(rollup, field, value or 0)
+    ProjectRollup.objects.bulk_create(project_rollups.values(), batch_size=1000)
+
+    client_rollups = {pk: ClientRollup(client_id=pk) for pk in Client.objects.values_list('pk', flat=True)}
+    project_rows = Project.objects.order_by().values('client').annotate(
+        project_count=Count('id'), initial_cost=Sum('initial_cost')
+    )
+    task_rows = Task.objects.order_by().values('project__client').annotate(**task_aggregates())
+    for rows, key in ((project_rows, 'client'), (task_rows, 'project__client')):
+        for row in rows:
+            rollup = client_rollups[row.pop(key)]
+            for field, value in row.items():
+                setattr(rollup, field, value or 0)
+    ClientRollup.objects.bulk_create(client_rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_merge_0002_appconfiguration_0002_client_is_active'),
+        ('projects', '0002_project_attachment_project_currency_and_more'),
+        ('tasks', '0004_alter_task_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientRollup',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='clients.client')),
+                ('project_count', models.IntegerField(default=0, verbose_name='Proyectos')),
+                ('initial_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Suma de Costes Iniciales')),
+                ('task_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Suma de Costes de Tareas')),
+                ('task_count', models.IntegerField(default=0, verbose_name='Tareas')),
+                ('tasks_with_cost', models.IntegerField(default=0, verbose_name='Tareas con Coste')),
+                ('tasks_without_cost', models.IntegerField(default=0, verbose_name='Tareas sin Coste')),
+                ('tasks_pending', models.IntegerField(default=0, verbose_name='Tareas Pendientes')),
+                ('tasks_in_progress', models.IntegerField(default=0, verbose_name='Tareas en Progreso')),
+                ('tasks_completed', models.IntegerField(default=0, verbose_name='Tareas Completadas')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProjectRollup',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='projects.project')),
+                ('task_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Suma de Costes de Tareas')),
+                ('task_count', models.IntegerField(default=0, verbose_name='Tareas')),
+                ('tasks_with_cost', models.IntegerField(default=0, verbose_name='Tareas con Coste')),
+                ('tasks_without_cost', models.IntegerField(default=0, verbose_name='Tareas sin Coste')),
+                ('tasks_pending', models.IntegerField(default=0, verbose_name='Tareas Pendientes')),
+                ('tasks_in_progress', models.IntegerField(default=0, verbose_name='Tareas en Progreso')),
+                ('tasks_completed', models.IntegerField(default=0, verbose_name='Tareas Completadas')),
+            ],
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_sync_changes_feed'),
+        ('projects', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('client', 'Cliente'), ('project', 'Proyecto'), ('task', 'Tarea')], max_length=20, verbose_name='Tipo')),
+                ('object_id', models.BigIntegerField(verbose_name='ID del Objeto Borrado')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Borrado')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='clientrollup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última Actualización'),
+        ),
+        migrations.AddField(
+            model_name='projectrollup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Última Actualización'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrollup',
+            index=models.Index(fields=['updated_at'], name='clientrollup_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['updated_at'], name='project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectrollup',
+            index=models.Index(fields=['updated_at'], name='projectrollup_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+    ]
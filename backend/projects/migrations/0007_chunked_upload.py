@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:46
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_sync_changes_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('project', 'Proyecto'), ('task', 'Tarea')], max_length=20, verbose_name='Tipo de Destino')),
+                ('object_id', models.BigIntegerField(verbose_name='ID del Destino')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nombre del Archivo')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Tamaño Total')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recibidos')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 Esperado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Parte Recibida')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['updated_at'], name='chunkedupload_updated_idx')],
+            },
+        ),
+    ]
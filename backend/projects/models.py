@@ -1,5 +1,9 @@
-from django.db import models
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models, transaction
 from clients.models import Client
+from portal_sandoval_project.storage import attachment_storage
 
 class Project(models.Model):
     """
@@ -23,12 +27,138 @@ class Project(models.Model):
     start_date = models.DateField(blank=True, null=True, verbose_name="Fecha de Inicio")
     initial_cost = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Coste Inicial")
     currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default='USD', verbose_name="Moneda")
-    attachment = models.FileField(upload_to='project_attachments/', blank=True, null=True, verbose_name="Archivo Adjunto del Proyecto")
+    attachment = models.FileField(
+        upload_to='project_attachments/', storage=attachment_storage, max_length=255,
+        blank=True, null=True, verbose_name="Archivo Adjunto del Proyecto"
+    )
     youtube_url = models.URLField(max_length=255, blank=True, null=True, verbose_name="URL de YouTube del Proyecto")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NUEVO', verbose_name="Estado")
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
 
+    class Meta:
+        indexes = [
+            # Orden del listado de proyectos (paginación por cursor).
+            models.Index(fields=['created_at', 'id'], name='project_created_idx'),
+            # Métricas del panel filtradas por cliente y período, e histograma por estado.
+            models.Index(fields=['client', 'created_at'], name='project_client_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='project_status_created_idx'),
+            # Feed de cambios (projects/sync.py).
+            models.Index(fields=['updated_at'], name='project_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Guardamos el proyecto y sus totales precalculados (ver projects/rollups.py)
+        # dentro de la misma transacción.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} ({self.client.business_name})"
+
+class ProjectRollup(models.Model):
+    """
+    Totales precalculados de las tareas de un proyecto.
+    Se mantienen de forma incremental al crear, editar, mover o borrar tareas
+    (ver projects/rollups.py) y se pueden reconstruir con `manage.py rebuild_rollups`.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    task_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Suma de Costes de Tareas")
+    task_count = models.IntegerField(default=0, verbose_name="Tareas")
+    tasks_with_cost = models.IntegerField(default=0, verbose_name="Tareas con Coste")
+    tasks_without_cost = models.IntegerField(default=0, verbose_name="Tareas sin Coste")
+    tasks_pending = models.IntegerField(default=0, verbose_name="Tareas Pendientes")
+    tasks_in_progress = models.IntegerField(default=0, verbose_name="Tareas en Progreso")
+    tasks_completed = models.IntegerField(default=0, verbose_name="Tareas Completadas")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='projectrollup_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Totales de {self.project_id}"
+
+
+class ClientRollup(models.Model):
+    """
+    Totales precalculados de los proyectos y tareas de un cliente.
+    Se mantienen junto con los de ProjectRollup.
+    """
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    project_count = models.IntegerField(default=0, verbose_name="Proyectos")
+    initial_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Suma de Costes Iniciales")
+    task_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Suma de Costes de Tareas")
+    task_count = models.IntegerField(default=0, verbose_name="Tareas")
+    tasks_with_cost = models.IntegerField(default=0, verbose_name="Tareas con Coste")
+    tasks_without_cost = models.IntegerField(default=0, verbose_name="Tareas sin Coste")
+    tasks_pending = models.IntegerField(default=0, verbose_name="Tareas Pendientes")
+    tasks_in_progress = models.IntegerField(default=0, verbose_name="Tareas en Progreso")
+    tasks_completed = models.IntegerField(default=0, verbose_name="Tareas Completadas")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='clientrollup_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Totales de {self.client_id}"
+
+
+class Tombstone(models.Model):
+    """
+    Marca de borrado de un cliente, proyecto o tarea.
+    El feed de cambios (projects/sync.py) la envía para que el frontend quite el
+    objeto sin recargar todo. Se eliminan pasado un tiempo con `manage.py prune_tombstones`.
+    """
+    MODEL_CHOICES = [
+        ('client', 'Cliente'),
+        ('project', 'Proyecto'),
+        ('task', 'Tarea'),
+    ]
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES, verbose_name="Tipo")
+    object_id = models.BigIntegerField(verbose_name="ID del Objeto Borrado")
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Borrado")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} borrado"
+
+
+class ChunkedUpload(models.Model):
+    """
+    Subida de un adjunto por partes (ver portal_sandoval_project/uploads.py).
+    Las partes se escriben en un archivo temporal; `offset` es cuántos bytes se
+    recibieron, así que una subida interrumpida continúa desde ahí.
+    """
+    TARGET_CHOICES = [
+        ('project', 'Proyecto'),
+        ('task', 'Tarea'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads', verbose_name="Usuario")
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES, verbose_name="Tipo de Destino")
+    object_id = models.BigIntegerField(verbose_name="ID del Destino")
+    filename = models.CharField(max_length=255, verbose_name="Nombre del Archivo")
+    size = models.PositiveBigIntegerField(verbose_name="Tamaño Total")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Bytes Recibidos")
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name="SHA-256 Esperado")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Parte Recibida")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='chunkedupload_updated_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.name} ({self.client.business_name})"
\ No newline at end of file
+        return f"{self.filename} ({self.offset}/{self.size})"
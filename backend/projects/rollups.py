@@ -0,0 +1,301 @@
+"""
+Mantenimiento de los totales precalculados (ProjectRollup y ClientRollup).
+
+Cada vez que se crea, edita, mueve o borra una tarea o un proyecto, las señales de
+este módulo aplican la diferencia (delta) sobre las filas de totales con expresiones
+F(), dentro de la misma transacción que la escritura original. Así las lecturas de
+costes y conteos no necesitan recorrer las tareas.
+
+Las escrituras masivas que no pasan por save()/delete() (por ejemplo
+`QuerySet.update()` o `bulk_create()`) no disparan señales: deben aplicar sus
+cambios con `apply_task_changes()` (como hace tasks/bulk.py) o, en su defecto,
+llamar a `rebuild_rollups()` / `manage.py rebuild_rollups` después.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from clients.models import Client
+from tasks.models import Task
+from .models import Project, ProjectRollup, ClientRollup
+
+ZERO = Decimal('0.00')
+
+# Campo del rollup que cuenta las tareas de cada estado.
+TASK_STATUS_FIELDS = {
+    'PENDIENTE': 'tasks_pending',
+    'EN_PROGRESO': 'tasks_in_progress',
+    'COMPLETADA': 'tasks_completed',
+}
+
+# Campos compartidos por ProjectRollup y ClientRollup que dependen de las tareas.
+TASK_ROLLUP_FIELDS = (
+    'task_cost', 'task_count', 'tasks_with_cost', 'tasks_without_cost',
+    *TASK_STATUS_FIELDS.values(),
+)
+CLIENT_ROLLUP_FIELDS = ('project_count', 'initial_cost', *TASK_ROLLUP_FIELDS)
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspend_signal_handlers():
+    """
+    Desactiva, en este hilo, el mantenimiento fila a fila que hacen las señales.
+
+    Lo usan las operaciones masivas (por ejemplo tasks/bulk.py), que luego aplican
+    los deltas agrupados por proyecto con `apply_task_changes()` en una sola pasada.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def handlers_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def task_contribution(cost, status):
+    """Devuelve lo que aporta una tarea a los totales de su proyecto y cliente."""
+    cost = Decimal(str(cost or 0))
+    contribution = {
+        'task_cost': cost,
+        'task_count': 1,
+        'tasks_with_cost': int(cost > 0),
+        'tasks_without_cost': int(cost == 0),
+    }
+    status_field = TASK_STATUS_FIELDS.get(status)
+    if status_field:
+        contribution[status_field] = 1
+    return contribution
+
+
+def _negate(delta):
+    return {field: -value for field, value in delta.items()}
+
+
+def _merge(*deltas):
+    merged = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] = merged.get(field, 0) + value
+    return merged
+
+
+def _apply(queryset, delta):
+    """Suma `delta` a las filas del queryset con una sola sentencia UPDATE."""
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    if changes:
+        # update() no toca los campos auto_now: marcamos la fecha a mano para el feed de cambios.
+        queryset.update(updated_at=timezone.now(), **changes)
+
+
+def apply_project_delta(project_id, delta):
+    """Aplica un delta de tareas al proyecto indicado y al cliente al que pertenece."""
+    _apply(ProjectRollup.objects.filter(project_id=project_id), delta)
+    _apply(ClientRollup.objects.filter(client__projects=project_id), delta)
+
+
+def apply_client_delta(client_id, delta):
+    _apply(ClientRollup.objects.filter(client_id=client_id), delta)
+
+
+def apply_task_changes(removed=(), added=()):
+    """
+    Aplica de una vez los cambios de muchas tareas, agrupados por proyecto.
+    `removed` y `added` son iterables de (project_id, cost, status): los valores
+    anteriores de las tareas editadas o borradas y los nuevos de las creadas o editadas.
+    """
+    deltas = {}
+    for project_id, cost, status in removed:
+        deltas[project_id] = _merge(deltas.get(project_id, {}), _negate(task_contribution(cost, status)))
+    for project_id, cost, status in added:
+        deltas[project_id] = _merge(deltas.get(project_id, {}), task_contribution(cost, status))
+    for project_id, delta in deltas.items():
+        apply_project_delta(project_id, delta)
+
+
+# === SEÑALES DE TAREAS ===
+
+@receiver(pre_save, sender=Task)
+def remember_previous_task(sender, instance, raw=False, **kwargs):
+    """Guarda los valores que tenía la tarea en la base de datos antes de editarla."""
+    instance._rollup_previous = None
+    if instance.pk and not raw and not handlers_suspended():
+        instance._rollup_previous = Task.objects.select_for_update().filter(
+            pk=instance.pk
+        ).values_list('project_id', 'cost', 'status').first()
+
+
+@receiver(post_save, sender=Task)
+def update_rollups_on_task_save(sender, instance, created, raw=False, **kwargs):
+    if raw or handlers_suspended():
+        return
+    new = task_contribution(instance.cost, instance.status)
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is None:
+        apply_project_delta(instance.project_id, new)
+        return
+
+    previous_project_id, previous_cost, previous_status = previous
+    old = _negate(task_contribution(previous_cost, previous_status))
+    if previous_project_id == instance.project_id:
+        apply_project_delta(instance.project_id, _merge(old, new))
+    else:
+        # La tarea se movió de proyecto: se resta del anterior y se suma al nuevo.
+        apply_project_delta(previous_project_id, old)
+        apply_project_delta(instance.project_id, new)
+
+
+@receiver(post_delete, sender=Task)
+def update_rollups_on_task_delete(sender, instance, **kwargs):
+    if handlers_suspended():
+        return
+    apply_project_delta(instance.project_id, _negate(task_contribution(instance.cost, instance.status)))
+
+
+# === SEÑALES DE PROYECTOS ===
+
+@receiver(pre_save, sender=Project)
+def remember_previous_project(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = Project.objects.select_for_update().filter(
+            pk=instance.pk
+        ).values_list('client_id', 'initial_cost').first()
+
+
+@receiver(post_save, sender=Project)
+def update_rollups_on_project_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    initial_cost = Decimal(str(instance.initial_cost or 0))
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is None:
+        ProjectRollup.objects.get_or_create(project=instance)
+        apply_client_delta(instance.client_id, {'project_count': 1, 'initial_cost': initial_cost})
+        return
+
+    previous_client_id, previous_initial_cost = previous
+    previous_initial_cost = previous_initial_cost or ZERO
+    if previous_client_id == instance.client_id:
+        apply_client_delta(instance.client_id, {'initial_cost': initial_cost - previous_initial_cost})
+        return
+
+    # El proyecto cambió de cliente: sus tareas se mueven con él.
+    task_totals = ProjectRollup.objects.filter(project=instance).values(*TASK_ROLLUP_FIELDS).first() or {}
+    apply_client_delta(previous_client_id, _negate(
+        _merge(task_totals, {'project_count': 1, 'initial_cost': previous_initial_cost})
+    ))
+    apply_client_delta(instance.client_id, _merge(
+        task_totals, {'project_count': 1, 'initial_cost': initial_cost}
+    ))
+
+
+@receiver(post_delete, sender=Project)
+def update_rollups_on_project_delete(sender, instance, **kwargs):
+    # Las tareas del proyecto ya se restaron al borrarse en cascada antes que él.
+    apply_client_delta(instance.client_id, {
+        'project_count': -1,
+        'initial_cost': -Decimal(str(instance.initial_cost or 0)),
+    })
+
+
+@receiver(post_save, sender=Client)
+def create_client_rollup(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ClientRollup.objects.get_or_create(client=instance)
+
+
+# === RECONSTRUCCIÓN DESDE LAS TABLAS BASE ===
+
+def _task_aggregates(prefix=''):
+    """Agregados de tareas equivalentes a los campos de TASK_ROLLUP_FIELDS."""
+    aggregates = {
+        'task_cost': Sum(f'{prefix}cost'),
+        'task_count': Count(f'{prefix}id'),
+        'tasks_with_cost': Count(f'{prefix}id', filter=Q(**{f'{prefix}cost__gt': 0})),
+        'tasks_without_cost': Count(f'{prefix}id', filter=Q(**{f'{prefix}cost': 0})),
+    }
+    for status, field in TASK_STATUS_FIELDS.items():
+        aggregates[field] = Count(f'{prefix}id', filter=Q(**{f'{prefix}status': status}))
+    return aggregates
+
+
+def _empty_totals(fields):
+    return {field: ZERO if field.endswith('_cost') else 0 for field in fields}
+
+
+def _normalize(row, fields):
+    return {field: row.get(field) or (ZERO if field.endswith('_cost') else 0) for field in fields}
+
+
+def compute_project_rollups():
+    """Calcula desde cero los totales de todos los proyectos: {project_id: {campo: valor}}."""
+    expected = {pk: _empty_totals(TASK_ROLLUP_FIELDS) for pk in Project.objects.values_list('pk', flat=True)}
+    for row in Task.objects.order_by().values('project').annotate(**_task_aggregates()):
+        expected[row['project']] = _normalize(row, TASK_ROLLUP_FIELDS)
+    return expected
+
+
+def compute_client_rollups():
+    """Calcula desde cero los totales de todos los clientes: {client_id: {campo: valor}}."""
+    expected = {pk: _empty_totals(CLIENT_ROLLUP_FIELDS) for pk in Client.objects.values_list('pk', flat=True)}
+    project_rows = Project.objects.order_by().values('client').annotate(
+        project_count=Count('id'), initial_cost=Sum('initial_cost')
+    )
+    for row in project_rows:
+        expected[row['client']].update(_normalize(row, ('project_count', 'initial_cost')))
+    task_rows = Task.objects.order_by().values('project__client').annotate(**_task_aggregates())
+    for row in task_rows:
+        expected[row['project__client']].update(_normalize(row, TASK_ROLLUP_FIELDS))
+    return expected
+
+
+def _find_mismatches(model, key, expected, fields):
+    stored = {row[key]: row for row in model.objects.values(key, *fields)}
+    mismatches = []
+    for pk, values in expected.items():
+        row = stored.get(pk)
+        if row is None or any(row[field] != values[field] for field in fields):
+            mismatches.append((model.__name__, pk))
+    mismatches.extend((model.__name__, pk) for pk in stored.keys() - expected.keys())
+    return mismatches
+
+
+def rebuild_rollups(verify_only=False):
+    """
+    Recalcula los totales desde las tablas base.
+
+    Devuelve la lista de filas (modelo, pk) que no coincidían con lo esperado.
+    Con `verify_only=True` solo compara, sin modificar nada.
+    """
+    project_expected = compute_project_rollups()
+    client_expected = compute_client_rollups()
+    mismatches = (
+        _find_mismatches(ProjectRollup, 'project_id', project_expected, TASK_ROLLUP_FIELDS)
+        + _find_mismatches(ClientRollup, 'client_id', client_expected, CLIENT_ROLLUP_FIELDS)
+    )
+    if verify_only or not mismatches:
+        return mismatches
+
+    with transaction.atomic():
+        ProjectRollup.objects.all().delete()
+        ProjectRollup.objects.bulk_create(
+            ProjectRollup(project_id=pk, **values) for pk, values in project_expected.items()
+        )
+        ClientRollup.objects.all().delete()
+        ClientRollup.objects.bulk_create(
+            ClientRollup(client_id=pk, **values) for pk, values in client_expected.items()
+        )
+    return mismatches
@@ -1,12 +1,13 @@
 from rest_framework import serializers
 from .models import Project
-from clients.serializers import ClientSerializer
+from clients.serializers import ClientSerializer, or_zero
 from clients.models import Client
 from tasks.models import Task
 from django.db.models import Sum, Count, Case, When, IntegerField, Q
 from decimal import Decimal
+from portal_sandoval_project.field_selection import FieldSelectionMixin
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Project.
     Ahora incluye campos calculados para el coste inicial, extras, total y el número de tareas.
@@ -37,12 +38,26 @@ class ProjectSerializer(serializers.ModelSerializer):
             'created_at'
         ]
 
+    # Columnas de values() y cálculo de los campos calculados para la serialización
+    # rápida de los listados (ver portal_sandoval_project/fast_serializers.py).
+    values_methods = {
+        'extra_cost': (('rollup__task_cost',), or_zero),
+        'total_cost': (('initial_cost', 'rollup__task_cost'), lambda initial, extra: or_zero(initial) + or_zero(extra)),
+        'task_count': (('rollup__task_count',), lambda count: count or 0),
+        'tasks_with_cost_count': (('rollup__tasks_with_cost',), lambda count: count or 0),
+        'tasks_without_cost_count': (('rollup__tasks_without_cost',), lambda count: count or 0),
+    }
+
     def get_extra_cost(self, obj):
         """
         Calcula el coste de las tareas extra.
         Suma los costes de todas las tareas asociadas a este proyecto.
         'obj' es la instancia del proyecto que se está serializando.
+        Se lee del total precalculado (ProjectRollup); solo si falta se suma desde las tareas.
         """
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.task_cost
         return obj.tasks.aggregate(total=Sum('cost'))['total'] or Decimal('0.00')
 
     def get_total_cost(self, obj):
@@ -61,16 +76,25 @@ class ProjectSerializer(serializers.ModelSerializer):
         """
         Cuenta cuántas tareas están asociadas a este proyecto.
         """
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.task_count
         return obj.tasks.count()
         
     def get_tasks_with_cost_count(self, obj):
         """
         Cuenta cuántas tareas con coste (mayor que 0) están asociadas a este proyecto.
         """
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.tasks_with_cost
         return obj.tasks.filter(cost__gt=0).count()
         
     def get_tasks_without_cost_count(self, obj):
         """
         Cuenta cuántas tareas sin coste (igual a 0) están asociadas a este proyecto.
         """
+        rollup = getattr(obj, 'rollup', None)
+        if rollup is not None:
+            return rollup.tasks_without_cost
         return obj.tasks.filter(cost=0).count()
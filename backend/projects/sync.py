@@ -0,0 +1,140 @@
+"""
+Feed de cambios para sincronizar el frontend de forma incremental.
+
+El frontend guarda la marca de agua (`watermark`) de la última respuesta y la
+envía como `since` en la siguiente. Recibe solo:
+
+- los clientes, proyectos y tareas con `updated_at` posterior (editar el usuario de
+  un cliente también actualiza el `updated_at` del cliente),
+- los IDs borrados desde entonces (tabla Tombstone, que llenan las señales de este módulo),
+- los totales precalculados de proyectos y clientes que cambiaron (ProjectRollup y
+  ClientRollup guardan su propia fecha de actualización), así los costes de los
+  padres de una tarea editada, movida o borrada llegan sin recargar el proyecto.
+
+`updated_at` se asigna al guardar, antes del commit. Para no perder escrituras que
+confirmen justo después de la consulta, la marca de agua devuelta se retrasa
+CHANGES_OVERLAP respecto al momento de la consulta: algunos objetos pueden llegar
+dos veces, y el frontend simplemente los reemplaza.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from clients.models import Client
+from tasks.models import Task
+from .models import Project, ProjectRollup, ClientRollup, Tombstone
+from .rollups import handlers_suspended
+
+CHANGES_OVERLAP = timedelta(seconds=5)
+
+TOMBSTONE_MODELS = {
+    Client: 'client',
+    Project: 'project',
+    Task: 'task',
+}
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def record_deletions(model, object_ids):
+    """Guarda las marcas de borrado de varios objetos con un solo INSERT."""
+    name = TOMBSTONE_MODELS[model]
+    Tombstone.objects.bulk_create(Tombstone(model=name, object_id=pk) for pk in object_ids)
+
+
+def _record_deletion(sender, instance, **kwargs):
+    # Las operaciones masivas registran sus borrados de una vez (ver tasks/bulk.py).
+    if handlers_suspended():
+        return
+    Tombstone.objects.create(model=TOMBSTONE_MODELS[sender], object_id=instance.pk)
+
+
+for model in TOMBSTONE_MODELS:
+    post_delete.connect(_record_deletion, sender=model, dispatch_uid=f'sync_tombstone_{model.__name__}')
+
+
+def _touch_client_of_user(sender, instance, update_fields=None, **kwargs):
+    # El usuario va anidado en el cliente, pero editarlo no cambia Client.updated_at:
+    # sin esto el feed no enviaría el username o el email nuevos. Un login (solo
+    # last_login) no cambia nada de lo que se envía.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    Client.objects.filter(user=instance).update(updated_at=timezone.now())
+
+
+post_save.connect(_touch_client_of_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='sync_touch_client_of_user')
+
+
+def prune_tombstones(now=None):
+    """Borra las marcas más antiguas que el período de retención. Devuelve cuántas se borraron."""
+    cutoff = (now or timezone.now()) - tombstone_retention()
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def is_too_old(since, now=None):
+    """
+    Indica si `since` es anterior al período de retención de las marcas de borrado:
+    en ese caso el feed podría no incluir todos los borrados y hay que recargar todo.
+    """
+    return since < (now or timezone.now()) - tombstone_retention()
+
+
+def project_totals(rollup):
+    """Totales de un proyecto con los mismos nombres que usa ProjectSerializer."""
+    initial_cost = rollup['project__initial_cost'] or 0
+    return {
+        'extra_cost': rollup['task_cost'],
+        'total_cost': initial_cost + rollup['task_cost'],
+        'task_count': rollup['task_count'],
+        'tasks_with_cost_count': rollup['tasks_with_cost'],
+        'tasks_without_cost_count': rollup['tasks_without_cost'],
+    }
+
+
+def client_totals(rollup):
+    """Totales de un cliente con los mismos nombres que usa ClientSerializer."""
+    return {
+        'initial_cost': rollup['initial_cost'],
+        'extra_cost': rollup['task_cost'],
+        'total_cost': rollup['initial_cost'] + rollup['task_cost'],
+    }
+
+
+def collect_watermark():
+    """Marca de agua para la próxima llamada al feed, tomada antes de leer los datos."""
+    return timezone.now() - CHANGES_OVERLAP
+
+
+def collect_changes(since):
+    """
+    Devuelve los querysets y datos del feed desde `since`, junto con la nueva marca
+    de agua. Cada bloque es una consulta por rango sobre un índice de updated_at
+    (o deleted_at), así que el coste depende de lo que cambió y no del tamaño de las tablas.
+    """
+    watermark = collect_watermark()
+
+    deleted = {name: [] for name in TOMBSTONE_MODELS.values()}
+    for name, object_id in Tombstone.objects.filter(deleted_at__gte=since).order_by('deleted_at', 'id').values_list('model', 'object_id'):
+        deleted[name].append(object_id)
+
+    project_rollups = ProjectRollup.objects.filter(updated_at__gte=since).values(
+        'project_id', 'project__initial_cost', 'task_cost', 'task_count', 'tasks_with_cost', 'tasks_without_cost',
+    )
+    client_rollups = ClientRollup.objects.filter(updated_at__gte=since).values('client_id', 'initial_cost', 'task_cost')
+
+    return {
+        'watermark': watermark,
+        'clients': Client.objects.filter(updated_at__gte=since).select_related('user', 'rollup').order_by('updated_at', 'id'),
+        'projects': Project.objects.filter(updated_at__gte=since).select_related('rollup').order_by('updated_at', 'id'),
+        'tasks': Task.objects.filter(updated_at__gte=since).order_by('updated_at', 'id'),
+        'deleted': deleted,
+        'rollups': {
+            'projects': {str(row['project_id']): project_totals(row) for row in project_rollups},
+            'clients': {str(row['client_id']): client_totals(row) for row in client_rollups},
+        },
+    }
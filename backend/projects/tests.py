@@ -1,3 +1,932 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import pstats
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
\ No newline at end of file
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from clients.models import Client
+from clients.serializers import ClientSerializer
+from portal_sandoval_project import instrumentation, metrics_store, query_inspector
+from portal_sandoval_project.query_inspector import QueryBudgetMixin
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from .admin_views import period_bounds
+from .models import Project, ProjectRollup, ClientRollup, Tombstone
+from .rollups import rebuild_rollups
+from .serializers import ProjectSerializer
+
+
+class ProjectListQueryCountTests(APITestCase):
+    """
+    El listado de proyectos debe costar un número fijo de consultas,
+    sin importar cuántos proyectos, tareas o clientes existan.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(self.admin)
+
+    def _create_client(self, name):
+        user = User.objects.create_user(username=name, email=f'{name}@example.com', password='secret')
+        return Client.objects.create(user=user, business_name=name, contact_name=name)
+
+    def _create_projects(self, client, count):
+        for i in range(count):
+            project = Project.objects.create(client=client, name=f'P{i}', initial_cost=Decimal('100.00'))
+            Task.objects.create(project=project, title='Con coste', cost=Decimal('25.50'))
+            Task.objects.create(project=project, title='Sin coste', cost=Decimal('0.00'))
+
+    def test_list_query_count_is_constant(self):
+        self._create_projects(self._create_client('uno'), 2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/projects/')
+        self.assertEqual(len(response.data), 2)
+
+        self._create_projects(self._create_client('dos'), 5)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/projects/')
+        self.assertEqual(len(response.data), 7)
+
+    def test_list_totals_match_per_object_computation(self):
+        client = self._create_client('uno')
+        self._create_projects(client, 3)
+        Project.objects.create(client=client, name='Sin tareas')
+
+        response = self.client.get('/api/v1/projects/')
+        empty = next(p for p in response.data if p['name'] == 'Sin tareas')
+        self.assertEqual(empty['extra_cost'], Decimal('0.00'))
+        self.assertEqual(empty['total_cost'], Decimal('0.00'))
+        self.assertEqual(empty['task_count'], 0)
+
+        project = next(p for p in response.data if p['name'] == 'P0')
+        self.assertEqual(project['extra_cost'], Decimal('25.50'))
+        self.assertEqual(project['total_cost'], Decimal('125.50'))
+        self.assertEqual(project['task_count'], 2)
+        self.assertEqual(project['tasks_with_cost_count'], 1)
+        self.assertEqual(project['tasks_without_cost_count'], 1)
+        self.assertEqual(project['client']['initial_cost'], Decimal('300.00'))
+        self.assertEqual(project['client']['extra_cost'], Decimal('76.50'))
+        self.assertEqual(project['client']['total_cost'], Decimal('376.50'))
+        self.assertEqual(project['client']['user']['username'], 'uno')
+
+
+class AdminDashboardMetricsTests(APITestCase):
+    """
+    Las métricas del panel administrativo salen de un número fijo de consultas agregadas.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(self.admin)
+
+    def _seed(self, clients, projects_per_client):
+        # Ejecutamos los on_commit para que las escrituras invaliden la caché del panel.
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_rows(clients, projects_per_client)
+
+    def _create_rows(self, clients, projects_per_client):
+        for c in range(clients):
+            user = User.objects.create_user(username=f'c{c}-{Client.objects.count()}')
+            client = Client.objects.create(user=user, business_name=user.username, contact_name='x')
+            for p in range(projects_per_client):
+                project = Project.objects.create(client=client, name=f'P{p}', initial_cost=Decimal('10.00') * (p + 1))
+                Task.objects.create(project=project, title='t', cost=Decimal('5.00'), status='COMPLETADA')
+                Task.objects.create(project=project, title='t', cost=Decimal('0.00'))
+
+    def test_query_count_is_constant(self):
+        self._seed(2, 2)
+        with self.assertNumQueries(9):
+            self.client.get('/api/v1/admin/metrics/')
+        self._seed(5, 4)
+        with self.assertNumQueries(9):
+            response = self.client.get('/api/v1/admin/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['client_metrics']), 7)
+        self.assertEqual(len(response.data['top_projects']), 10)
+
+    def test_metrics_values(self):
+        self._seed(2, 3)
+        response = self.client.get('/api/v1/admin/metrics/')
+        global_metrics = response.data['global_metrics']
+        self.assertEqual(global_metrics['total_projects'], 6)
+        self.assertEqual(global_metrics['total_tasks'], 12)
+        self.assertEqual(global_metrics['total_initial_cost'], 120.0)
+        self.assertEqual(global_metrics['total_task_cost'], 30.0)
+        self.assertEqual(global_metrics['tasks_with_cost'], 6)
+        self.assertEqual(global_metrics['tasks_without_cost'], 6)
+        self.assertEqual(response.data['task_status'], {'COMPLETADA': 6, 'PENDIENTE': 6})
+
+        client_row = response.data['client_metrics'][0]
+        self.assertEqual(client_row['project_count'], 3)
+        self.assertEqual(client_row['task_count'], 6)
+        self.assertEqual(client_row['completed_tasks'], 3)
+        self.assertEqual(client_row['total_cost'], 75.0)
+
+        top = response.data['top_projects']
+        self.assertEqual([row['total_cost'] for row in top], sorted((row['total_cost'] for row in top), reverse=True))
+        self.assertEqual(top[0]['total_cost'], 35.0)
+
+    def test_unknown_client_returns_404(self):
+        response = self.client.get('/api/v1/admin/metrics/?client_id=999')
+        self.assertEqual(response.status_code, 404)
+
+
+class RollupMaintenanceTests(TestCase):
+    """
+    Los totales precalculados deben coincidir con las tablas base tras cualquier escritura.
+    """
+
+    def _create_client(self, name):
+        user = User.objects.create_user(username=name)
+        return Client.objects.create(user=user, business_name=name, contact_name=name)
+
+    def assertRollupsConsistent(self):
+        self.assertEqual(rebuild_rollups(verify_only=True), [])
+
+    def test_task_and_project_writes_keep_rollups_consistent(self):
+        first, second = self._create_client('uno'), self._create_client('dos')
+        project = Project.objects.create(client=first, name='P', initial_cost=Decimal('100.00'))
+        other = Project.objects.create(client=first, name='Q')
+        task = Task.objects.create(project=project, title='t', cost=Decimal('10.00'))
+        Task.objects.create(project=project, title='t', status='COMPLETADA')
+        self.assertRollupsConsistent()
+
+        rollup = ProjectRollup.objects.get(project=project)
+        self.assertEqual(rollup.task_cost, Decimal('10.00'))
+        self.assertEqual(rollup.tasks_with_cost, 1)
+        self.assertEqual(rollup.tasks_without_cost, 1)
+        self.assertEqual(rollup.tasks_completed, 1)
+
+        # Editar coste y estado
+        task.cost = Decimal('0.00')
+        task.status = 'EN_PROGRESO'
+        task.save()
+        self.assertRollupsConsistent()
+
+        # Mover la tarea a otro proyecto
+        task.project = other
+        task.save()
+        self.assertRollupsConsistent()
+
+        # Cambiar el coste inicial y mover el proyecto a otro cliente
+        project.initial_cost = Decimal('50.00')
+        project.save()
+        project.client = second
+        project.save()
+        self.assertRollupsConsistent()
+        self.assertEqual(ClientRollup.objects.get(client=second).initial_cost, Decimal('50.00'))
+
+        # Borrar tareas, proyectos (en cascada) y clientes
+        task.delete()
+        self.assertRollupsConsistent()
+        project.delete()
+        self.assertRollupsConsistent()
+        first.user.delete()
+        self.assertRollupsConsistent()
+
+    def test_rebuild_fixes_drift(self):
+        project = Project.objects.create(client=self._create_client('uno'), name='P')
+        Task.objects.create(project=project, title='t', cost=Decimal('10.00'))
+        # QuerySet.update() no dispara señales: los totales quedan desactualizados.
+        Task.objects.update(cost=Decimal('30.00'))
+        self.assertNotEqual(rebuild_rollups(verify_only=True), [])
+
+        out = StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertRollupsConsistent()
+        self.assertEqual(ProjectRollup.objects.get(project=project).task_cost, Decimal('30.00'))
+
+
+class QueryPlanTests(TestCase):
+    """
+    Las consultas del panel y de los listados deben resolverse con índices.
+
+    En PostgreSQL se desactivan los seq scans para el planificador: si aun así el
+    plan contiene "Seq Scan" es que no existe un índice utilizable. En SQLite se
+    comprueba que ninguna tabla se recorra completa sin índice ("SCAN tabla").
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for c in range(3):
+            user = User.objects.create_user(username=f'plan{c}')
+            client = Client.objects.create(user=user, business_name=f'C{c}', contact_name='x', is_active=c != 2)
+            for p in range(5):
+                project = Project.objects.create(client=client, name=f'P{p}', initial_cost=Decimal('10.00'))
+                for t in range(5):
+                    Task.objects.create(project=project, title='t', cost=Decimal(t), status='COMPLETADA' if t % 2 else 'PENDIENTE')
+        cls.some_client = Client.objects.first()
+        cls.some_project = Project.objects.first()
+
+    def assertUsesIndexes(self, queryset):
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+            self.assertNotIn('Seq Scan', plan, plan)
+        elif vendor == 'sqlite':
+            plan = queryset.explain()
+            for line in plan.splitlines():
+                if ' SCAN ' in f' {line} ':
+                    self.assertIn('INDEX', line, plan)
+        else:
+            self.skipTest(f'Sin comprobación de planes para {vendor}')
+
+    def test_dashboard_queries_use_indexes(self):
+        start, end = period_bounds(date.today() - timedelta(days=365), date.today())
+        tasks = Task.objects.filter(created_at__gte=start, created_at__lt=end)
+        projects = Project.objects.filter(created_at__gte=start, created_at__lt=end)
+        self.assertUsesIndexes(tasks.values('status').annotate(count=Count('id')))
+        self.assertUsesIndexes(projects.values('status').annotate(count=Count('id')))
+        self.assertUsesIndexes(tasks.filter(project__client=self.some_client))
+        self.assertUsesIndexes(projects.filter(client=self.some_client))
+
+    def test_list_pages_use_indexes(self):
+        self.assertUsesIndexes(Client.objects.filter(is_active=True).order_by('-created_at', '-id')[:50])
+        self.assertUsesIndexes(Client.objects.filter(is_active=False).order_by('-created_at', '-id')[:50])
+        self.assertUsesIndexes(self.some_project.tasks.order_by('created_at', 'id')[:50])
+        self.assertUsesIndexes(Task.objects.filter(project=self.some_project, cost__gt=0))
+
+
+class AdminDashboardCacheTests(APITestCase):
+    """
+    Las respuestas del panel se sirven desde la caché hasta que cambian los datos.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(self.admin)
+        user = User.objects.create_user(username='cliente')
+        client = Client.objects.create(user=user, business_name='Cliente', contact_name='x')
+        self.project = Project.objects.create(client=client, name='P', initial_cost=Decimal('10.00'))
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get('/api/v1/admin/metrics/?time_grouping=week')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/admin/metrics/?time_grouping=week')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        # Otros parámetros usan otra entrada de la caché.
+        self.assertEqual(self.client.get('/api/v1/admin/metrics/?time_grouping=day')['X-Cache'], 'MISS')
+
+        stats = self.client.get('/api/v1/admin/metrics/cache-stats/').data
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_writes_invalidate_cached_metrics(self):
+        self.client.get('/api/v1/admin/metrics/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(project=self.project, title='t', cost=Decimal('5.00'))
+        response = self.client.get('/api/v1/admin/metrics/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['global_metrics']['total_task_cost'], 5.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        response = self.client.get('/api/v1/admin/metrics/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['global_metrics']['total_projects'], 0)
+
+
+class AdminExportTests(APITestCase):
+    """
+    Las exportaciones se generan en streaming con una sola consulta y aceptan los
+    mismos filtros de fechas y cliente que las métricas del panel.
+    """
+
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(admin)
+        self.acme = Client.objects.create(user=User.objects.create_user(username='acme'), business_name='Acme')
+        self.other = Client.objects.create(user=User.objects.create_user(username='otro'), business_name='Otro, S.A.')
+        self.project = Project.objects.create(client=self.acme, name='Web', initial_cost=Decimal('100.00'))
+        Task.objects.create(project=self.project, title='Diseño', cost=Decimal('20.00'))
+        Task.objects.create(project=self.project, title='Texto "largo"', cost=Decimal('5.50'))
+        old_project = Project.objects.create(client=self.other, name='Antiguo', initial_cost=Decimal('40.00'))
+        old_task = Task.objects.create(project=old_project, title='Vieja', cost=Decimal('1.00'))
+        Project.objects.filter(pk=old_project.pk).update(created_at=timezone.now() - timedelta(days=400))
+        Task.objects.filter(pk=old_task.pk).update(created_at=timezone.now() - timedelta(days=400))
+
+    def _content(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_tasks_csv_streams_with_one_query(self):
+        response = self.client.get('/api/v1/admin/exports/tasks.csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="tasks_', response['Content-Disposition'])
+        with self.assertNumQueries(1):
+            rows = list(csv.reader(StringIO(self._content(response))))
+        self.assertEqual(rows[0][:5], ['id', 'project_id', 'project_name', 'client_id', 'client_name'])
+        self.assertEqual(len(rows), 4)
+        self.assertIn('Texto "largo"', [row[5] for row in rows])
+
+    def test_projects_ndjson_includes_costs(self):
+        response = self.client.get('/api/v1/admin/exports/projects.ndjson', {'client_id': self.acme.id})
+        lines = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['name'], 'Web')
+        self.assertEqual(Decimal(lines[0]['extra_cost']), Decimal('25.50'))
+        self.assertEqual(Decimal(lines[0]['total_cost']), Decimal('125.50'))
+        self.assertEqual(lines[0]['task_count'], 2)
+
+    def test_client_report_honours_period(self):
+        start = (timezone.now() - timedelta(days=30)).date().isoformat()
+        response = self.client.get('/api/v1/admin/exports/clients.csv', {'start_date': start})
+        rows = {row['client_name']: row for row in csv.DictReader(StringIO(self._content(response)))}
+        self.assertEqual(set(rows), {'Acme', 'Otro, S.A.'})
+        self.assertEqual(Decimal(rows['Acme']['total_cost']), Decimal('125.50'))
+        self.assertEqual(rows['Otro, S.A.']['project_count'], '0')
+        self.assertEqual(Decimal(rows['Otro, S.A.']['total_cost']), Decimal('0'))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/api/v1/admin/exports/users.csv').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/admin/exports/tasks.xlsx').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/admin/exports/tasks.csv', {'client_id': 999}).status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/admin/exports/tasks.csv', {'start_date': 'ayer'}).status_code, 400)
+        self.client.force_authenticate(User.objects.create_user(username='normal'))
+        self.assertEqual(self.client.get('/api/v1/admin/exports/tasks.csv').status_code, 403)
+
+
+class DashboardBootstrapTests(APITestCase):
+    """
+    /api/v1/dashboard/bootstrap/ devuelve clientes, proyectos y tareas normalizados
+    con un número fijo de consultas, comprimido y con soporte de peticiones condicionales.
+    """
+    url = '/api/v1/dashboard/bootstrap/'
+
+    def setUp(self):
+        # Los ETag basados en la versión de los datos necesitan una caché compartida.
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed(3)
+
+    def _seed(self, count):
+        for i in range(count):
+            name = f'c{Client.objects.count()}'
+            client = Client.objects.create(
+                user=User.objects.create_user(username=name), business_name=name, is_active=bool(i % 2)
+            )
+            project = Project.objects.create(client=client, name=f'P{name}', initial_cost=Decimal('10.00'))
+            Task.objects.create(project=project, title='T', cost=Decimal('2.00'))
+
+    def test_normalized_payload_with_fixed_queries(self):
+        # Clientes, proyectos y tareas; la versión de los datos sale de la caché.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        data = response.data
+        self.assertEqual(len(data['clients']), 3)
+        self.assertEqual({c['is_active'] for c in data['clients'].values()}, {True, False})
+        project = data['projects'][0]
+        self.assertNotIn('client', project)
+        self.assertIn(str(project['client_id']), data['clients'])
+        self.assertEqual(project['total_cost'], Decimal('12.00'))
+        task = data['tasks'][0]
+        self.assertIn(task['project_id'], {p['id'] for p in data['projects']})
+        self.assertNotIn('client_name', task)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed(6)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['tasks']), 9)
+
+    def test_conditional_request_returns_304_until_data_changes(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(project=Project.objects.first(), title='Nueva')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip_when_accepted(self):
+        self._seed(20)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+
+class DashboardChangesTests(APITestCase):
+    """
+    /api/v1/dashboard/changes/ devuelve solo lo modificado desde la marca de agua,
+    las marcas de borrado y los totales de los padres afectados.
+    """
+    url = '/api/v1/dashboard/changes/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        self.acme = Client.objects.create(user=User.objects.create_user(username='acme'), business_name='Acme')
+        self.web = Project.objects.create(client=self.acme, name='Web', initial_cost=Decimal('100.00'))
+        self.app = Project.objects.create(client=self.acme, name='App')
+        self.task = Task.objects.create(project=self.web, title='Diseño', cost=Decimal('10.00'))
+        self.other_task = Task.objects.create(project=self.app, title='API', cost=Decimal('5.00'))
+        self.since = timezone.now()
+        # Lo creado antes de la marca de agua queda fuera del feed.
+        for model in (Client, Project, Task, ProjectRollup, ClientRollup):
+            model.objects.update(updated_at=self.since - timedelta(minutes=1))
+
+    def _changes(self, since=None):
+        response = self.client.get(self.url, {'since': (since or self.since).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_no_changes(self):
+        data = self._changes()
+        self.assertEqual((data['clients'], data['projects'], data['tasks']), ({}, [], []))
+        self.assertEqual(data['deleted'], {'client': [], 'project': [], 'task': []})
+        self.assertEqual(data['rollups'], {'projects': {}, 'clients': {}})
+        self.assertLess(data['watermark'], timezone.now())
+
+    def test_edited_user_includes_its_client(self):
+        user = self.acme.user
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        self.assertEqual(self._changes()['clients'], {})
+
+        user.email = 'nuevo@acme.com'
+        user.save()
+        data = self._changes()
+        self.assertEqual(list(data['clients']), [str(self.acme.id)])
+        self.assertEqual(data['clients'][str(self.acme.id)]['user']['email'], 'nuevo@acme.com')
+
+    def test_edited_task_includes_parent_rollups(self):
+        self.task.cost = Decimal('30.00')
+        self.task.save()
+        data = self._changes()
+        self.assertEqual([t['id'] for t in data['tasks']], [self.task.id])
+        self.assertEqual(data['tasks'][0]['project_id'], self.web.id)
+        self.assertEqual(data['projects'], [])
+        web = data['rollups']['projects'][str(self.web.id)]
+        self.assertEqual(web['extra_cost'], Decimal('30.00'))
+        self.assertEqual(web['total_cost'], Decimal('130.00'))
+        self.assertEqual(data['rollups']['clients'][str(self.acme.id)]['total_cost'], Decimal('135.00'))
+
+    def test_moved_task_refreshes_both_projects(self):
+        self.task.project = self.app
+        self.task.save()
+        data = self._changes()
+        self.assertEqual(set(data['rollups']['projects']), {str(self.web.id), str(self.app.id)})
+        self.assertEqual(data['rollups']['projects'][str(self.web.id)]['task_count'], 0)
+
+    def test_deletions_produce_tombstones(self):
+        task_ids, web_id = [self.task.id, self.other_task.id], self.web.id
+        self.other_task.delete()
+        response = self.client.delete('/api/v1/tasks/bulk/', {'ids': [self.task.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.web.delete()
+        data = self._changes()
+        self.assertEqual(sorted(data['deleted']['task']), sorted(task_ids))
+        self.assertEqual(data['deleted']['project'], [web_id])
+        self.assertEqual(data['rollups']['projects'][str(self.app.id)]['task_count'], 0)
+        self.assertEqual(data['rollups']['clients'][str(self.acme.id)]['total_cost'], Decimal('0.00'))
+
+    def test_invalid_or_expired_watermark(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'since': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'since': '2026-01-01T00:00:00'}).status_code, 400)
+        old = (timezone.now() - timedelta(days=60)).isoformat()
+        self.assertEqual(self.client.get(self.url, {'since': old}).status_code, 410)
+
+    def test_prune_tombstones(self):
+        self.task.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=60))
+        recent_id = self.other_task.id
+        self.other_task.delete()
+        call_command('prune_tombstones', stdout=StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [recent_id])
+
+
+class ValuesSerializerTests(APITestCase):
+    """
+    Los listados servidos desde values() producen exactamente el mismo JSON que los
+    serializers DRF originales.
+    """
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        acme = Client.objects.create(
+            user=User.objects.create_user(username='acme', email='acme@example.com', first_name='Ána'),
+            business_name='Acmé "Sur"', phone=None,
+        )
+        Client.objects.create(user=User.objects.create_user(username='archivado'), business_name='Viejo', is_active=False)
+        web = Project.objects.create(
+            client=acme, name='Web', initial_cost=None, currency='ARS', start_date=date(2026, 3, 1),
+            attachment='project_attachments/plan.pdf',
+        )
+        Project.objects.create(client=acme, name='App', initial_cost=Decimal('99.90'))
+        Task.objects.create(project=web, title='Diseño', cost=Decimal('12.345'), attachment='task_attachments/a.pdf')
+        Task.objects.create(project=web, title='Con fecha', due_date=date(2026, 5, 1), youtube_url='https://youtu.be/x')
+
+    def _assert_same_output(self, url, serializer_class, queryset):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        expected = serializer_class(queryset, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+    def test_lists_match_model_serializers(self):
+        web = Project.objects.get(name='Web')
+        cases = [
+            ('/api/v1/clients/', ClientSerializer, Client.objects.filter(is_active=True).order_by('-created_at', '-id')),
+            ('/api/v1/clients/archived/', ClientSerializer, Client.objects.filter(is_active=False).order_by('-created_at', '-id')),
+            ('/api/v1/projects/', ProjectSerializer, Project.objects.order_by('-created_at', '-id')),
+            ('/api/v1/tasks/', TaskSerializer, Task.objects.order_by('due_date', 'created_at', 'id')),
+            (f'/api/v1/projects/{web.id}/tasks/', TaskSerializer, web.tasks.order_by('created_at', 'id')),
+        ]
+        for url, serializer_class, queryset in cases:
+            with self.subTest(url=url):
+                self._assert_same_output(url, serializer_class, queryset)
+
+    def test_paginated_list_matches(self):
+        # La paginación deja las tareas sin fecha límite al final.
+        response = self.client.get('/api/v1/tasks/?page_size=1')
+        first = Task.objects.filter(title='Con fecha')
+        expected = TaskSerializer(first, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(response.data['results'], expected)
+        second = self.client.get(response.data['next']).data['results']
+        self.assertEqual(second[0]['title'], 'Diseño')
+
+    def test_benchmark_command_checks_identical_output(self):
+        out = StringIO()
+        call_command('benchmark_serializers', rows=30, repeat=1, stdout=out)
+        self.assertIn('idénticas', out.getvalue())
+
+
+class FieldSelectionTests(APITestCase):
+    """
+    ?fields= y ?expand= reducen la respuesta y también la consulta: los campos que no
+    se piden no se calculan ni generan JOIN.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        acme = Client.objects.create(user=User.objects.create_user(username='acme'), business_name='Acme')
+        self.web = Project.objects.create(client=acme, name='Web', initial_cost=Decimal('100.00'))
+        Task.objects.create(project=self.web, title='Diseño', cost=Decimal('10.00'))
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [query['sql'] for query in queries]
+
+    def test_fields_drop_joins_from_list_and_detail(self):
+        for url in ('/api/v1/projects/?fields=id,name', f'/api/v1/projects/{self.web.id}/?fields=name'):
+            with self.subTest(url=url):
+                data, sql = self._get(url)
+                item = data[0] if isinstance(data, list) else data
+                self.assertEqual(item, {'id': self.web.id, 'name': 'Web'})
+                self.assertEqual(len(sql), 1)
+                self.assertNotIn('JOIN', sql[0])
+
+    def test_unexpanded_relations_return_ids(self):
+        data, sql = self._get('/api/v1/projects/?expand=&fields=id,client,total_cost')
+        self.assertEqual(data, [{'id': self.web.id, 'client': self.web.client_id, 'total_cost': 110.0}])
+        self.assertNotIn('clients_client', sql[0])
+
+        data, _ = self._get('/api/v1/tasks/?fields=id,title&expand=')
+        self.assertEqual(data[0], {'id': self.web.tasks.get().id, 'title': 'Diseño'})
+
+    def test_nested_fields_and_expand(self):
+        url = '/api/v1/projects/?fields=id,client.business_name,client.user&expand=client'
+        data, sql = self._get(url)
+        self.assertEqual(data[0]['client'], {
+            'id': self.web.client_id, 'business_name': 'Acme', 'user': self.web.client.user_id,
+        })
+        self.assertNotIn('auth_user', sql[0])
+        # El detalle (ModelSerializer) devuelve lo mismo que el listado (values()).
+        detail, _ = self._get(url.replace('/projects/?', f'/projects/{self.web.id}/?'))
+        self.assertEqual(detail, data[0])
+
+    def test_fields_with_cursor_pagination(self):
+        # El orden (created_at en proyectos, due_date en tareas) no está entre los
+        # campos pedidos, pero el cursor lo necesita para la página siguiente.
+        Project.objects.create(client=self.web.client, name='App')
+        Project.objects.create(client=self.web.client, name='Tienda')
+        for day in (3, 1, 2):
+            Task.objects.create(project=self.web, title=f'Día {day}', due_date=date(2026, 1, day))
+
+        for url, field, expected in (
+            ('/api/v1/projects/?page_size=2&fields=name', 'name', ['Tienda', 'App', 'Web']),
+            ('/api/v1/tasks/?page_size=2&fields=title', 'title', ['Día 1', 'Día 2', 'Día 3', 'Diseño']),
+        ):
+            with self.subTest(url=url):
+                seen = []
+                while url:
+                    data, _ = self._get(url)
+                    self.assertTrue(all(set(item) == {'id', field} for item in data['results']))
+                    seen += [item[field] for item in data['results']]
+                    url = data['next']
+                self.assertEqual(seen, expected)
+
+    def test_writes_and_bootstrap_return_full_shape(self):
+        response = self.client.patch(f'/api/v1/projects/{self.web.id}/?fields=id', {'name': 'Web 2'})
+        self.assertIn('total_cost', response.data)
+        data, _ = self._get('/api/v1/dashboard/bootstrap/?fields=id')
+        self.assertIn('business_name', data['clients'][str(self.web.client_id)])
+
+
+class RequestMetricsTests(APITestCase):
+    """
+    El middleware acumula latencia, consultas y tamaño por endpoint, y
+    /api/v1/metrics/ los expone en formato Prometheus.
+    """
+
+    def setUp(self):
+        instrumentation.reset()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        user = User.objects.create_user('cliente', 'cliente@example.com', 'secret')
+        self.client_user = user
+        client = Client.objects.create(user=user, business_name='Cliente', contact_name='Cliente')
+        Project.objects.create(client=client, name='Web', initial_cost=Decimal('100.00'))
+
+    def test_records_requests_per_url_name(self):
+        self.client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/v1/projects/')
+        # Cada petición vacía connection.queries: se cuenta antes de la siguiente.
+        query_count = len(queries)
+        self.client.get('/api/v1/projects/')
+        self.client.get('/no-existe/')
+
+        stats = instrumentation.snapshot()
+        project_list = stats['project-list|GET']
+        self.assertEqual(project_list['statuses'], {'200': 2})
+        self.assertEqual(project_list['db_queries_per_request']['sum'], 2 * query_count)
+        self.assertEqual(sum(project_list['http_request_duration_seconds']['buckets']), 2)
+        self.assertGreater(project_list['http_response_size_bytes']['sum'], 0)
+        self.assertEqual(stats['<unresolved>|GET']['statuses'], {'404': 1})
+
+    def test_prometheus_endpoint(self):
+        self.client.force_authenticate(self.admin)
+        self.client.get('/api/v1/projects/')
+        response = self.client.get('/api/v1/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('portal_http_requests_total{view="project-list",method="GET",status="200"} 1', body)
+        self.assertIn('# TYPE portal_http_request_duration_seconds histogram', body)
+        self.assertIn('portal_db_queries_per_request_bucket{view="project-list",method="GET",le="+Inf"} 1', body)
+        self.assertIn('portal_http_response_size_bytes_count{view="project-list",method="GET"} 1', body)
+
+    def test_metrics_require_staff_or_token(self):
+        self.client.force_authenticate(self.client_user)
+        self.assertEqual(self.client.get('/api/v1/metrics/').status_code, 403)
+        self.client.force_authenticate(None)
+        with self.settings(METRICS_TOKEN='prometheus-secret'):
+            self.assertEqual(self.client.get('/api/v1/metrics/').status_code, 401)
+            response = self.client.get('/api/v1/metrics/', HTTP_AUTHORIZATION='Bearer prometheus-secret')
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get('/api/v1/metrics/', HTTP_AUTHORIZATION='Bearer otro')
+            self.assertEqual(response.status_code, 401)
+
+    def test_server_timing_header(self):
+        self.client.force_authenticate(self.admin)
+        self.assertNotIn('Server-Timing', self.client.get('/api/v1/projects/'))
+        with self.settings(SERVER_TIMING=True):
+            response = self.client.get('/api/v1/projects/')
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ consultas"$')
+
+    def test_metrics_from_other_processes_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.client.force_authenticate(self.admin)
+        with self.settings(REQUEST_METRICS_DIR=directory):
+            self.client.get('/api/v1/projects/')
+            other = instrumentation.snapshot()
+            metrics_store.write(os.path.join(directory, '999999.json'), other)
+            metrics_store.archive_process(directory, 999999)
+            metrics_store.write(os.path.join(directory, '999998.json'), other)
+            self.client.get('/api/v1/projects/')
+            totals = instrumentation.collect()
+        self.assertEqual(sorted(os.listdir(directory)), sorted(['archived.json', '999998.json', f'{os.getpid()}.json']))
+        # 2 de este proceso + 1 archivado + 1 del otro worker.
+        self.assertEqual(totals['project-list|GET']['statuses'], {'200': 4})
+
+
+class QueryInspectorTests(QueryBudgetMixin, APITestCase):
+    """
+    El detector agrupa las consultas por forma, señala las repetidas (N+1) con el
+    código que las lanzó y guarda el plan de las lentas.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(self.admin)
+        for i in range(6):
+            user = User.objects.create_user(username=f'cliente{i}')
+            client = Client.objects.create(user=user, business_name=f'Cliente {i}')
+            project = Project.objects.create(client=client, name=f'P{i}', initial_cost=Decimal('100.00'))
+            Task.objects.create(project=project, title='T', cost=Decimal('10.00'))
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            query_inspector.fingerprint('SELECT * FROM t WHERE id = 1 AND name = \'a\''),
+            query_inspector.fingerprint('SELECT  *  FROM t WHERE id = 25 AND name = \'b c\''),
+        )
+        self.assertEqual(
+            query_inspector.normalize('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+        self.assertNotEqual(query_inspector.fingerprint('SELECT a FROM t'), query_inspector.fingerprint('SELECT b FROM t'))
+
+    def test_loop_over_rows_is_reported_with_callsite(self):
+        with query_inspector.inspect_queries() as inspector:
+            for project in Project.objects.all():
+                project.tasks.aggregate(total=Count('id'))
+        repeated = inspector.repeated()
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0]['count'], 6)
+        self.assertIn('projects/tests.py', repeated[0]['callsites'][0])
+
+    def test_slow_reads_get_a_plan_and_are_logged(self):
+        query_inspector._explained.clear()
+        # En los tests DEBUG es False, así que el detector y EXPLAIN están desactivados por defecto.
+        with self.settings(QUERY_INSPECTOR_ENABLED=True, QUERY_EXPLAIN_SLOW=True, SLOW_QUERY_THRESHOLD_MS=0), \
+                self.assertLogs(query_inspector.logger, 'WARNING') as logs:
+            self.client.get('/api/v1/projects/')
+        report = json.loads(logs.records[0].getMessage())
+        self.assertEqual(report['label'], 'GET /api/v1/projects/')
+        plans = [query['plan'] for query in report['slow'] if query['sql'].startswith('SELECT')]
+        self.assertTrue(plans and all(plans))
+
+    def test_budget_helper_fails_on_repeated_queries(self):
+        with self.assertRaises(AssertionError) as failure:
+            with self.assertQueryBudget(20):
+                for project in Project.objects.all():
+                    project.tasks.count()
+        self.assertIn('posible N+1', str(failure.exception))
+
+    def test_key_endpoints_stay_within_budget(self):
+        budgets = {
+            '/api/v1/projects/': 1,
+            '/api/v1/clients/': 1,
+            '/api/v1/tasks/': 1,
+            f'/api/v1/projects/{Project.objects.first().pk}/': 1,
+            # Un bloque de métricas por consulta, sin importar cuántos clientes haya.
+            '/api/v1/admin/metrics/': 9,
+        }
+        for url, budget in budgets.items():
+            cache.clear()
+            with self.subTest(url=url), self.assertQueryBudget(budget):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ProfilingTests(APITestCase):
+    """?__profile= devuelve el perfil de la petición a los administradores, y a nadie más."""
+
+    url = '/api/v1/projects/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.user = User.objects.create_user('cliente', 'cliente@example.com', 'secret')
+        client = Client.objects.create(user=self.user, business_name='Cliente', contact_name='Cliente')
+        Project.objects.create(client=client, name='Web', initial_cost=Decimal('100.00'))
+
+    def _login(self, username):
+        response = self.client.post('/api/v1/token/', {'username': username, 'password': 'secret'})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+
+    def test_sql_timeline(self):
+        self._login('admin')
+        response = self.client.get(f'{self.url}?__profile=sql')
+        data = response.json()
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['query_count'], len(data['queries']))
+        query = data['queries'][-1]
+        self.assertIn('projects_project', query['sql'])
+        self.assertGreaterEqual(query['start_ms'], 0)
+
+    def test_cpu_and_pstats(self):
+        self._login('admin')
+        response = self.client.get(f'{self.url}?__profile=cpu')
+        self.assertIn('cumulative', response.content.decode())
+        self.assertIn('-> 200', response.content.decode())
+
+        response = self.client.get(f'{self.url}?__profile=pstats')
+        self.assertIn('.prof"', response['Content-Disposition'])
+        path = os.path.join(tempfile.mkdtemp(), 'profile.prof')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'wb') as file:
+            file.write(response.content)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_flame_returns_collapsed_stacks(self):
+        self._login('admin')
+        with self.settings(PROFILE_SAMPLE_INTERVAL=0.0001):
+            response = self.client.get(f'{self.url}?__profile=flame')
+        self.assertIn('.collapsed"', response['Content-Disposition'])
+        lines = response.content.decode().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r'^.+ \d+$')
+
+    def test_ignored_for_non_staff_and_unknown_modes(self):
+        self._login('cliente')
+        response = self.client.get(f'{self.url}?__profile=sql')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self._login('admin')
+        self.assertIsInstance(self.client.get(f'{self.url}?__profile=otro').data, list)
+
+
+class BenchmarkDatasetTests(TestCase):
+    """generate_dataset crea datos reproducibles y run_benchmarks mide los endpoints sobre ellos."""
+
+    def _generate(self, **options):
+        options = {'clients': 5, 'projects': 40, 'tasks': 400, 'batch_size': 100, 'end_date': '2026-06-30', **options}
+        call_command('generate_dataset', stdout=StringIO(), **options)
+
+    def _snapshot(self):
+        return list(Task.objects.order_by('created_at', 'title').values_list(
+            'project__client__business_name', 'title', 'status', 'cost', 'due_date', 'created_at',
+        ))
+
+    def test_generates_requested_volume_with_consistent_rollups(self):
+        self._generate()
+
+        self.assertEqual(Client.objects.count(), 5)
+        self.assertEqual(Project.objects.count(), 40)
+        self.assertEqual(Task.objects.count(), 400)
+        self.assertEqual(rebuild_rollups(verify_only=True), [])
+        self.assertEqual(set(Project.objects.values_list('currency', flat=True)), {'USD', 'ARS'})
+        self.assertTrue(Task.objects.filter(cost=0).exists())
+        self.assertTrue(Task.objects.filter(cost__gt=0).exists())
+        # Las fechas se reparten en el pasado y cada tarea es posterior a su proyecto.
+        self.assertLess(Project.objects.earliest('created_at').created_at.date(), date(2026, 1, 1))
+        self.assertFalse(Task.objects.filter(created_at__lt=F('project__created_at')).exists())
+        # Distribución sesgada: el cliente con más proyectos tiene más que el reparto uniforme.
+        counts = Client.objects.annotate(n=Count('projects')).values_list('n', flat=True)
+        self.assertGreater(max(counts), 40 / 5)
+
+    def test_same_seed_produces_same_data(self):
+        self._generate(seed=7)
+        first = self._snapshot()
+        self._generate(seed=7, clear=True)
+
+        self.assertEqual(self._snapshot(), first)
+        self.assertEqual(Task.objects.count(), 400)
+        self._generate(seed=8, clear=True)
+        self.assertNotEqual(self._snapshot(), first)
+
+    def test_refuses_to_mix_with_previous_generation(self):
+        self._generate()
+        with self.assertRaises(CommandError):
+            self._generate()
+
+    def test_benchmark_writes_percentiles_and_query_counts(self):
+        self._generate()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'benchmark.json')
+
+        call_command('run_benchmarks', iterations=2, warmup=0, output=output, stdout=StringIO())
+        with open(output, encoding='utf-8') as source:
+            report = json.load(source)
+
+        self.assertEqual(report['meta']['dataset'], {'clients': 5, 'projects': 40, 'tasks': 400})
+        self.assertIn('metrics.week.cold', report['results'])
+        for name, result in report['results'].items():
+            self.assertEqual(result['statuses'], {'200': 2}, name)
+            self.assertLessEqual(result['ms']['p50'], result['ms']['p99'])
+        self.assertGreater(report['results']['metrics.month.cold']['queries'], 0)
+        self.assertEqual(report['results']['metrics.month.warm']['queries'], 0)
+
+        with self.assertRaises(CommandError):
+            call_command('run_benchmarks', iterations=1, warmup=0, compare=output,
+                         max_regression=-100, stdout=StringIO())
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ProjectViewSet
-from .admin_views import admin_dashboard_metrics
+from .admin_views import admin_dashboard_metrics, admin_dashboard_cache_stats, admin_export
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
@@ -9,4 +9,6 @@ router.register(r'projects', ProjectViewSet, basename='project')
 urlpatterns = [
     path('', include(router.urls)),
     path('admin/metrics/', admin_dashboard_metrics, name='admin-dashboard-metrics'),
+    path('admin/metrics/cache-stats/', admin_dashboard_cache_stats, name='admin-dashboard-cache-stats'),
+    path('admin/exports/<str:resource>.<str:file_format>', admin_export, name='admin-export'),
 ]
\ No newline at end of file
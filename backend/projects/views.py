@@ -2,11 +2,13 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
+from portal_sandoval_project.conditional import ConditionalGetMixin, conditional_get
+from portal_sandoval_project.fast_serializers import ValuesListMixin, ValuesSerializer
 from .models import Project
 from .serializers import ProjectSerializer
 from tasks.serializers import TaskSerializer
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver y gestionar proyectos.
     """
@@ -19,10 +21,23 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Por ahora, el administrador puede ver todos los proyectos.
         # Más adelante, un cliente solo podrá ver los suyos.
-        return Project.objects.all().order_by('-created_at')
+        # Los totales de costes y tareas se leen de las tablas precalculadas
+        # (ProjectRollup / ClientRollup) en el mismo JOIN, así que el listado cuesta
+        # una sola consulta sin importar cuántos proyectos haya.
+        # Con ?fields= o ?expand= solo se hacen los JOIN que usan los campos pedidos.
+        return self.select_related_fields(
+            Project.objects.order_by('-created_at', '-id'), 'client', 'client__user', 'client__rollup', 'rollup'
+        )
+
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        # Los totales del cliente se actualizan en la base de datos al guardar;
+        # volvemos a leer el proyecto para que la respuesta los refleje.
+        serializer.instance = self.get_queryset().get(pk=instance.pk)
 
     # Le decimos a esta acción que ahora también acepta peticiones POST.
     @action(detail=True, methods=['get', 'post'])
+    @conditional_get()
     def tasks(self, request, pk=None):
         """
         GET: Devuelve una lista de todas las tareas para un proyecto específico.
@@ -32,10 +47,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
 
         if request.method == 'GET':
-            tasks = project.tasks.all().order_by('created_at')
             # Pasamos el contexto para que el serializador pueda construir URLs completas para los archivos.
-            serializer = TaskSerializer(tasks, many=True, context={'request': request})
-            return Response(serializer.data)
+            fast = ValuesSerializer(TaskSerializer, context={'request': request})
+            tasks = fast.values(project.tasks.order_by('created_at', 'id'))
+            page = self.paginate_queryset(tasks)
+            if page is not None:
+                return self.get_paginated_response(fast.many(page))
+            return Response(fast.many(tasks))
 
         elif request.method == 'POST':
             # Creamos una instancia del serializador de Tareas con los datos que vienen del formulario.
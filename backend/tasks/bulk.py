@@ -0,0 +1,163 @@
+"""
+Altas, ediciones y borrados masivos de tareas.
+
+Cada operación valida todos los elementos antes de escribir (resolviendo los
+proyectos referenciados con una sola consulta), escribe con bulk_create /
+bulk_update / un único DELETE dentro de una transacción, y actualiza los totales
+precalculados, la caché del panel y las marcas de borrado una sola vez.
+
+Si algún elemento no es válido no se escribe nada y se devuelve la lista de
+errores indicando la posición (`index`) de cada elemento rechazado.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from projects.metrics_cache import bump_data_version
+from projects.models import Project
+from projects.rollups import apply_task_changes, suspend_signal_handlers
+from projects.sync import record_deletions
+from .models import Task
+from .serializers import BulkTaskSerializer
+
+MAX_BULK_ITEMS = 1000
+
+
+def _check_items(items):
+    if not isinstance(items, list) or not items:
+        raise serializers.ValidationError({'detail': 'Se esperaba una lista de tareas no vacía.'})
+    if len(items) > MAX_BULK_ITEMS:
+        raise serializers.ValidationError({
+            'detail': f'Se admiten como máximo {MAX_BULK_ITEMS} tareas por petición.'
+        })
+
+
+def _to_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_ids(values):
+    return {pk for pk in map(_to_id, values) if pk is not None}
+
+
+def _load_projects(project_ids):
+    """Carga de una vez todos los proyectos referenciados (con su cliente, para la respuesta)."""
+    return Project.objects.select_related('client').in_bulk(_to_ids(project_ids))
+
+
+def _raise_if_errors(errors):
+    if errors:
+        raise serializers.ValidationError({'errors': errors})
+
+
+def bulk_create_tasks(items, context):
+    """Crea todas las tareas de `items` (lista de dicts con 'project') o ninguna."""
+    _check_items(items)
+    projects = _load_projects(item.get('project') for item in items if isinstance(item, dict))
+    context = {**context, 'bulk_projects': projects}
+
+    validated, errors = [], []
+    for index, item in enumerate(items):
+        serializer = BulkTaskSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            errors.append({'index': index, 'errors': serializer.errors})
+        elif 'project' not in serializer.validated_data:
+            errors.append({'index': index, 'errors': {'project': ['Este campo es obligatorio.']}})
+        else:
+            validated.append(serializer.validated_data)
+    _raise_if_errors(errors)
+
+    tasks = [Task(**data) for data in validated]
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=500)
+        apply_task_changes(added=[(task.project_id, task.cost, task.status) for task in tasks])
+        transaction.on_commit(bump_data_version)
+    return tasks
+
+
+def bulk_update_tasks(items, context):
+    """Edita parcialmente las tareas de `items` (lista de dicts con 'id') o ninguna."""
+    _check_items(items)
+    dict_items = [item for item in items if isinstance(item, dict)]
+
+    with transaction.atomic():
+        tasks = Task.objects.select_for_update().in_bulk(_to_ids(item.get('id') for item in dict_items))
+        projects = _load_projects(
+            [item.get('project') for item in dict_items if 'project' in item]
+            + [task.project_id for task in tasks.values()]
+        )
+        context = {**context, 'bulk_projects': projects}
+
+        pending, errors, seen = [], [], set()
+        for index, item in enumerate(items):
+            task_id = item.get('id') if isinstance(item, dict) else None
+            task = tasks.get(_to_id(task_id))
+            if task is None:
+                errors.append({'index': index, 'errors': {'id': [f'No existe una tarea con ID {task_id!r}.']}})
+                continue
+            if task.pk in seen:
+                errors.append({'index': index, 'errors': {'id': ['La tarea aparece más de una vez en la petición.']}})
+                continue
+            seen.add(task.pk)
+            serializer = BulkTaskSerializer(task, data=item, partial=True, context=context)
+            if serializer.is_valid():
+                pending.append((task, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        _raise_if_errors(errors)
+
+        previous = [(task.project_id, task.cost, task.status) for task, _ in pending]
+        now = timezone.now()
+        fields = {'updated_at'}
+        for task, data in pending:
+            for attr, value in data.items():
+                setattr(task, attr, value)
+            fields.update(data.keys())
+            task.updated_at = now
+
+        updated = [task for task, _ in pending]
+        Task.objects.bulk_update(updated, sorted(fields), batch_size=500)
+        apply_task_changes(
+            removed=previous,
+            added=[(task.project_id, task.cost, task.status) for task in updated],
+        )
+        transaction.on_commit(bump_data_version)
+
+    # Dejamos el proyecto (con su cliente) en caché para serializar la respuesta sin más consultas.
+    for task in updated:
+        task.project = projects[task.project_id]
+    return updated
+
+
+def bulk_delete_tasks(ids):
+    """Borra las tareas indicadas o ninguna si alguna no existe. Devuelve cuántas se borraron."""
+    if not isinstance(ids, list) or not ids:
+        raise serializers.ValidationError({'ids': ['Se esperaba una lista de IDs no vacía.']})
+    if len(ids) > MAX_BULK_ITEMS:
+        raise serializers.ValidationError({
+            'ids': [f'Se admiten como máximo {MAX_BULK_ITEMS} IDs por petición.']
+        })
+    task_ids = _to_ids(ids)
+
+    with transaction.atomic():
+        rows = list(
+            Task.objects.select_for_update().filter(pk__in=task_ids)
+            .values_list('pk', 'project_id', 'cost', 'status')
+        )
+        missing = sorted(task_ids - {row[0] for row in rows})
+        invalid = [value for value in ids if _to_id(value) is None]
+        if missing or invalid:
+            raise serializers.ValidationError({
+                'ids': [f'No existen tareas con los IDs: {", ".join(map(str, missing + invalid))}.']
+            })
+
+        # Las señales por fila quedan en pausa: los totales se ajustan una sola vez abajo.
+        with suspend_signal_handlers():
+            Task.objects.filter(pk__in=task_ids).delete()
+        apply_task_changes(removed=[row[1:] for row in rows])
+        record_deletions(Task, [row[0] for row in rows])
+        transaction.on_commit(bump_data_version)
+    return len(rows)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:49
+
+import portal_sandoval_project.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_sync_changes_feed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='attachment',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=portal_sandoval_project.storage.attachment_storage, upload_to='task_attachments/', verbose_name='Archivo Adjunto'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from portal_sandoval_project.storage import attachment_storage
 from projects.models import Project
 
 class Task(models.Model):
@@ -16,10 +17,37 @@ class Task(models.Model):
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='PENDIENTE')
     # Añadimos un valor por defecto de 0.00 para evitar errores al crear tareas sin coste.
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    attachment = models.FileField(upload_to='task_attachments/', blank=True, null=True, verbose_name='Archivo Adjunto')
+    attachment = models.FileField(
+        upload_to='task_attachments/', storage=attachment_storage, max_length=255,
+        blank=True, null=True, verbose_name='Archivo Adjunto'
+    )
     youtube_url = models.URLField(max_length=255, blank=True, null=True, verbose_name='URL de YouTube')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Orden del listado general de tareas y de las tareas de un proyecto
+            # (paginación por cursor).
+            models.Index(fields=['due_date', 'created_at', 'id'], name='task_due_created_idx'),
+            models.Index(fields=['project', 'created_at', 'id'], name='task_project_created_idx'),
+            # Filtros por período del panel administrativo (created_at en un rango).
+            models.Index(fields=['created_at'], name='task_created_idx'),
+            # Histograma de estados del período.
+            models.Index(fields=['status', 'created_at'], name='task_status_created_idx'),
+            # Conteos de tareas con y sin coste por proyecto.
+            models.Index(fields=['project', 'cost'], name='task_project_cost_idx'),
+            # Índice parcial con solo las tareas que tienen coste, para sumas y conteos por proyecto.
+            models.Index(fields=['project'], name='task_costed_project_idx', condition=models.Q(cost__gt=0)),
+            # Feed de cambios (projects/sync.py).
+            models.Index(fields=['updated_at'], name='task_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Guardamos la tarea y los totales precalculados de su proyecto y cliente
+        # (ver projects/rollups.py) dentro de la misma transacción.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
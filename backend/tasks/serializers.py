@@ -1,8 +1,28 @@
 from rest_framework import serializers
 from .models import Task
 from projects.models import Project
+from portal_sandoval_project.field_selection import FieldSelectionMixin
 
-class TaskSerializer(serializers.ModelSerializer):
+class ProjectPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Igual que PrimaryKeyRelatedField, pero si el contexto trae los proyectos ya
+    cargados (`bulk_projects`, un dict {id: proyecto}) los busca ahí en lugar de
+    hacer una consulta por cada tarea. Lo usan las operaciones masivas.
+    """
+
+    def to_internal_value(self, data):
+        projects = self.context.get('bulk_projects')
+        if projects is None:
+            return super().to_internal_value(data)
+        try:
+            return projects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class TaskSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Task.
     Distingue entre lectura (mostrando project_name) y escritura (aceptando project ID).
@@ -14,7 +34,7 @@ class TaskSerializer(serializers.ModelSerializer):
 
     # Para ESCRIBIR: Aceptamos un simple ID de proyecto.
     # El campo en el formulario se debe llamar 'project'.
-    project = serializers.PrimaryKeyRelatedField(
+    project = ProjectPrimaryKeyField(
         queryset=Project.objects.all(), write_only=True, label="ID del Proyecto", required=False
     )
 
@@ -26,3 +46,11 @@ class TaskSerializer(serializers.ModelSerializer):
             'due_date', 'status', 'cost', 'attachment', 
             'youtube_url', 'created_at', 'updated_at'
         ]
+
+
+class BulkTaskSerializer(TaskSerializer):
+    """
+    Serializer de cada elemento en las operaciones masivas (JSON).
+    Los adjuntos no se pueden enviar en lote: se suben tarea por tarea.
+    """
+    attachment = serializers.FileField(read_only=True)
@@ -1,3 +1,488 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
\ No newline at end of file
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.test import APITestCase
+
+from clients.models import Client
+from portal_sandoval_project.storage import collect_garbage
+from projects.models import Project, ChunkedUpload
+from projects.rollups import rebuild_rollups
+from .models import Task
+
+
+class TaskCursorPaginationTests(APITestCase):
+    """
+    La paginación por cursor recorre todas las tareas en el orden del listado
+    (due_date, created_at, id), sin duplicar ni saltar filas.
+    """
+
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(admin)
+        user = User.objects.create_user(username='cliente')
+        client = Client.objects.create(user=user, business_name='Cliente', contact_name='Cliente')
+        self.project = Project.objects.create(client=client, name='Proyecto')
+        today = date(2026, 1, 1)
+        # Varias tareas comparten fecha límite y otras no tienen, para probar empates y NULL.
+        for i in range(11):
+            due_date = None if i % 4 == 0 else today + timedelta(days=i % 3)
+            Task.objects.create(project=self.project, title=f'T{i}', due_date=due_date, cost=Decimal('1.00'))
+
+    def _expected_ids(self):
+        tasks = list(Task.objects.all())
+        tasks.sort(key=lambda t: (t.due_date is None, t.due_date or date.min, t.created_at, t.id))
+        return [t.id for t in tasks]
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get('/api/v1/tasks/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 11)
+
+    def test_walks_every_task_once_in_order(self):
+        self.assertEqual(self._walk('/api/v1/tasks/?page_size=3'), self._expected_ids())
+
+    def test_cursor_is_stable_under_inserts(self):
+        first_page = self.client.get('/api/v1/tasks/?page_size=4').data
+        seen = [item['id'] for item in first_page['results']]
+        # Una tarea nueva que cae antes del cursor no desplaza las páginas siguientes.
+        Task.objects.create(project=self.project, title='Nueva', due_date=date(2020, 1, 1))
+        seen.extend(self._walk(first_page['next']))
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, [pk for pk in self._expected_ids() if Task.objects.get(pk=pk).title != 'Nueva'])
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get('/api/v1/tasks/?page_size=4').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([t['id'] for t in back['results']], [t['id'] for t in first['results']])
+        self.assertIsNone(back['previous'])
+
+    def test_project_tasks_action_is_paginated(self):
+        ids = self._walk(f'/api/v1/projects/{self.project.id}/tasks/?page_size=5')
+        self.assertEqual(ids, list(Task.objects.order_by('created_at', 'id').values_list('id', flat=True)))
+
+
+class BulkTaskTests(APITestCase):
+    """
+    /api/v1/tasks/bulk/ crea, edita y borra muchas tareas en una sola transacción,
+    con un número de consultas que no depende de cuántas sean, y mantiene los
+    totales precalculados.
+    """
+    url = '/api/v1/tasks/bulk/'
+
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_authenticate(admin)
+        client = Client.objects.create(user=User.objects.create_user(username='cliente'), business_name='Cliente')
+        self.first = Project.objects.create(client=client, name='Primero')
+        self.second = Project.objects.create(client=client, name='Segundo')
+
+    def _items(self, count):
+        return [
+            {'project': (self.first if i % 2 else self.second).id, 'title': f'T{i}', 'cost': '2.50', 'status': 'EN_PROGRESO'}
+            for i in range(count)
+        ]
+
+    def test_create_keeps_rollups_consistent(self):
+        response = self.client.post(self.url, self._items(6), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[1]['project_name'], 'Primero')
+        self.assertEqual(response.data[0]['client_name'], 'Cliente')
+        self.assertEqual(Task.objects.count(), 6)
+        self.assertEqual(rebuild_rollups(verify_only=True), [])
+        self.first.rollup.refresh_from_db()
+        self.assertEqual(self.first.rollup.task_cost, Decimal('7.50'))
+        self.assertEqual(self.first.rollup.tasks_in_progress, 3)
+
+    def test_query_count_does_not_grow_with_items(self):
+        # Proyectos, inserción y dos UPDATE de totales por proyecto afectado (aquí, dos).
+        with self.assertNumQueries(8) as small:
+            self.client.post(self.url, self._items(2), format='json')
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.post(self.url, self._items(40), format='json')
+
+    def test_invalid_item_rejects_whole_batch(self):
+        items = self._items(3)
+        items[1]['project'] = 99999
+        items[2]['status'] = 'INVENTADO'
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], ['1', '2'])
+        self.assertIn('project', response.data['errors'][0]['errors'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_update_moves_tasks_between_projects(self):
+        tasks = [Task.objects.create(project=self.first, title=f'T{i}', cost=Decimal('1.00')) for i in range(3)]
+        payload = [{'id': task.id, 'project': self.second.id, 'status': 'COMPLETADA'} for task in tasks[:2]]
+        response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({item['project_name'] for item in response.data}, {'Segundo'})
+        self.assertEqual(self.second.tasks.filter(status='COMPLETADA').count(), 2)
+        self.assertEqual(rebuild_rollups(verify_only=True), [])
+
+    def test_update_with_unknown_id_changes_nothing(self):
+        task = Task.objects.create(project=self.first, title='T', cost=Decimal('1.00'))
+        response = self.client.patch(self.url, [{'id': task.id, 'title': 'Nuevo'}, {'id': 99999, 'title': 'X'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], '1')
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'T')
+
+    def test_delete(self):
+        tasks = [Task.objects.create(project=self.first, title=f'T{i}', cost=Decimal('3.00')) for i in range(4)]
+        response = self.client.delete(self.url, {'ids': [task.id for task in tasks[:3]]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'deleted': 3})
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [tasks[3].id])
+        self.assertEqual(rebuild_rollups(verify_only=True), [])
+
+        response = self.client.delete(self.url, {'ids': [tasks[3].id, 99999]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Task.objects.filter(pk=tasks[3].id).exists())
+
+
+class TaskConditionalGetTests(APITestCase):
+    """
+    Los listados y detalles devuelven ETag / Last-Modified y responden 304 sin
+    consultar la base de datos mientras no cambien los datos.
+    """
+
+    def setUp(self):
+        # Los ETag basados en la versión de los datos necesitan una caché compartida.
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        client = Client.objects.create(user=User.objects.create_user(username='cliente'), business_name='Cliente')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = Project.objects.create(client=client, name='Proyecto')
+            self.task = Task.objects.create(project=self.project, title='T', cost=Decimal('1.00'))
+
+    def test_user_edit_invalidates_client_validators(self):
+        client = Client.objects.get()
+        url = f'/api/v1/clients/{client.id}/'
+        etag = self.client.get(url)['ETag']
+        # Un login no cambia la respuesta.
+        with self.captureOnCommitCallbacks(execute=True):
+            client.user.last_login = timezone.now()
+            client.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.user.username = 'renombrado'
+            client.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['username'], 'renombrado')
+
+    def test_no_validators_with_process_local_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            response = self.client.get('/api/v1/tasks/')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+            response = self.client.get('/api/v1/tasks/', HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, 200)
+
+    def test_list_and_detail_return_304_without_queries(self):
+        for url in ('/api/v1/tasks/', f'/api/v1/tasks/{self.task.id}/', f'/api/v1/projects/{self.project.id}/tasks/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response)
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_query_string(self):
+        first = self.client.get('/api/v1/tasks/')
+        paginated = self.client.get('/api/v1/tasks/?page_size=1', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(paginated.status_code, 200)
+
+    def test_writes_invalidate_validators(self):
+        response = self.client.get('/api/v1/tasks/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/v1/tasks/{self.task.id}/', {'title': 'Nuevo'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+        response = self.client.get('/api/v1/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['title'], 'Nuevo')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertGreaterEqual(parse_http_date(response['Last-Modified']), parse_http_date(last_modified))
+
+
+class AttachmentDownloadTests(APITestCase):
+    """
+    Los adjuntos se descargan comprobando permisos, con Range en Django o delegando
+    el envío al proxy con X-Accel-Redirect / X-Sendfile.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE_BACKEND='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.owner = User.objects.create_user(username='duenio')
+        self.other = User.objects.create_user(username='otro')
+        project = Project.objects.create(
+            client=Client.objects.create(user=self.owner, business_name='Dueño'), name='Proyecto'
+        )
+        self.task = Task.objects.create(project=project, title='Con adjunto')
+        self.task.attachment.save('video.mp4', ContentFile(b'0123456789'))
+        self.url = f'/api/v1/files/task/{self.task.id}/'
+
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_ranges(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(self._content(response), b'0123456789')
+
+        cases = [('bytes=2-5', b'2345', 'bytes 2-5/10'), ('bytes=7-', b'789', 'bytes 7-9/10'), ('bytes=-3', b'789', 'bytes 7-9/10')]
+        for header, body, content_range in cases:
+            with self.subTest(range=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(int(response['Content-Length']), len(body))
+                self.assertEqual(self._content(response), body)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        # Un If-Range que no coincide con la versión actual devuelve el archivo completo.
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"viejo"')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_permissions_and_signed_links(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_authenticate(self.owner)
+        link = self.client.get(self.url + 'link/').data['url']
+        self.client.force_authenticate(None)
+        self.assertEqual(self._content(self.client.get(link)), b'0123456789')
+        # La firma solo vale para ese adjunto.
+        other_url = link.replace(f'/task/{self.task.id}/', f'/project/{self.task.project_id}/')
+        self.assertEqual(self.client.get(other_url).status_code, 403)
+
+    def test_proxy_backends(self):
+        self.client.force_authenticate(self.admin)
+        with self.settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.task.attachment.name)
+        self.assertEqual(response.content, b'')
+        self.assertIn('inline', response['Content-Disposition'])
+        with self.settings(MEDIA_SENDFILE_BACKEND='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.task.attachment.path)
+
+
+class ChunkedUploadTests(APITestCase):
+    """
+    Subida de adjuntos por partes: se reanuda desde el último byte recibido y el
+    archivo solo se asigna si está completo y su checksum coincide.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = User.objects.create_user(username='duenio')
+        project = Project.objects.create(
+            client=Client.objects.create(user=self.owner, business_name='Dueño'), name='Proyecto'
+        )
+        self.task = Task.objects.create(project=project, title='Sin adjunto')
+        self.client.force_authenticate(self.owner)
+        self.data = b'0123456789' * 10
+
+    def _start(self, **extra):
+        payload = {'target': 'task', 'object_id': self.task.id, 'filename': '../../plano.pdf', 'size': len(self.data)}
+        payload.update(extra)
+        return self.client.post('/api/v1/uploads/', payload, format='json')
+
+    def _put(self, upload_id, offset, chunk):
+        return self.client.put(
+            f'/api/v1/uploads/{upload_id}/', data=chunk,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_resumable_upload_is_attached_when_complete(self):
+        response = self._start(sha256=hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+        url = f'/api/v1/uploads/{upload_id}/'
+
+        self.assertEqual(self._put(upload_id, 0, self.data[:40]).data['offset'], 40)
+        # Una parte repetida o fuera de orden indica dónde continuar.
+        response = self._put(upload_id, 0, self.data[:40])
+        self.assertEqual((response.status_code, response.data['offset']), (409, 40))
+        self.assertEqual(self.client.get(url).data['offset'], 40)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 409)
+
+        self.assertEqual(self._put(upload_id, 40, self.data[40:]).data['offset'], 100)
+        response = self.client.post(url + 'complete/')
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        digest = hashlib.sha256(self.data).hexdigest()
+        self.assertEqual(self.task.attachment.name, f'task_attachments/{digest[:2]}/{digest}/plano.pdf')
+        with self.task.attachment.open('rb') as file:
+            self.assertEqual(file.read(), self.data)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'uploads_tmp')), [])
+
+    def test_checksum_mismatch_discards_upload(self):
+        upload_id = self._start().data['id']
+        self._put(upload_id, 0, self.data)
+        response = self.client.post(f'/api/v1/uploads/{upload_id}/complete/', {'sha256': '0' * 64}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.attachment)
+
+    def test_limits_and_permissions(self):
+        upload_id = self._start().data['id']
+        self.assertEqual(self._put(upload_id, 0, self.data + b'x').status_code, 413)
+        with self.settings(CHUNKED_UPLOAD_MAX_SIZE=10):
+            self.assertEqual(self._start().status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username='otro'))
+        self.assertEqual(self._start().status_code, 403)
+        self.assertEqual(self.client.get(f'/api/v1/uploads/{upload_id}/').status_code, 404)
+
+    def test_prune_abandoned_uploads(self):
+        upload_id = self._start().data['id']
+        ChunkedUpload.objects.filter(pk=upload_id).update(updated_at=timezone.now() - timedelta(days=2))
+        self._start()
+        call_command('prune_uploads', stdout=StringIO())
+        self.assertEqual(ChunkedUpload.objects.count(), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'uploads_tmp'))), 1)
+
+
+class ContentAddressedStorageTests(APITestCase):
+    """
+    Los adjuntos con el mismo contenido se guardan una sola vez, y gc_attachments
+    solo borra los archivos que ya no usa ninguna tarea ni proyecto.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.project = Project.objects.create(
+            client=Client.objects.create(user=User.objects.create_user(username='cliente'), business_name='Cliente'),
+            name='Proyecto',
+        )
+
+    def _task_with(self, filename, content):
+        task = Task.objects.create(project=self.project, title=filename)
+        task.attachment.save(filename, ContentFile(content))
+        return task
+
+    def _gc(self, *args):
+        out = StringIO()
+        call_command('gc_attachments', '--min-age-hours', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_same_content_is_stored_once(self):
+        first = self._task_with('folleto.pdf', b'folleto')
+        second = self._task_with('folleto.pdf', b'folleto')
+        renamed = self._task_with('otro nombre.pdf', b'folleto')
+        self.assertEqual(first.attachment.name, second.attachment.name)
+        self.assertTrue(renamed.attachment.name.endswith('/otro_nombre.pdf'))
+        self.assertEqual(os.path.dirname(renamed.attachment.name), os.path.dirname(first.attachment.name))
+        # Otro nombre para el mismo contenido es un enlace duro: mismos bytes en disco.
+        self.assertTrue(os.path.samefile(first.attachment.path, renamed.attachment.path))
+        self.project.attachment.save('folleto.pdf', ContentFile(b'folleto'))
+        self.assertNotEqual(self.project.attachment.name, first.attachment.name)
+        self.assertTrue(os.path.samefile(self.project.attachment.path, first.attachment.path))
+
+    def test_reusing_an_orphaned_file_protects_it_from_gc(self):
+        orphan = self._task_with('folleto.pdf', b'folleto')
+        path = orphan.attachment.path
+        orphan.delete()
+        os.utime(path, (0, 0))
+
+        reused = self._task_with('folleto.pdf', b'folleto')
+        self.assertEqual(reused.attachment.path, path)
+        self.assertGreater(os.stat(path).st_mtime, time.time() - 60)
+        # Aunque gc_attachments leyera las referencias antes de que se guardara la
+        # tarea, las vuelve a comprobar antes de borrar.
+        with mock.patch('portal_sandoval_project.storage.attachment_references', return_value={}):
+            self.assertEqual(collect_garbage(min_age=timedelta(0)), (0, 0))
+        self.assertTrue(os.path.exists(path))
+
+    def test_long_names_fit_in_the_field(self):
+        task = self._task_with('x' * 200 + '.pdf', b'largo')
+        self.assertLessEqual(len(task.attachment.name), 255)
+        self.assertTrue(task.attachment.name.endswith('.pdf'))
+
+    def test_gc_removes_only_unreferenced_files(self):
+        first = self._task_with('folleto.pdf', b'folleto')
+        second = self._task_with('folleto.pdf', b'folleto')
+        shared_path = first.attachment.path
+        old = self._task_with('viejo.pdf', b'viejo')
+        old_path = old.attachment.path
+        old.attachment = ''
+        old.save()
+        first.delete()
+
+        self.assertIn('1 archivos huérfanos se borrarían', self._gc('--dry-run'))
+        self.assertTrue(os.path.exists(old_path))
+        # Con la antigüedad mínima por defecto, un archivo recién escrito se respeta.
+        call_command('gc_attachments', stdout=StringIO())
+        self.assertTrue(os.path.exists(old_path))
+
+        self.assertIn('1 archivos huérfanos borrados', self._gc())
+        self.assertFalse(os.path.exists(os.path.dirname(old_path)))
+        # El folleto sigue en uso por la segunda tarea.
+        self.assertTrue(os.path.exists(shared_path))
+        second.delete()
+        self._gc()
+        self.assertFalse(os.path.exists(shared_path))
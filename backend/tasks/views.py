@@ -1,8 +1,13 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from portal_sandoval_project.conditional import ConditionalGetMixin
+from portal_sandoval_project.fast_serializers import ValuesListMixin
+from . import bulk
 from .models import Task
-from .serializers import TaskSerializer
+from .serializers import TaskSerializer, BulkTaskSerializer
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     API endpoint que permite ver y gestionar tareas.
     """
@@ -12,4 +17,28 @@ class TaskViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Optimizamos la consulta para precargar los datos del proyecto y cliente relacionados.
         # Esto evita hacer consultas adicionales a la base de datos por cada tarea.
-        return Task.objects.select_related('project__client').all().order_by('due_date', 'created_at')
\ No newline at end of file
+        return self.select_related_fields(Task.objects.order_by('due_date', 'created_at', 'id'), 'project', 'project__client')
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Operaciones masivas sobre tareas, en una sola transacción.
+        Se accederá a través de la URL: /api/v1/tasks/bulk/
+
+        POST: Crea una lista de tareas (cada una con su 'project').
+        PATCH: Edita parcialmente una lista de tareas (cada una con su 'id').
+        DELETE: Borra las tareas cuyos IDs se envían en {"ids": [...]}.
+        Si algún elemento no es válido no se escribe nada y se devuelven los errores.
+        """
+        context = self.get_serializer_context()
+        if request.method == 'POST':
+            tasks = bulk.bulk_create_tasks(request.data, context)
+            return Response(BulkTaskSerializer(tasks, many=True, context=context).data, status=status.HTTP_201_CREATED)
+
+        if request.method == 'PATCH':
+            tasks = bulk.bulk_update_tasks(request.data, context)
+            return Response(BulkTaskSerializer(tasks, many=True, context=context).data)
+
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        deleted = bulk.bulk_delete_tasks(ids)
+        return Response({'deleted': deleted})
@@ -73,4 +73,19 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Abre el adjunto de una tarea o proyecto ('task' o 'project') en una pestaña nueva.
+// El navegador no envía el token al abrir un enlace, así que pedimos antes un enlace
+// de descarga firmado y temporal al backend.
+export const openAttachment = async (kind, id) => {
+  // Abrimos la pestaña antes de la petición para que el navegador no la bloquee.
+  const tab = window.open('', '_blank');
+  try {
+    const { data } = await apiClient.get(`files/${kind}/${id}/link/`);
+    tab.location.href = data.url;
+  } catch (error) {
+    tab.close();
+    console.error('Error al abrir el adjunto:', error);
+  }
+};
+
 export default apiClient;
\ No newline at end of file
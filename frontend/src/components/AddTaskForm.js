@@ -18,7 +18,7 @@ function AddTaskForm({ onTaskAdded, projectId = null }) {
   useEffect(() => {
     // Solo cargamos la lista de proyectos si no estamos en una página de proyecto específico
     if (!projectId) {
-      apiClient.get('/projects/')
+      apiClient.get('/projects/?fields=id,name')
         .then(response => setProjects(response.data))
         .catch(err => console.error("Error al cargar proyectos:", err));
     }
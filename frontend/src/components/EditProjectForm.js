@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import apiClient from '../api';
+import apiClient, { openAttachment } from '../api';
 import './EditProjectForm.css';
 
 function EditProjectForm({ project, clients, onProjectUpdated, onCancel }) {
@@ -128,7 +128,7 @@ function EditProjectForm({ project, clients, onProjectUpdated, onCancel }) {
           <input id="project-attachment-upload" name="attachment" type="file" onChange={handleFileChange} />
           {project.attachment && (
             <div className="current-attachment">
-              <p>Archivo actual: <a href={project.attachment} target="_blank" rel="noopener noreferrer">Ver archivo</a></p>
+              <p>Archivo actual: <a href={project.attachment} onClick={(e) => { e.preventDefault(); openAttachment('project', project.id); }} target="_blank" rel="noopener noreferrer">Ver archivo</a></p>
               <p className="attachment-note">(Solo se reemplazará si seleccionas un nuevo archivo)</p>
             </div>
           )}
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { FaYoutube, FaPaperclip, FaTrash, FaEdit, FaSave, FaTimes } from 'react-icons/fa';
+import { openAttachment } from '../api';
 import './TaskList.css';
 
 // Helper para formatear el coste como moneda, asegurando consistencia.
@@ -125,7 +126,7 @@ function TaskList({ tasks, onToggleStatus, onUpdateTask, onDeleteTask, showProje
             <div className="task-actions">
               <div className="task-links">
                 {task.youtube_url && <a href={task.youtube_url} target="_blank" rel="noopener noreferrer" className="task-link-icon youtube" title="Ver video en YouTube"><FaYoutube /></a>}
-                {task.attachment && <a href={task.attachment} target="_blank" rel="noopener noreferrer" className="task-link-icon attachment" title="Ver archivo adjunto"><FaPaperclip /></a>}
+                {task.attachment && <a href={task.attachment} onClick={(e) => { e.preventDefault(); openAttachment('task', task.id); }} target="_blank" rel="noopener noreferrer" className="task-link-icon attachment" title="Ver archivo adjunto"><FaPaperclip /></a>}
               </div>
               <button onClick={() => handleEditStart(task)} className="task-button edit" title="Editar"><FaEdit /></button>
               <button onClick={() => onDeleteTask(task.id)} className="task-button delete" title="Eliminar"><FaTrash /></button>
@@ -171,7 +172,7 @@ function TaskList({ tasks, onToggleStatus, onUpdateTask, onDeleteTask, showProje
                   {/* Mostramos el enlace al archivo actual si existe */}
                   {typeof editedTaskData.attachment === 'string' && editedTaskData.attachment && (
                     <div className="current-attachment">
-                      <a href={editedTaskData.attachment} target="_blank" rel="noopener noreferrer">Ver adjunto actual</a>
+                      <a href={editedTaskData.attachment} onClick={(e) => { e.preventDefault(); openAttachment('task', task.id); }} target="_blank" rel="noopener noreferrer">Ver adjunto actual</a>
                       {/* Botón para marcar el archivo para ser borrado */}
                       <button onClick={() => setEditedTaskData(p => ({...p, attachment: ''}))} className="remove-attachment-btn" title="Eliminar adjunto">
                         <FaTimes />
@@ -50,7 +50,7 @@ const AdminDashboard = () => {
     const fetchClients = async () => {
       try {
         // Usando apiClient que ya tiene configurado el baseURL y los headers
-        const response = await apiClient.get('clients/');
+        const response = await apiClient.get('clients/?fields=id,business_name');
         setClients(response.data);
       } catch (error) {
         console.error('Error cargando clientes:', error);
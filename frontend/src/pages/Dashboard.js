@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import apiClient from '../api';
 import ClientList from '../components/ClientList';
 import ProjectList from '../components/ProjectList';
@@ -24,29 +24,89 @@ function Dashboard() {
   const [showClients, setShowClients] = useState(false); // Estado para controlar la visibilidad de los clientes
 
   // --- LÓGICA DE CARGA DE DATOS ---
+  // Copia normalizada de los datos del servidor ({id: objeto}) y la marca de agua
+  // para pedir solo los cambios (dashboard/changes/) después de cada edición.
+  const storeRef = useRef({ clients: {}, projects: {}, tasks: {}, watermark: null });
+
+  // Reconstruye las listas en la forma que esperan los componentes: el cliente dentro
+  // de cada proyecto y los nombres de proyecto y cliente en cada tarea.
+  const publishStore = useCallback(() => {
+    const store = storeRef.current;
+    const allClients = Object.values(store.clients);
+    const fullProjects = Object.values(store.projects).map(project => ({
+      ...project,
+      client: store.clients[project.client_id],
+    }));
+    const projectsById = Object.fromEntries(fullProjects.map(project => [project.id, project]));
+    const fullTasks = Object.values(store.tasks).map(task => ({
+      ...task,
+      project_name: projectsById[task.project_id]?.name,
+      client_name: projectsById[task.project_id]?.client?.business_name,
+    }));
+    const byNewest = (a, b) => new Date(b.created_at) - new Date(a.created_at) || b.id - a.id;
+    const byDueDate = (a, b) => (a.due_date === null) - (b.due_date === null)
+      || (a.due_date || '').localeCompare(b.due_date || '')
+      || new Date(a.created_at) - new Date(b.created_at) || a.id - b.id;
+    setClients(allClients.filter(client => client.is_active).sort(byNewest));
+    setProjects(fullProjects.sort(byNewest));
+    setTasks(fullTasks.sort(byDueDate));
+    setArchivedClients(allClients.filter(client => !client.is_active).sort(byNewest));
+  }, []);
+
   // Movemos fetchData fuera del useEffect para poder llamarla desde otros manejadores.
   // Usamos useCallback para evitar que la función se recree en cada render, optimizando el rendimiento.
   const fetchData = useCallback(async () => {
     setLoading(true);
     setError(null);
     try {
-      const [clientsResponse, projectsResponse, tasksResponse, archivedClientsResponse] = await Promise.all([
-        apiClient.get('clients/'),
-        apiClient.get('projects/'),
-        apiClient.get('tasks/'),
-        apiClient.get('clients/archived/') // Llamamos al nuevo endpoint
-      ]);
-      setClients(clientsResponse.data);
-      setProjects(projectsResponse.data);
-      setTasks(tasksResponse.data);
-      setArchivedClients(archivedClientsResponse.data);
+      // Una sola petición con clientes, proyectos y tareas normalizados (sin datos repetidos).
+      const { data } = await apiClient.get('dashboard/bootstrap/');
+      const byId = items => Object.fromEntries(items.map(item => [item.id, item]));
+      storeRef.current = {
+        clients: data.clients,
+        projects: byId(data.projects),
+        tasks: byId(data.tasks),
+        watermark: data.watermark,
+      };
+      publishStore();
     } catch (err) {
       setError('Hubo un problema al cargar los datos.');
       console.error(err);
     } finally {
       setLoading(false);
     }
-  }, []); // El array vacío significa que esta función nunca cambiará.
+  }, [publishStore]);
+
+  // Trae solo lo que cambió desde la última carga (tareas, proyectos, clientes, borrados
+  // y los costes recalculados de los proyectos y clientes afectados) y lo aplica.
+  const syncChanges = useCallback(async () => {
+    const store = storeRef.current;
+    if (!store.watermark) {
+      return fetchData();
+    }
+    let data;
+    try {
+      ({ data } = await apiClient.get('dashboard/changes/', { params: { since: store.watermark } }));
+    } catch (err) {
+      // 410: la marca de agua es demasiado antigua; recargamos todo.
+      console.error("Error al sincronizar cambios:", err.response?.data || err.message);
+      return fetchData();
+    }
+    Object.assign(store.clients, data.clients);
+    data.projects.forEach(project => { store.projects[project.id] = project; });
+    data.tasks.forEach(task => { store.tasks[task.id] = task; });
+    data.deleted.client.forEach(id => { delete store.clients[id]; });
+    data.deleted.project.forEach(id => { delete store.projects[id]; });
+    data.deleted.task.forEach(id => { delete store.tasks[id]; });
+    Object.entries(data.rollups.projects).forEach(([id, totals]) => {
+      if (store.projects[id]) store.projects[id] = { ...store.projects[id], ...totals };
+    });
+    Object.entries(data.rollups.clients).forEach(([id, totals]) => {
+      if (store.clients[id]) store.clients[id] = { ...store.clients[id], ...totals };
+    });
+    store.watermark = data.watermark;
+    publishStore();
+  }, [fetchData, publishStore]);
 
   // --- LÓGICA DE CARGA DE DATOS ---
   useEffect(() => {
@@ -60,7 +120,7 @@ function Dashboard() {
       await apiClient.post('clients/', newClientData, {
         headers: { 'Content-Type': 'application/json' }
       });
-      fetchData(); // Unificamos la lógica: siempre refrescamos los datos desde el servidor.
+      syncChanges(); // Traemos del servidor solo lo que cambió.
     } catch (err) {
       console.error("Error al añadir cliente:", err.response?.data || err.message);
       // Podríamos propagar el error para mostrarlo en el formulario
@@ -160,13 +220,10 @@ function Dashboard() {
         },
       });
       
-      // Actualizar localmente con la respuesta del servidor
-      // Ya que no podemos ver exactamente qué datos hay en el FormData,
-      // usamos la respuesta completa del servidor para tener todos los campos
+      // Mostramos el proyecto enseguida y luego traemos los cambios
+      // (incluidos los totales actualizados de su cliente) sin recargar todo.
       setProjects(prevProjects => [...prevProjects, response.data]);
-      
-      // Actualizar las referencias del cliente si es necesario
-      // No necesitamos recargar todo
+      await syncChanges();
     } catch (err) {
       console.error("Error al añadir proyecto:", err.response?.data || err.message);
       alert('Error al crear el proyecto. Inténtalo de nuevo.');
@@ -186,18 +243,8 @@ function Dashboard() {
       // Actualizar localmente con la respuesta del servidor
       setTasks(prevTasks => [...prevTasks, response.data]);
       
-      // Actualizar el costo del proyecto asociado si es necesario
-      // Esto es un poco más complejo porque afecta a los totales del proyecto
-      // Una opción sería actualizar solo ese proyecto específico
-      const projectId = response.data.project;
-      if (projectId) {
-        // Obtener el proyecto actualizado para tener los costes correctos
-        const updatedProject = await apiClient.get(`projects/${projectId}/`);
-        // Actualizar solo ese proyecto en el estado
-        setProjects(prevProjects => prevProjects.map(p => 
-          p.id === projectId ? updatedProject.data : p
-        ));
-      }
+      // Traemos los cambios: la tarea y los costes recalculados de su proyecto y cliente.
+      await syncChanges();
     } catch (err) {
       console.error("Error al añadir tarea:", err.response?.data || err.message);
       alert('Error al crear la tarea. Inténtalo de nuevo.');
@@ -209,7 +256,6 @@ function Dashboard() {
     try {
       // Encontrar la tarea actual para actualización optimista
       const taskToUpdate = tasks.find(t => t.id === taskId);
-      const projectId = taskToUpdate?.project;
       
       // Crear una copia optimista de la tarea actualizada
       if (taskToUpdate) {
@@ -268,15 +314,8 @@ function Dashboard() {
         task.id === taskId ? response.data : task
       ));
       
-      // Si hay proyecto asociado y si actualizamos campos como cost que afectan al proyecto
-      if (projectId && (updatedData.cost !== undefined || updatedData.status !== undefined)) {
-        // Obtener el proyecto actualizado para tener los costes correctos
-        const updatedProject = await apiClient.get(`projects/${projectId}/`);
-        // Actualizar solo ese proyecto en el estado
-        setProjects(prevProjects => prevProjects.map(p => 
-          p.id === projectId ? updatedProject.data : p
-        ));
-      }
+      // Traemos los costes recalculados de los proyectos y clientes afectados.
+      await syncChanges();
       
       return response.data; // Devolvemos los datos actualizados
     } catch (err) {
@@ -333,25 +372,14 @@ function Dashboard() {
 
   const handleDeleteTask = async (taskId) => {
     try {
-      // Encontrar la tarea y su proyecto asociado antes de eliminarla
-      const taskToDelete = tasks.find(t => t.id === taskId);
-      const projectId = taskToDelete?.project;
-      
       // Actualizar estado local primero - eliminar la tarea de la lista
       setTasks(prevTasks => prevTasks.filter(task => task.id !== taskId));
       
       // Enviar al backend
       await apiClient.delete(`tasks/${taskId}/`);
       
-      // Si hay proyecto asociado, actualizar sus costes
-      if (projectId) {
-        // Obtener el proyecto actualizado para tener los costes correctos
-        const updatedProject = await apiClient.get(`projects/${projectId}/`);
-        // Actualizar solo ese proyecto en el estado
-        setProjects(prevProjects => prevProjects.map(p => 
-          p.id === projectId ? updatedProject.data : p
-        ));
-      }
+      // Traemos el borrado y los costes recalculados de su proyecto y cliente.
+      await syncChanges();
     } catch (err) {
       console.error("Error al eliminar la tarea:", err);
       alert('Error al eliminar la tarea. Inténtalo de nuevo.');
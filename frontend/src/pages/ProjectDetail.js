@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useCallback, useReducer } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { FaYoutube, FaPaperclip } from 'react-icons/fa';
-import apiClient from '../api';
+import apiClient, { openAttachment } from '../api';
 import TaskList from '../components/TaskList';
 import AddTaskForm from '../components/AddTaskForm';
 import EditProjectForm from '../components/EditProjectForm';
@@ -459,6 +459,7 @@ function ProjectDetail() {
                 {project.attachment && (
                   <a 
                     href={project.attachment} 
+                    onClick={(e) => { e.preventDefault(); openAttachment('project', project.id); }}
                     target="_blank" 
                     rel="noopener noreferrer" 
                     className="project-link-icon attachment" 